@@ -2,19 +2,35 @@
 
 from utils import preprocess_text
 from search import SearchEngine
+from query_parser import QuerySyntaxError
 from main import initialize_search_engine
+from snippets import SnippetBuilder, highlight, load_snippet_index, snippet_index_path
 from colorama import Fore, Back, Style, init as colorama_init
 
 # colorama'yı başlat (Windows'ta ANSI desteği için önemli)
 colorama_init(autoreset=True) # autoreset=True her print'ten sonra stili sıfırlar
 
-def run_app(search_engine, raw_documents):
+DOC_STORE_PATH = 'imdb_documents.store'
+
+def _print_snippet(snippet):
+    # Eşleşen kelimeler soluk özet metni içinde parlak sarı gösterilir.
+    text = highlight(snippet, Style.NORMAL + Fore.YELLOW + Style.BRIGHT, Style.RESET_ALL + Style.DIM) if snippet[0] else "İçerik bulunamadı."
+    print(Style.DIM + f"     İçerik (Özet): {text}" + Style.RESET_ALL)
+
+def run_app(search_engine, raw_documents, snippet_builder):
     """
     Kullanıcı arayüzünü çalıştıran ana fonksiyon.
+    snippet_builder: Sonuç özetlerini üreten snippets.SnippetBuilder; özet indeksiyle
+        (load_snippet_index) kurulmalıdır, aksi halde gösterilen her inceleme yeniden analiz edilir.
     """
     if not search_engine or not raw_documents:
         print(Fore.RED + "HATA: Arama motoru veya dokümanlar yüklenemedi. Arayüz başlatılamıyor.")
         return
+    if snippet_builder is None:
+        print(Fore.RED + "HATA: Özet üretici (snippet_builder) verilmedi. Arayüz başlatılamıyor.")
+        return
+    if snippet_builder.annotations is None:
+        print(Fore.YELLOW + "Uyarı: Özet indeksi yok; özetler her sonuç için inceleme yeniden analiz edilerek üretilecek.")
 
     print(Fore.CYAN + Style.BRIGHT + "\n\n======================================================")
     print(Fore.CYAN + Style.BRIGHT + "      BASİT BİLGİ ERİŞİM SİSTEMİ ARAYÜZÜ")
@@ -26,16 +42,17 @@ def run_app(search_engine, raw_documents):
         print(Fore.YELLOW + "\nYapmak istediğiniz işlem nedir?")
         print(Fore.GREEN + "1: " + Style.RESET_ALL + "Boolean Arama")
         print(Fore.GREEN + "2: " + Style.RESET_ALL + "TF-IDF Sıralı Arama")
+        print(Fore.GREEN + "3: " + Style.RESET_ALL + "Gelişmiş Boolean Sorgu (AND/OR/NOT, parantez, \"ifade\")")
         print(Fore.RED + "exit: " + Style.RESET_ALL + "Çıkış")
         
-        choice = input(Fore.WHITE + "Seçiminiz (1, 2, exit): " + Style.RESET_ALL).strip().lower()
+        choice = input(Fore.WHITE + "Seçiminiz (1, 2, 3, exit): " + Style.RESET_ALL).strip().lower()
 
         if choice == 'exit':
             print(Fore.MAGENTA + "Programdan çıkılıyor...")
             break
         
-        if choice not in ['1', '2']:
-            print(Fore.RED + "Geçersiz seçim. Lütfen 1, 2 veya exit girin.")
+        if choice not in ['1', '2', '3']:
+            print(Fore.RED + "Geçersiz seçim. Lütfen 1, 2, 3 veya exit girin.")
             continue
 
         user_query = input(Fore.WHITE + "Lütfen arama sorgunuzu girin: " + Style.RESET_ALL).strip()
@@ -59,10 +76,10 @@ def run_app(search_engine, raw_documents):
             if not boolean_results:
                 print(Fore.YELLOW + "   Bu sorgu için sonuç bulunamadı.")
             else:
+                snippets = snippet_builder.snippets(boolean_results[:K_FOR_DISPLAY], user_query)
                 for i, doc_id in enumerate(boolean_results[:K_FOR_DISPLAY]):
-                    doc_content_snippet = raw_documents.get(doc_id, "İçerik bulunamadı.")[:100]
                     print(Fore.CYAN + f"  {i+1}. Doküman ID: {doc_id}")
-                    print(Style.DIM + f"     İçerik (Önizleme): {doc_content_snippet}..." + Style.RESET_ALL) # DIM ile içeriği soluk yapabiliriz
+                    _print_snippet(snippets[doc_id])
                     print(Fore.BLUE + "-" * 30)
                 if len(boolean_results) > K_FOR_DISPLAY:
                     print(Fore.YELLOW + f"   ... (ve {len(boolean_results) - K_FOR_DISPLAY} daha fazla sonuç)")
@@ -75,19 +92,39 @@ def run_app(search_engine, raw_documents):
             if not tfidf_results_with_scores:
                 print(Fore.YELLOW + "   Bu sorgu için sonuç bulunamadı.")
             else:
+                snippets = snippet_builder.snippets([doc_id for doc_id, _ in tfidf_results_with_scores], user_query)
                 for i, (doc_id, score) in enumerate(tfidf_results_with_scores):
-                    doc_content_snippet = raw_documents.get(doc_id, "İçerik bulunamadı.")[:100]
                     print(Fore.CYAN + f"  {i+1}. Doküman ID: {doc_id}" + Fore.YELLOW + f" (Skor: {score:.4f})")
-                    print(Style.DIM + f"     İçerik (Önizleme): {doc_content_snippet}..." + Style.RESET_ALL)
+                    _print_snippet(snippets[doc_id])
+                    print(Fore.BLUE + "-" * 30)
+        
+        elif choice == '3': # Gelişmiş Boolean Sorgu
+            print(Fore.MAGENTA + Style.BRIGHT + f"Gelişmiş Boolean Sorgu: '{user_query}'" + Style.RESET_ALL)
+            try:
+                query_results = search_engine.boolean_query(user_query)
+            except QuerySyntaxError as e:
+                print(Fore.RED + f"Sorgu hatası: {e}")
+                continue
+            print(Fore.GREEN + Style.BRIGHT + f"\n>>> Sorgu Sonuçları ({len(query_results)} doküman bulundu):" + Style.RESET_ALL)
+            if not query_results:
+                print(Fore.YELLOW + "   Bu sorgu için sonuç bulunamadı.")
+            else:
+                snippets = snippet_builder.snippets(query_results[:K_FOR_DISPLAY], user_query)
+                for i, doc_id in enumerate(query_results[:K_FOR_DISPLAY]):
+                    print(Fore.CYAN + f"  {i+1}. Doküman ID: {doc_id}")
+                    _print_snippet(snippets[doc_id])
                     print(Fore.BLUE + "-" * 30)
+                if len(query_results) > K_FOR_DISPLAY:
+                    print(Fore.YELLOW + f"   ... (ve {len(query_results) - K_FOR_DISPLAY} daha fazla sonuç)")
         
         print(Fore.BLUE + "=" * 50 + "\n" + Style.RESET_ALL)
 
 if __name__ == '__main__':
     print(Fore.BLUE + "Bilgi Erişim Sistemi başlatılıyor... Lütfen bekleyin." + Style.RESET_ALL)
-    search_engine_instance, raw_docs, inv_idx_instance = initialize_search_engine() 
+    search_engine_instance, raw_docs, inv_idx_instance = initialize_search_engine(doc_store_path=DOC_STORE_PATH) # Metinler diskteki sıkıştırılmış depodan okunur
     
     if search_engine_instance and raw_docs:
-        run_app(search_engine_instance, raw_docs)
+        run_app(search_engine_instance, raw_docs,
+                SnippetBuilder(raw_docs, load_snippet_index(snippet_index_path(DOC_STORE_PATH))))
     else:
         print(Fore.RED + Style.BRIGHT + "Başlatma sırasında bir hata oluştu. Arayüz çalıştırılamıyor." + Style.RESET_ALL)
\ No newline at end of file
@@ -0,0 +1,277 @@
+# benchmark.py
+#
+# İndeksleme ve arama sıcak yollarının (hot path) tekrarlanabilir performans ölçümü.
+#   python benchmark.py --corpus synthetic --docs 5000 --zipf 1.1 --output sonuc.json
+#   python benchmark.py --corpus data --data-path data --max-docs 5000 --baseline baseline.json
+# Ölçülen aşamalar: load_documents_imdb, preprocess_text, InvertedIndex.build_index,
+# boolean_search (AND/OR) ve tfidf_rank. Verimlilik (doküman/sn, token/sn), sorgu gecikmesi
+# yüzdelikleri (p50/p95/p99) ve en yüksek bellek kullanımı (peak RSS) raporlanır. Sonuçlar JSON
+# olarak kaydedilir ve --baseline verilirse eşik değerini aşan gerilemeler listelenir
+# (gerileme varsa çıkış kodu 1 olur).
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from itertools import islice
+
+try:
+    import resource
+except ImportError: # Windows: peak RSS ölçülemez
+    resource = None
+
+from inverted_index import InvertedIndex
+from search import SearchEngine
+from utils import load_documents_imdb, preprocess_text
+
+# Karşılaştırmada "büyük olan iyidir" (verimlilik) ve "küçük olan iyidir" (gecikme, bellek) metrikleri
+_HIGHER_IS_BETTER_SUFFIXES = ('_per_sec',)
+_LOWER_IS_BETTER_SUFFIXES = ('_ms', '_mb')
+
+_CONSONANTS = 'bcdfghjklmnprstvz'
+_VOWELS = 'aeiou'
+
+
+def _synthetic_word(rng):
+    """Stopword olmayan, yalnızca harflerden oluşan telaffuz edilebilir bir kelime üretir."""
+    syllables = rng.randint(2, 4)
+    return ''.join(rng.choice(_CONSONANTS) + rng.choice(_VOWELS) for _ in range(syllables)) + rng.choice(_CONSONANTS)
+
+
+def generate_synthetic_corpus(num_docs, vocab_size=20000, zipf_s=1.1, mean_doc_length=230, seed=0):
+    """
+    Terim frekansları Zipf dağılımına (rank^-zipf_s) uyan yapay bir korpus üretir.
+    Aynı parametreler ve seed ile her zaman aynı korpus oluşur.
+    Returns: [(dosya adı, metin), ...] (IMDb dosya adı biçiminde, ör. "0_7.txt")
+    """
+    rng = random.Random(seed)
+    vocabulary = list(dict.fromkeys(_synthetic_word(rng) for _ in range(vocab_size * 2)))[:vocab_size]
+    weights = [1.0 / (rank + 1) ** zipf_s for rank in range(len(vocabulary))]
+    documents = []
+    for doc_no in range(num_docs):
+        doc_length = max(1, int(rng.expovariate(1.0 / mean_doc_length)))
+        words = rng.choices(vocabulary, weights, k=doc_length)
+        documents.append((f"{doc_no}_{rng.randint(1, 10)}.txt", ' '.join(words)))
+    return documents
+
+
+def write_synthetic_imdb_tree(documents, root):
+    """Yapay korpusu load_documents_imdb'nin okuyabileceği train/pos, train/neg ... düzeninde diske yazar."""
+    folders = [os.path.join(root, split, sentiment) for split in ('train', 'test') for sentiment in ('pos', 'neg')]
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+    for doc_no, (file_name, text) in enumerate(documents):
+        with open(os.path.join(folders[doc_no % len(folders)], file_name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def peak_rss_mb():
+    """Sürecin şimdiye kadarki en yüksek bellek kullanımı (MB); ölçülemiyorsa None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta bayt cinsindendir.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def latency_percentiles(latencies_seconds):
+    """Gecikme listesinden p50/p95/p99 ve ortalamayı milisaniye cinsinden döndürür."""
+    if len(latencies_seconds) < 2:
+        value = latencies_seconds[0] * 1000 if latencies_seconds else 0.0
+        return {'p50_ms': value, 'p95_ms': value, 'p99_ms': value, 'mean_ms': value}
+    cut_points = statistics.quantiles(latencies_seconds, n=100, method='inclusive')
+    return {
+        'p50_ms': cut_points[49] * 1000,
+        'p95_ms': cut_points[94] * 1000,
+        'p99_ms': cut_points[98] * 1000,
+        'mean_ms': statistics.fmean(latencies_seconds) * 1000,
+    }
+
+
+def generate_queries(inverted_index, num_queries, seed=0, min_terms=1, max_terms=4):
+    """
+    Sözlükten, df ile orantılı olasılıkla terim seçerek (gerçek sorgular gibi sık terimler ağırlıklı)
+    tekrarlanabilir sorgular üretir.
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted(inverted_index.get_vocabulary())
+    weights = [inverted_index.get_df(term) for term in vocabulary]
+    return [' '.join(rng.choices(vocabulary, weights, k=rng.randint(min_terms, max_terms)))
+            for _ in range(num_queries)]
+
+
+def _measure_queries(run_query, queries):
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        run_query(query)
+        latencies.append(time.perf_counter() - start_time)
+    total = sum(latencies)
+    result = latency_percentiles(latencies)
+    result['queries_per_sec'] = len(queries) / total if total > 0 else 0.0
+    return result
+
+
+def run_benchmarks(data_path, max_docs=None, num_queries=200, top_n=10, seed=0):
+    """
+    data_path altındaki IMDb düzenindeki korpus üzerinde tüm aşamaları ölçer.
+    Sorgu ölçümlerinde sonuç önbelleği kapatılır (her sorgu gerçekten hesaplanır).
+    """
+    results = {}
+
+    start_time = time.perf_counter()
+    raw_documents = load_documents_imdb(data_path)
+    elapsed = time.perf_counter() - start_time
+    total_bytes = sum(len(text) for text in raw_documents.values())
+    results['load'] = {
+        'docs': len(raw_documents),
+        'docs_per_sec': len(raw_documents) / elapsed if elapsed > 0 else 0.0,
+        'mb_per_sec': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if max_docs:
+        raw_documents = dict(islice(raw_documents.items(), max_docs))
+
+    preprocess_text("warm up") # NLTK kaynaklarının ilk yüklenmesi ölçüme dahil edilmez
+    start_time = time.perf_counter()
+    processed_documents = {doc_id: preprocess_text(text) for doc_id, text in raw_documents.items()}
+    elapsed = time.perf_counter() - start_time
+    total_tokens = sum(len(tokens) for tokens in processed_documents.values())
+    results['preprocess'] = {
+        'docs': len(processed_documents),
+        'docs_per_sec': len(processed_documents) / elapsed if elapsed > 0 else 0.0,
+        'tokens_per_sec': total_tokens / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    del raw_documents
+
+    inv_index = InvertedIndex()
+    start_time = time.perf_counter()
+    inv_index.build_index(processed_documents)
+    elapsed = time.perf_counter() - start_time
+    results['build_index'] = {
+        'docs': inv_index.total_docs,
+        'terms': len(inv_index.index),
+        'docs_per_sec': inv_index.total_docs / elapsed if elapsed > 0 else 0.0,
+        'tokens_per_sec': total_tokens / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    del processed_documents
+
+    search_engine = SearchEngine(inv_index, cache_size=0)
+    queries = generate_queries(inv_index, num_queries, seed)
+    results['boolean_and'] = _measure_queries(lambda q: search_engine.boolean_search(q, 'AND'), queries)
+    results['boolean_or'] = _measure_queries(lambda q: search_engine.boolean_search(q, 'OR'), queries)
+    results['tfidf_rank'] = _measure_queries(lambda q: search_engine.tfidf_rank(q, top_n), queries)
+    results['tfidf_rank_maxscore'] = _measure_queries(
+        lambda q: search_engine.tfidf_rank(q, top_n, pruning='maxscore'), queries)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold=0.10):
+    """
+    Sonuçları kayıtlı bir taban çizgisiyle karşılaştırır. Verimlilik metriklerinde (…_per_sec)
+    düşüş, gecikme/bellek metriklerinde (…_ms, …_mb) artış threshold oranını aşarsa gerileme sayılır.
+    Returns: [(aşama.metrik, taban değer, yeni değer, değişim oranı), ...]
+    """
+    regressions = []
+    baseline_results = baseline.get('results', baseline)
+    for stage, metrics in results.get('results', results).items():
+        baseline_metrics = baseline_results.get(stage)
+        if not isinstance(metrics, dict) or not isinstance(baseline_metrics, dict):
+            continue
+        for metric, value in metrics.items():
+            old_value = baseline_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old_value, (int, float)) or old_value <= 0:
+                continue
+            change = (value - old_value) / old_value
+            if metric.endswith(_HIGHER_IS_BETTER_SUFFIXES) and change < -threshold:
+                regressions.append((f"{stage}.{metric}", old_value, value, change))
+            elif metric.endswith(_LOWER_IS_BETTER_SUFFIXES) and change > threshold:
+                regressions.append((f"{stage}.{metric}", old_value, value, change))
+    return regressions
+
+
+def print_results(results):
+    for stage, metrics in results.items():
+        if not isinstance(metrics, dict):
+            print(f"{stage:<22} {metrics}")
+            continue
+        formatted = ', '.join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                              for name, value in metrics.items())
+        print(f"{stage:<22} {formatted}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="İndeksleme ve arama performans ölçümü.")
+    parser.add_argument('--corpus', choices=('synthetic', 'data'), default='synthetic')
+    parser.add_argument('--data-path', default='data', help="--corpus data için IMDb dizini.")
+    parser.add_argument('--max-docs', type=int, default=None,
+                        help="Ön işleme ve indeksleme aşamalarında kullanılacak en fazla doküman sayısı.")
+    parser.add_argument('--docs', type=int, default=5000, help="Yapay korpus doküman sayısı.")
+    parser.add_argument('--vocab', type=int, default=20000, help="Yapay korpus sözlük boyutu.")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Yapay korpus Zipf üssü.")
+    parser.add_argument('--doc-length', type=int, default=230, help="Yapay dokümanların ortalama kelime sayısı.")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Sonuçların yazılacağı JSON dosyası.")
+    parser.add_argument('--baseline', help="Karşılaştırılacak JSON sonuç dosyası.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Gerileme eşiği (0.10 = %%10).")
+    args = parser.parse_args(argv)
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'threshold')}
+    temp_dir = None
+    try:
+        if args.corpus == 'synthetic':
+            temp_dir = tempfile.mkdtemp(prefix='ir_benchmark_')
+            write_synthetic_imdb_tree(
+                generate_synthetic_corpus(args.docs, args.vocab, args.zipf, args.doc_length, args.seed), temp_dir)
+            data_path = temp_dir
+        else:
+            data_path = args.data_path
+        results = run_benchmarks(data_path, args.max_docs, args.queries, args.top_n, args.seed)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        'config': config,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    print("\n--- Benchmark Sonuçları ---")
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nSonuçlar '{args.output}' dosyasına yazıldı.")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print("UYARI: Taban çizgisi farklı ayarlarla ölçülmüş; karşılaştırma yanıltıcı olabilir.")
+        regressions = compare_with_baseline(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} gerileme (eşik %{args.threshold * 100:.0f}):")
+            for name, old_value, new_value, change in regressions:
+                print(f"  {name}: {old_value:.3f} -> {new_value:.3f} ({change:+.1%})")
+            return 1
+        print(f"\nTaban çizgisine göre gerileme yok (eşik %{args.threshold * 100:.0f}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
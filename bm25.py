@@ -0,0 +1,108 @@
+# bm25.py
+
+import math
+from array import array
+
+# Okapi BM25 varsayılan parametreleri
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+# BM25+ için önerilen alt sınır (Lv & Zhai, 2011); 0.0 klasik BM25'tir.
+DEFAULT_BM25_PLUS_DELTA = 1.0
+
+
+def validate_bm25_params(k1, b, delta=0.0):
+    if k1 < 0:
+        raise ValueError(f"k1 negatif olamaz: {k1}")
+    if not 0.0 <= b <= 1.0:
+        raise ValueError(f"b 0 ile 1 arasında olmalıdır: {b}")
+    if delta < 0:
+        raise ValueError(f"delta negatif olamaz: {delta}")
+
+
+def calculate_bm25_idf(total_documents, document_frequency_of_term):
+    """
+    BM25 IDF'si: log(1 + (N - df + 0.5) / (df + 0.5)).
+    Klasik Robertson-Sparck Jones IDF'sinin aksine her zaman pozitiftir; çok yaygın terimler
+    skoru düşürmez, yalnızca az katkı yapar.
+    """
+    if total_documents == 0 or document_frequency_of_term == 0:
+        return 0.0
+    return math.log(1 + (total_documents - document_frequency_of_term + 0.5) / (document_frequency_of_term + 0.5))
+
+
+def calculate_bm25_term_doc(term_frequency_in_doc, total_documents, document_frequency_of_term,
+                            doc_length, avg_doc_length, k1=DEFAULT_K1, b=DEFAULT_B, delta=0.0):
+    """
+    Bir dokümandaki bir terimin BM25 (delta > 0 ise BM25+) katkısı:
+        idf * ((k1 + 1) * tf / (tf + k1 * (1 - b + b * dl / avgdl)) + delta)
+    """
+    if term_frequency_in_doc <= 0:
+        return 0.0
+    idf_val = calculate_bm25_idf(total_documents, document_frequency_of_term)
+    length_ratio = doc_length / avg_doc_length if avg_doc_length > 0 else 1.0
+    norm = k1 * (1 - b + b * length_ratio)
+    return idf_val * ((k1 + 1) * term_frequency_in_doc / (term_frequency_in_doc + norm) + delta)
+
+
+def compute_bm25_norms(inverted_index, k1=DEFAULT_K1, b=DEFAULT_B):
+    """
+    Her doküman için uzunluk normalizasyonu K_d = k1 * (1 - b + b * dl / avgdl) değerlerini önceden hesaplar.
+    Sorgu anında posting başına yalnızca bu tablodan bir okuma yapılır.
+    Sıralı postings dizileri sunan indekslerde (get_postings_arrays) doküman numarasıyla
+    indekslenen yoğun bir array('d') döner; InvertedIndex'te postings doc_id ile anahtarlandığı
+    için {doc_id: K_d} sözlüğü döner.
+    """
+    avg_doc_length = inverted_index.avg_doc_length
+    if avg_doc_length > 0:
+        base, scale = k1 * (1 - b), k1 * b / avg_doc_length
+    else:
+        base, scale = k1, 0.0 # Tüm dokümanlar boşsa uzunluk oranı 1 kabul edilir.
+    if hasattr(inverted_index, 'get_postings_arrays') and hasattr(inverted_index, 'doc_ids'):
+        get_doc_length = inverted_index.get_doc_length
+        return array('d', (base + scale * get_doc_length(doc_id) for doc_id in inverted_index.doc_ids))
+    return {doc_id: base + scale * doc_length for doc_id, doc_length in inverted_index.doc_lengths.items()}
+
+
+def accumulate_bm25_scores(query_terms, inverted_index, total_documents_N, k1=DEFAULT_K1, b=DEFAULT_B,
+                           delta=0.0, norms=None):
+    """
+    Sorgunun aday dokümanlarının BM25 / BM25+ skorlarını "term-at-a-time" yöntemiyle hesaplar
+    (tfidf.accumulate_tfidf_scores ile aynı akümülatör yapısı).
+    Terim başına sabit c = idf * (k1 + 1) ve idf * delta bir kez hesaplanır; posting başına
+    yalnızca c * tf / (tf + K_d) (+ sabit) toplanır.
+
+    norms: compute_bm25_norms(inverted_index, k1, b) çıktısı; verilmezse burada hesaplanır.
+    Returns: {doc_id: skor}
+    """
+    if norms is None:
+        norms = compute_bm25_norms(inverted_index, k1, b)
+    dense = isinstance(norms, array)
+    scores = {}
+    for term in query_terms:
+        idf_val = calculate_bm25_idf(total_documents_N, inverted_index.get_df(term))
+        if idf_val == 0.0:
+            continue
+        saturation = idf_val * (k1 + 1)
+        floor = idf_val * delta
+        if dense:
+            # Doküman numarası üzerinden birikim; doc_id'lere en sonda bir kez çevrilir.
+            doc_nums, tfs = inverted_index.get_postings_arrays(term)
+            for doc_num, term_freq_in_doc in zip(doc_nums, tfs):
+                scores[doc_num] = scores.get(doc_num, 0.0) + saturation * term_freq_in_doc / (term_freq_in_doc + norms[doc_num]) + floor
+        else:
+            for doc_id, term_freq_in_doc in inverted_index.get_postings_with_tf(term).items():
+                if term_freq_in_doc > 0:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + saturation * term_freq_in_doc / (term_freq_in_doc + norms[doc_id]) + floor
+    if dense:
+        doc_ids = inverted_index.doc_ids
+        return {doc_ids[doc_num]: score for doc_num, score in scores.items()}
+    return scores
+
+
+if __name__ == '__main__':
+    N_docs = 1000
+    df_w = 50
+    for tf_wd, doc_len in ((1, 100), (5, 100), (5, 400), (20, 100)):
+        bm25 = calculate_bm25_term_doc(tf_wd, N_docs, df_w, doc_len, 200)
+        bm25_plus = calculate_bm25_term_doc(tf_wd, N_docs, df_w, doc_len, 200, delta=DEFAULT_BM25_PLUS_DELTA)
+        print(f"tf={tf_wd:>2}, dl={doc_len:>3}: BM25={bm25:.4f}, BM25+={bm25_plus:.4f}")
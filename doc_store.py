@@ -0,0 +1,306 @@
+# doc_store.py
+
+import lzma
+import mmap
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from index_store import BYTE_ORDER, write_section
+
+# Ham doküman metinlerini sıkıştırılmış bloklar halinde saklayan, doc_id ile rastgele erişimli dosya.
+# Dosya düzeni (tablolar 8 byte'a hizalanır, sayılar makinenin yerel bayt sırasıyla yazılır):
+#   başlık           : MAGIC + _HEADER_STRUCT
+#   blocks           : sıkıştırılmış bloklar (ardışık); her blok, art arda eklenmiş utf-8 metinlerdir
+#   block_offsets    : uint64[num_blocks + 1] -> blokların dosyadaki başlangıç konumları
+#   block_raw_starts : uint64[num_blocks + 1] -> blokların açılmış metin akışındaki başlangıçları
+#   doc_text_offsets : uint64[num_docs + 1]   -> dokümanların açılmış metin akışındaki başlangıçları
+#   doc_blocks       : uint32[num_docs]       -> dokümanın bulunduğu blok
+#   doc_id_offsets   : uint64[num_docs + 1]   -> doc_id_blob içindeki başlangıç konumları
+#   doc_id_blob      : utf-8 doc_id'ler (ardışık)
+# Bir doküman hiçbir zaman iki bloğa bölünmez; bu yüzden bir dokümana erişim tek bir bloğun
+# açılmasını gerektirir.
+MAGIC = b'IRDOC001'
+_HEADER_STRUCT = struct.Struct('<4s4sQQ7Q')
+_SECTIONS = (
+    'block_offsets', 'block_raw_starts', 'doc_text_offsets', 'doc_blocks', 'doc_id_offsets', 'doc_id_blob',
+)
+_CODECS = {
+    b'zlib': (lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress),
+    b'lzma': (lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress),
+}
+DEFAULT_BLOCK_SIZE = 16 * 1024 # Bir bloğun açılmış haldeki hedef boyutu (bayt)
+
+
+def _codec_key(codec):
+    key = codec.encode('ascii') if isinstance(codec, str) else codec
+    if key not in _CODECS:
+        raise ValueError(f"Desteklenmeyen sıkıştırma: {codec!r}. Kullanılabilir: {[c.decode() for c in _CODECS]}")
+    return key
+
+
+class DocumentStoreWriter:
+    """
+    Dokümanları sırayla ekleyerek doküman deposu dosyası yazar. Bloklar doldukça diske yazılır;
+    bellekte yalnızca aktif blok ve doküman başına birkaç sayı tutulur.
+
+    codec: 'zlib' (hızlı açma) veya 'lzma' (daha küçük dosya, daha yavaş açma).
+    block_size: Bir bloğun açılmış haldeki hedef boyutu. Büyük bloklar daha iyi sıkışır, ancak
+        tek bir dokümana erişim için açılması gereken veri de büyür.
+    level: Sıkıştırma seviyesi (None: zlib için 6, lzma için preset 6).
+    """
+
+    def __init__(self, path, codec='zlib', block_size=DEFAULT_BLOCK_SIZE, level=None):
+        self.path = path
+        self.codec = _codec_key(codec)
+        self._compress = _CODECS[self.codec][0]
+        self.block_size = block_size
+        self.level = level
+        self._file = open(path, 'wb')
+        self._file.write(b'\0' * (len(MAGIC) + _HEADER_STRUCT.size))
+        self._block = bytearray()
+        self._block_offsets = array('Q', [self._file.tell()])
+        self._block_raw_starts = array('Q', [0])
+        self._doc_text_offsets = array('Q', [0])
+        self._doc_blocks = array('I')
+        self._doc_id_offsets = array('Q', [0])
+        self._doc_id_blob = bytearray()
+        self._raw_size = 0
+
+    def add(self, doc_id, text):
+        encoded = text.encode('utf-8')
+        self._doc_blocks.append(len(self._block_offsets) - 1)
+        self._block += encoded
+        self._raw_size += len(encoded)
+        self._doc_text_offsets.append(self._raw_size)
+        self._doc_id_blob += str(doc_id).encode('utf-8')
+        self._doc_id_offsets.append(len(self._doc_id_blob))
+        if len(self._block) >= self.block_size:
+            self._flush_block()
+
+    def add_documents(self, documents):
+        """documents: {doc_id: metin} sözlüğü veya (doc_id, metin) çiftleri (akış olabilir)."""
+        for doc_id, text in (documents.items() if hasattr(documents, 'items') else documents):
+            self.add(doc_id, text)
+
+    def _flush_block(self):
+        if not self._block:
+            return
+        self._file.write(self._compress(bytes(self._block), self.level))
+        self._block_offsets.append(self._file.tell())
+        self._block_raw_starts.append(self._raw_size)
+        self._block = bytearray()
+
+    def close(self):
+        """Son bloğu ve tabloları yazar. Returns: path."""
+        self._flush_block()
+        f = self._file
+        offsets = [write_section(f, data) for data in (
+            self._block_offsets, self._block_raw_starts, self._doc_text_offsets, self._doc_blocks,
+            self._doc_id_offsets, self._doc_id_blob,
+        )]
+        file_end = f.tell()
+        f.seek(0)
+        f.write(MAGIC)
+        f.write(_HEADER_STRUCT.pack(BYTE_ORDER, self.codec, len(self._doc_blocks), len(self._block_offsets) - 1,
+                                    *offsets, file_end))
+        f.close()
+        ratio = file_end / self._raw_size if self._raw_size else 0.0
+        print(f"Doküman deposu '{self.path}' dosyasına yazıldı: {len(self._doc_blocks)} doküman, "
+              f"{len(self._block_offsets) - 1} blok ({self.codec.decode()}), "
+              f"{self._raw_size / (1024 * 1024):.1f} MB -> {file_end / (1024 * 1024):.1f} MB (oran {ratio:.2f}).")
+        return self.path
+
+    def abort(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_document_store(documents, path, codec='zlib', block_size=DEFAULT_BLOCK_SIZE, level=None):
+    """{doc_id: metin} sözlüğünü (veya (doc_id, metin) çiftlerini) doküman deposu dosyasına yazar."""
+    with DocumentStoreWriter(path, codec, block_size, level) as writer:
+        writer.add_documents(documents)
+    return path
+
+
+class DocumentStore(Mapping):
+    """
+    save_document_store ile yazılmış dosyayı mmap ile açan salt-okunur doküman deposu.
+    {doc_id: metin} sözlüğü gibi kullanılır (get, [], in, len, keys, items); böylece ham metinler
+    için raw_documents sözlüğü yerine verilebilir. Bir doküman okunurken yalnızca bulunduğu blok
+    açılır; son açılan cache_blocks blok bir LRU önbellekte tutulur.
+    Bellekte doküman başına yalnızca doc_id -> numara eşlemesi tutulur.
+    """
+
+    def __init__(self, path, cache_blocks=16):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"'{path}' geçerli bir doküman deposu dosyası değil.")
+        header = _HEADER_STRUCT.unpack_from(self._mm, len(MAGIC))
+        byte_order, self.codec, self.num_docs, self.num_blocks = header[:4]
+        if byte_order != BYTE_ORDER:
+            self._mm.close()
+            raise ValueError(f"'{path}' farklı bayt sırasına sahip bir makinede oluşturulmuş.")
+        self._decompress = _CODECS[self.codec][1]
+        offsets = header[4:]
+        section_bounds = dict(zip(_SECTIONS, zip(offsets, offsets[1:])))
+
+        self._mv = memoryview(self._mm)
+
+        def section(name, fmt=None, count=None):
+            start, end = section_bounds[name]
+            if fmt is None:
+                return self._mv[start:end]
+            return self._mv[start:start + count * struct.calcsize(fmt)].cast(fmt)
+
+        self._block_offsets = section('block_offsets', 'Q', self.num_blocks + 1)
+        self._block_raw_starts = section('block_raw_starts', 'Q', self.num_blocks + 1)
+        self._doc_text_offsets = section('doc_text_offsets', 'Q', self.num_docs + 1)
+        self._doc_blocks = section('doc_blocks', 'I', self.num_docs)
+        doc_id_offsets = section('doc_id_offsets', 'Q', self.num_docs + 1)
+        doc_id_blob = bytes(section('doc_id_blob'))
+        self.doc_ids = [doc_id_blob[doc_id_offsets[i]:doc_id_offsets[i + 1]].decode('utf-8')
+                        for i in range(self.num_docs)]
+        self._doc_nums = {doc_id: doc_num for doc_num, doc_id in enumerate(self.doc_ids)}
+
+        self.cache_blocks = cache_blocks
+        self._block_cache = OrderedDict() # blok no -> açılmış bayt dizisi
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _block(self, block_no):
+        """Bloğun açılmış içeriği; LRU önbellekten ya da açarak."""
+        with self._cache_lock:
+            block = self._block_cache.get(block_no)
+            if block is not None:
+                self._block_cache.move_to_end(block_no)
+                self.cache_hits += 1
+                return block
+            self.cache_misses += 1
+        block = self._decompress(self._mv[self._block_offsets[block_no]:self._block_offsets[block_no + 1]])
+        if self.cache_blocks > 0:
+            with self._cache_lock:
+                self._block_cache[block_no] = block
+                while len(self._block_cache) > self.cache_blocks:
+                    self._block_cache.popitem(last=False)
+        return block
+
+    def get_by_num(self, doc_num):
+        """Doküman numarasıyla (0..num_docs-1, yazma sırası) metni döndürür."""
+        block_no = self._doc_blocks[doc_num]
+        block_start = self._block_raw_starts[block_no]
+        block = self._block(block_no)
+        return block[self._doc_text_offsets[doc_num] - block_start:self._doc_text_offsets[doc_num + 1] - block_start].decode('utf-8')
+
+    def __getitem__(self, doc_id):
+        doc_num = self._doc_nums.get(doc_id)
+        if doc_num is None:
+            raise KeyError(doc_id)
+        return self.get_by_num(doc_num)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_nums
+
+    def __iter__(self):
+        return iter(self.doc_ids)
+
+    def __len__(self):
+        return self.num_docs
+
+    def items(self):
+        """Tüm dokümanları dosya sırasıyla döndürür; her blok bir kez açılır ve önbelleği doldurmaz."""
+        for block_no in range(self.num_blocks):
+            block = self._decompress(self._mv[self._block_offsets[block_no]:self._block_offsets[block_no + 1]])
+            block_start = self._block_raw_starts[block_no]
+            doc_num = self._first_doc_of_block(block_no)
+            while doc_num < self.num_docs and self._doc_blocks[doc_num] == block_no:
+                start = self._doc_text_offsets[doc_num] - block_start
+                end = self._doc_text_offsets[doc_num + 1] - block_start
+                yield self.doc_ids[doc_num], block[start:end].decode('utf-8')
+                doc_num += 1
+
+    def _first_doc_of_block(self, block_no):
+        # doc_blocks artan sıralıdır: ikili arama ile bloğun ilk dokümanı bulunur.
+        low, high = 0, self.num_docs
+        while low < high:
+            mid = (low + high) // 2
+            if self._doc_blocks[mid] < block_no:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def cache_stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'cached_blocks': len(self._block_cache),
+            'max_blocks': self.cache_blocks,
+        }
+
+    def close(self):
+        for name in ('_block_offsets', '_block_raw_starts', '_doc_text_offsets', '_doc_blocks'):
+            getattr(self, name).release()
+        self._mv.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_document_store(path, cache_blocks=16):
+    """save_document_store ile yazılmış depoyu bellek eşlemeli olarak açar."""
+    return DocumentStore(path, cache_blocks)
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import tracemalloc
+    from utils import load_documents_imdb
+
+    IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data'
+    STORE_PATH = 'imdb_docs.store'
+
+    raw_documents_full = load_documents_imdb(IMDB_DATA_PATH)
+    if raw_documents_full:
+        for codec in ('zlib', 'lzma'):
+            start_time = time.perf_counter()
+            save_document_store(raw_documents_full, STORE_PATH, codec=codec)
+            print(f"  yazma: {time.perf_counter() - start_time:.2f} sn")
+
+            tracemalloc.start()
+            with load_document_store(STORE_PATH) as store:
+                sample_ids = random.sample(list(raw_documents_full), 1000)
+                start_time = time.perf_counter()
+                for doc_id in sample_ids:
+                    assert store[doc_id] == raw_documents_full[doc_id]
+                elapsed = time.perf_counter() - start_time
+                peak = tracemalloc.get_traced_memory()[1]
+                print(f"  1000 rastgele okuma: {elapsed * 1000:.1f} ms, tepe bellek {peak / (1024 * 1024):.1f} MB, "
+                      f"önbellek {store.cache_stats()}")
+            tracemalloc.stop()
+        os.remove(STORE_PATH)
+    else:
+        print("Doküman yüklenemedi.")
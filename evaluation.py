@@ -1,3 +1,7 @@
+import time
+from itertools import islice, repeat
+from operator import itemgetter
+
 import numpy as np
 
 def precision_recall_f1(retrieved_doc_ids, relevant_doc_ids):
@@ -68,6 +72,233 @@ def mean_average_precision(all_query_results_ranked_ids, all_relevant_docs_sets)
     return np.mean(ap_scores) if ap_scores else 0.0
 
 
+# --- TREC biçimli dosyalar ---
+# qrels: "<sorgu_id> <iterasyon> <doc_id> <ilgililik>" (iterasyon yok sayılır; ilgililik >= 1 ilgili)
+# run:   "<sorgu_id> Q0 <doc_id> <sıra> <skor> <etiket>"
+# sorgular: "<sorgu_id>\t<sorgu metni>" (sekmeyle ayrılmış)
+
+def read_qrels(path):
+    """TREC qrels dosyasını okur. Returns: {sorgu_id: {doc_id: ilgililik}}."""
+    qrels = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields:
+                continue
+            if len(fields) != 4:
+                raise ValueError(f"{path}:{line_no}: qrels satırı 4 alan içermelidir: {line.strip()!r}")
+            query_id, _, doc_id, relevance = fields
+            qrels.setdefault(query_id, {})[doc_id] = int(relevance)
+    return qrels
+
+def write_qrels(qrels, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for query_id, judgments in qrels.items():
+            for doc_id, relevance in judgments.items():
+                f.write(f"{query_id} 0 {doc_id} {relevance}\n")
+
+def read_run(path):
+    """
+    TREC run dosyasını okur. Sonuçlar trec_eval ile aynı biçimde sıralanır (skor azalan, eşitlikte
+    doc_id azalan); dosyadaki sıra sütunu yok sayılır.
+    Returns: {sorgu_id: [(doc_id, skor), ...]}.
+    """
+    run = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields:
+                continue
+            if len(fields) != 6:
+                raise ValueError(f"{path}:{line_no}: run satırı 6 alan içermelidir: {line.strip()!r}")
+            run.setdefault(fields[0], []).append((fields[2], float(fields[4])))
+    for ranked in run.values():
+        trec_order(ranked)
+    return run
+
+def trec_order(ranked):
+    """
+    (doc_id, skor) listesini yerinde trec_eval sırasına sokar (skor azalan, eşitlikte doc_id azalan)
+    ve döndürür. iter_run ve read_run bu sırayı kullandığından run'ın bellekte ve dosyadan
+    değerlendirilmesi aynı sonucu verir.
+    """
+    ranked.sort(key=lambda entry: (entry[1], entry[0]), reverse=True)
+    return ranked
+
+def write_run(run, path, tag='ir_system'):
+    """
+    run: {sorgu_id: [(doc_id, skor), ...]} sözlüğü veya (sorgu_id, sonuçlar) çiftleri (akış olabilir;
+    ör. iter_run çıktısı). Sonuçlar verilen sırayla yazılır.
+    """
+    for _ in iter_written_run(run, path, tag):
+        pass
+
+def iter_written_run(run, path, tag='ir_system'):
+    """
+    run'ı write_run gibi dosyaya yazarken (sorgu_id, sonuçlar) çiftlerini aynen üretir; böylece bir
+    akış tek geçişte hem yazılıp hem değerlendirilebilir (evaluate_run) ve bellekte tutulmaz.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for query_id, ranked in (run.items() if hasattr(run, 'items') else run):
+            f.writelines(f"{query_id} Q0 {doc_id} {rank} {score:.6f} {tag}\n"
+                         for rank, (doc_id, score) in enumerate(ranked, 1))
+            yield query_id, ranked
+
+def read_queries(path):
+    """Sekmeyle ayrılmış sorgu dosyasını okur. Returns: {sorgu_id: sorgu metni} (dosya sırasıyla)."""
+    queries = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            query_id, separator, text = line.partition('\t')
+            if not separator:
+                raise ValueError(f"{path}:{line_no}: sorgu satırı '<sorgu_id>\\t<metin>' biçiminde olmalıdır.")
+            queries[query_id.strip()] = text
+    return queries
+
+
+# --- Vektörel değerlendirme ---
+# Her sorgunun sıralı sonuçları, ilgililik değerlerinden oluşan sabit uzunlukta (depth) bir satıra
+# çevrilir; eksik sıralar 0 ile doldurulur. Tüm metrikler bu (sorgu sayısı x depth) kazanç matrisi
+# üzerinde NumPy ile tek seferde hesaplanır.
+
+def _gain_row(ranked, judgments, depth):
+    # Sonuçlar (doc_id, skor) çiftleri veya (Boolean sonuçlardaki gibi) yalnızca doc_id olabilir.
+    # Satır, Python döngüsü yerine map/fromiter ile (C düzeyinde) doldurulur.
+    count = min(len(ranked), depth)
+    doc_ids = islice(ranked, count)
+    if count and not isinstance(ranked[0], str):
+        doc_ids = map(itemgetter(0), doc_ids)
+    row = np.zeros(depth, dtype=np.float32)
+    row[:count] = np.fromiter(map(judgments.get, doc_ids, repeat(0)), dtype=np.float32, count=count)
+    return row
+
+def evaluate_run(run, qrels, k_values=(5, 10, 20), depth=1000, complete=False, per_query=False):
+    """
+    Bir run'ı qrels'e göre değerlendirir: P@k, R@k, nDCG@k (her k için) ve MAP.
+
+    run: {sorgu_id: sıralı sonuçlar} sözlüğü veya (sorgu_id, sıralı sonuçlar) çiftleri (akış olabilir;
+        her seferde yalnızca bir sorgunun sonuçları bellekte tutulur). Sonuçlar (doc_id, skor)
+        çiftleri veya doc_id'lerdir.
+    qrels: {sorgu_id: {doc_id: ilgililik}}; ilgililik >= 1 olan dokümanlar ilgili sayılır, nDCG'de
+        kazanç olarak ilgililik değeri kullanılır.
+    depth: Sonuçların değerlendirilen en fazla sırası (MAP bu derinliğe kadar hesaplanır).
+    complete: True ise qrels'teki ama run'da olmayan (veya sonucu boş olan) sorgular 0 puanla dahil
+        edilir (trec_eval -c); False ise (trec_eval varsayılanı) yalnızca iki tarafta da bulunan
+        sorgular değerlendirilir. Boş sonuç listeleri run dosyasına hiç satır yazmadığından run'da
+        yok sayılır.
+    per_query: True ise sonuca sorgu başına metrikler ('per_query': {sorgu_id: {metrik: değer}}) eklenir.
+
+    Returns:
+        dict: {'num_queries': ..., 'MAP': ..., 'P@5': ..., 'R@5': ..., 'nDCG@5': ..., ...} (ortalamalar).
+    """
+    k_values = sorted(set(k_values))
+    if not k_values or k_values[0] < 1:
+        raise ValueError("k değerleri pozitif tam sayılar olmalıdır.")
+    depth = max(depth, k_values[-1])
+
+    query_ids = []
+    rows = []
+    for query_id, ranked in (run.items() if hasattr(run, 'items') else run):
+        judgments = qrels.get(query_id)
+        if judgments is None or not ranked:
+            continue # trec_eval gibi: qrels'te olmayan ve run dosyasında satırı olmayan sorgular değerlendirilmez
+        query_ids.append(query_id)
+        rows.append(_gain_row(ranked, judgments, depth))
+    if complete:
+        evaluated = set(query_ids)
+        for query_id in qrels:
+            if query_id not in evaluated:
+                query_ids.append(query_id)
+                rows.append(np.zeros(depth, dtype=np.float32))
+    if not rows:
+        return {'num_queries': 0}
+
+    gains = np.vstack(rows)
+    relevant = gains >= 1
+    hits = np.cumsum(relevant, axis=1, dtype=np.int32)
+    ranks = np.arange(1, depth + 1, dtype=np.float64)
+    num_relevant = np.array([sum(1 for relevance in qrels[query_id].values() if relevance >= 1)
+                             for query_id in query_ids], dtype=np.float64)
+    has_relevant = num_relevant > 0
+    safe_num_relevant = np.maximum(num_relevant, 1)
+
+    # Kazançlar ilgililik değerinin kendisidir (trec_eval ndcg); ideal sıralama qrels'ten çıkarılır.
+    discounts = 1.0 / np.log2(ranks + 1)
+    dcg = np.cumsum(np.maximum(gains, 0) * discounts, axis=1)
+    max_k = k_values[-1]
+    ideal = np.zeros((len(query_ids), max_k), dtype=np.float64)
+    for row_no, query_id in enumerate(query_ids):
+        ideal_gains = sorted((relevance for relevance in qrels[query_id].values() if relevance > 0), reverse=True)[:max_k]
+        ideal[row_no, :len(ideal_gains)] = ideal_gains
+    ideal_dcg = np.cumsum(ideal * discounts[:max_k], axis=1)
+
+    metrics = {
+        'MAP': np.where(has_relevant, (relevant * hits / ranks).sum(axis=1) / safe_num_relevant, 0.0),
+    }
+    for k in k_values:
+        metrics[f'P@{k}'] = hits[:, k - 1] / k
+        metrics[f'R@{k}'] = np.where(has_relevant, hits[:, k - 1] / safe_num_relevant, 0.0)
+        idcg_k = ideal_dcg[:, k - 1]
+        metrics[f'nDCG@{k}'] = np.where(idcg_k > 0, dcg[:, k - 1] / np.where(idcg_k > 0, idcg_k, 1), 0.0)
+
+    summary = {'num_queries': len(query_ids)}
+    summary.update((name, float(values.mean())) for name, values in metrics.items())
+    if per_query:
+        summary['per_query'] = {
+            query_id: {name: float(values[row_no]) for name, values in metrics.items()}
+            for row_no, query_id in enumerate(query_ids)
+        }
+    return summary
+
+def format_evaluation(summary):
+    """evaluate_run çıktısını trec_eval benzeri "metrik  all  değer" satırlarına çevirir."""
+    lines = [f"{'num_q':<12}all\t{summary['num_queries']}"]
+    lines += [f"{name:<12}all\t{value:.4f}" for name, value in summary.items()
+              if name not in ('num_queries', 'per_query')]
+    return '\n'.join(lines)
+
+
+# --- Run üretimi ---
+
+def iter_run(search_engine, queries, mode='bm25', depth=1000, executor='process', num_workers=None,
+             batch_size=1000):
+    """
+    Çok sayıda sorguyu SearchEngine.search_many ile gruplar halinde (paylaşılan postings, fork ile
+    süreç havuzu) çalıştırır ve sonuçları akış halinde üretir; bellekte bir gruptan fazlası tutulmaz.
+
+    queries: {sorgu_id: metin} sözlüğü veya (sorgu_id, metin) çiftleri.
+    mode: 'tfidf', 'bm25', 'and' veya 'or'. Boolean sonuçlara sıralarına göre azalan skor verilir.
+    depth: Sorgu başına en fazla sonuç sayısı.
+    executor, num_workers: search_many'ye aktarılır (None: seri).
+    batch_size: Bir search_many çağrısındaki sorgu sayısı.
+
+    Yields: (sorgu_id, [(doc_id, skor), ...]); sonuçlar trec_order sırasındadır (eşit skorlar doc_id'ye göre).
+    """
+    from utils import iter_batches
+
+    start_time = time.perf_counter()
+    num_done = 0
+    for batch in iter_batches(queries.items() if hasattr(queries, 'items') else queries, batch_size):
+        results = search_engine.search_many([text for _, text in batch], modes=(mode,), top_n=depth,
+                                            executor=executor, num_workers=num_workers)
+        for (query_id, _), query_results in zip(batch, results):
+            ranked = query_results[mode]
+            if mode in ('and', 'or'):
+                ranked = [(doc_id, float(depth - rank)) for rank, doc_id in enumerate(ranked[:depth])]
+            yield query_id, trec_order(list(ranked))
+        num_done += len(batch)
+        elapsed = time.perf_counter() - start_time
+        print(f"Run üretimi: {num_done} sorgu, {elapsed:.2f} sn ({num_done / elapsed if elapsed > 0 else 0.0:.0f} sorgu/sn).")
+
+def generate_run(search_engine, queries, mode='bm25', depth=1000, executor='process', num_workers=None,
+                 batch_size=1000):
+    """iter_run ile üretilen run'ı {sorgu_id: [(doc_id, skor), ...]} sözlüğü olarak döndürür."""
+    return dict(iter_run(search_engine, queries, mode, depth, executor, num_workers, batch_size))
+
+
 if __name__ == '__main__':
     retrieved1_ranked = ['doc1', 'doc_missing', 'doc3', 'doc4', 'doc5', 'doc6']
     relevant1_set = {'doc1', 'doc3', 'doc6', 'doc7'} # doc7 bulunamadı
@@ -89,4 +320,10 @@ if __name__ == '__main__':
     print(f"\nQuery 2 - Average Precision: {ap2:.4f}")
 
     map_score = mean_average_precision([retrieved1_ranked, retrieved2_ranked], [relevant1_set, relevant2_set])
-    print(f"\nMean Average Precision (MAP): {map_score:.4f}") # (0.5415 + 0.5) / 2 = 0.52075
\ No newline at end of file
+    print(f"\nMean Average Precision (MAP): {map_score:.4f}") # (0.5415 + 0.5) / 2 = 0.52075
+
+    # Aynı iki sorgu, vektörel değerlendirici ile (MAP yukarıdakiyle aynıdır)
+    run = {'q1': retrieved1_ranked, 'q2': retrieved2_ranked}
+    qrels = {'q1': {doc_id: 1 for doc_id in relevant1_set}, 'q2': {doc_id: 1 for doc_id in relevant2_set}}
+    print("\nVektörel değerlendirme:")
+    print(format_evaluation(evaluate_run(run, qrels, k_values=(1, 5))))
\ No newline at end of file
@@ -0,0 +1,283 @@
+# index_store.py
+
+import mmap
+import struct
+import sys
+from array import array
+
+from inverted_index import ArrayPostingsCursor, DocNumTable, PostingsView, format_term_report
+
+# Dosya düzeni (tüm bölümler 8 byte'a hizalanır, sayılar makinenin yerel bayt sırasıyla yazılır):
+#   başlık         : MAGIC + HEADER_STRUCT
+#   doc_id_offsets : uint64[num_docs + 1]   -> doc_id_blob içindeki başlangıç konumları
+#   doc_id_blob    : utf-8 doc_id'ler (ardışık)
+#   doc_lengths    : uint32[num_docs]
+#   term_offsets   : uint64[num_terms + 1]  -> term_blob içindeki başlangıç konumları
+#   term_blob      : utf-8 terimler (utf-8 bayt sırasına göre sıralı, ardışık)
+#   dfs            : uint32[num_terms]
+#   corpus_freqs   : uint64[num_terms]
+#   max_tfs        : uint32[num_terms]      -> terimin en yüksek tf değeri (MaxScore üst sınırları için)
+#   postings_starts: uint64[num_terms + 1]  -> postings dizilerindeki başlangıç konumları
+#   postings_docs  : uint32[total_postings] -> her terim için artan sıralı doküman numaraları
+#   postings_tfs   : uint32[total_postings]
+MAGIC = b'IRIDX002'
+HEADER_STRUCT = struct.Struct('<4sIIQd12Q')
+_SECTIONS = (
+    'doc_id_offsets', 'doc_id_blob', 'doc_lengths', 'term_offsets', 'term_blob',
+    'dfs', 'corpus_freqs', 'max_tfs', 'postings_starts', 'postings_docs', 'postings_tfs',
+)
+BYTE_ORDER = b'LE  ' if sys.byteorder == 'little' else b'BE  '
+
+
+def align_section(f):
+    """Dosyayı bir sonraki 8 byte sınırına kadar doldurur ve yeni bölümün başlangıç konumunu döndürür."""
+    padding = (-f.tell()) % 8
+    if padding:
+        f.write(b'\0' * padding)
+    return f.tell()
+
+
+def write_section(f, data):
+    """bytes veya array verisini hizalanmış yeni bir bölüm olarak yazar. Returns: bölümün konumu."""
+    offset = align_section(f)
+    f.write(data if isinstance(data, (bytes, bytearray)) else data.tobytes())
+    return offset
+
+
+def save_index(inverted_index, path):
+    """
+    Bir InvertedIndex'i (veya aynı get_* arayüzüne sahip bir indeksi) ikili dosyaya yazar.
+    Dokümanlara indeksleme sırasına göre 0..N-1 numaraları verilir; postings'ler bu numaralara
+    göre sıralı uint32 dizileri olarak saklanır.
+    """
+    doc_ids = list(getattr(inverted_index, 'doc_ids', None) or inverted_index.doc_lengths.keys())
+    doc_num_of = {doc_id: num for num, doc_id in enumerate(doc_ids)}
+
+    doc_id_offsets = array('Q', [0])
+    doc_id_blob = bytearray()
+    doc_lengths = array('I')
+    for doc_id in doc_ids:
+        doc_id_blob += str(doc_id).encode('utf-8')
+        doc_id_offsets.append(len(doc_id_blob))
+        doc_lengths.append(inverted_index.get_doc_length(doc_id))
+
+    terms = sorted(inverted_index.get_vocabulary(), key=lambda t: t.encode('utf-8'))
+    term_offsets = array('Q', [0])
+    term_blob = bytearray()
+    dfs = array('I')
+    corpus_freqs = array('Q')
+    max_tfs = array('I')
+    postings_starts = array('Q', [0])
+    postings_docs = array('I')
+    postings_tfs = array('I')
+    for term in terms:
+        term_blob += term.encode('utf-8')
+        term_offsets.append(len(term_blob))
+        dfs.append(inverted_index.get_df(term))
+        corpus_freqs.append(inverted_index.get_total_corpus_freq(term))
+        pairs = sorted((doc_num_of[doc_id], tf) for doc_id, tf in inverted_index.get_postings_with_tf(term).items())
+        postings_docs.extend(doc_num for doc_num, _ in pairs)
+        postings_tfs.extend(tf for _, tf in pairs)
+        max_tfs.append(max((tf for _, tf in pairs), default=0))
+        postings_starts.append(len(postings_docs))
+
+    sections = (doc_id_offsets, doc_id_blob, doc_lengths, term_offsets, term_blob,
+                dfs, corpus_freqs, max_tfs, postings_starts, postings_docs, postings_tfs)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * (len(MAGIC) + HEADER_STRUCT.size))
+        offsets = [write_section(f, data) for data in sections]
+        file_end = f.tell()
+        f.seek(0)
+        f.write(MAGIC)
+        f.write(HEADER_STRUCT.pack(
+            BYTE_ORDER, len(doc_ids), len(terms), len(postings_docs),
+            float(inverted_index.avg_doc_length), *offsets, file_end,
+        ))
+    print(f"İndeks '{path}' dosyasına kaydedildi: {len(terms)} terim, {len(doc_ids)} doküman, "
+          f"{len(postings_docs)} posting ({file_end / (1024 * 1024):.1f} MB).")
+
+
+class MappedInvertedIndex:
+    """
+    save_index ile yazılmış bir dosyayı mmap ile açan salt-okunur indeks.
+    Postings, tf ve doküman uzunluğu dizileri doğrudan eşlenmiş bellekten okunur; bu sayede
+    açılış süresi korpus boyutundan bağımsızdır ve aynı dosyayı açan süreçler işletim sisteminin
+    sayfa önbelleğini paylaşır. InvertedIndex ile aynı get_* arayüzünü sunar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"'{path}' geçerli bir indeks dosyası değil.")
+        header = HEADER_STRUCT.unpack_from(self._mm, len(MAGIC))
+        byte_order, self.total_docs, self.num_terms, self.total_postings, self.avg_doc_length = header[:5]
+        if byte_order != BYTE_ORDER:
+            self._mm.close()
+            raise ValueError(f"'{path}' farklı bayt sırasına sahip bir makinede oluşturulmuş.")
+        offsets = header[5:]
+        section_bounds = dict(zip(_SECTIONS, zip(offsets, offsets[1:])))
+
+        self._mv = memoryview(self._mm)
+
+        def section(name, fmt=None, count=None):
+            # Bölüm sonundaki hizalama dolgusu, eleman sayısına göre kesilerek atlanır.
+            start, end = section_bounds[name]
+            if fmt is None:
+                return self._mv[start:end]
+            return self._mv[start:start + count * struct.calcsize(fmt)].cast(fmt)
+
+        self._doc_id_offsets = section('doc_id_offsets', 'Q', self.total_docs + 1)
+        self._doc_id_blob = section('doc_id_blob')
+        self._doc_lengths = section('doc_lengths', 'I', self.total_docs)
+        self._term_offsets = section('term_offsets', 'Q', self.num_terms + 1)
+        self._term_blob = section('term_blob')
+        self._dfs = section('dfs', 'I', self.num_terms)
+        self._corpus_freqs = section('corpus_freqs', 'Q', self.num_terms)
+        self._max_tfs = section('max_tfs', 'I', self.num_terms)
+        self._postings_starts = section('postings_starts', 'Q', self.num_terms + 1)
+        self._postings_docs = section('postings_docs', 'I', self.total_postings)
+        self._postings_tfs = section('postings_tfs', 'I', self.total_postings)
+
+        self._doc_ids = None
+        self._doc_nums = None
+
+    # --- Doküman tablosu ---
+
+    @property
+    def doc_ids(self):
+        """Doküman numarası -> doc_id tablosu (ilk kullanımda çözülür)."""
+        if self._doc_ids is None:
+            blob = bytes(self._doc_id_blob)
+            offsets = self._doc_id_offsets
+            self._doc_ids = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.total_docs)]
+        return self._doc_ids
+
+    def get_doc_num(self, doc_id):
+        if self._doc_nums is None:
+            self._doc_nums = DocNumTable(self.doc_ids) # sözlük yerine doc_ids üzerinde karma tablosu
+        return self._doc_nums.get(doc_id)
+
+    # --- Terim sözlüğü ---
+
+    def _term_at(self, ordinal):
+        return bytes(self._term_blob[self._term_offsets[ordinal]:self._term_offsets[ordinal + 1]])
+
+    def _term_ordinal(self, term):
+        """Sıralı terim sözlüğünde ikili arama; terim yoksa -1."""
+        key = term.encode('utf-8')
+        low, high = 0, self.num_terms
+        while low < high:
+            mid = (low + high) // 2
+            if self._term_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.num_terms and self._term_at(low) == key:
+            return low
+        return -1
+
+    # --- InvertedIndex ile uyumlu arayüz ---
+
+    def get_postings_arrays(self, term):
+        """Terimin (doküman numaraları, tf'ler) dizilerini kopyalamadan döndürür."""
+        ordinal = self._term_ordinal(term)
+        if ordinal < 0:
+            return self._postings_docs[0:0], self._postings_tfs[0:0]
+        start, end = self._postings_starts[ordinal], self._postings_starts[ordinal + 1]
+        return self._postings_docs[start:end], self._postings_tfs[start:end]
+
+    def get_postings_cursor(self, term):
+        """Terimin eşlenmiş postings'i üzerinde bir imleç döndürür (bkz. ArrayPostingsCursor)."""
+        return ArrayPostingsCursor(*self.get_postings_arrays(term))
+
+    def get_postings_list(self, term):
+        """Bir terimin postings listesini (sadece doc_id'ler) döndürür: set(doc_id)."""
+        doc_nums, _ = self.get_postings_arrays(term)
+        doc_ids = self.doc_ids
+        return {doc_ids[doc_num] for doc_num in doc_nums}
+
+    def get_postings_with_tf(self, term):
+        """Bir terimin postings listesini {doc_id: tf} gibi davranan bir görünüm olarak döndürür."""
+        doc_nums, tfs = self.get_postings_arrays(term)
+        return PostingsView(doc_nums, tfs, self)
+
+    def get_df(self, term):
+        ordinal = self._term_ordinal(term)
+        return self._dfs[ordinal] if ordinal >= 0 else 0
+
+    def get_total_corpus_freq(self, term):
+        ordinal = self._term_ordinal(term)
+        return self._corpus_freqs[ordinal] if ordinal >= 0 else 0
+
+    def get_max_tf(self, term):
+        ordinal = self._term_ordinal(term)
+        return self._max_tfs[ordinal] if ordinal >= 0 else 0
+
+    def get_doc_length(self, doc_id):
+        doc_num = self.get_doc_num(doc_id)
+        return self._doc_lengths[doc_num] if doc_num is not None else 0
+
+    def get_vocabulary(self):
+        blob = bytes(self._term_blob)
+        offsets = self._term_offsets
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.num_terms)]
+
+    def get_term_data_for_report(self, term):
+        """Sözlükteki bir terim için rapor formatında veri döndürür."""
+        ordinal = self._term_ordinal(term)
+        if ordinal < 0:
+            return f"'{term}' terimi indekste bulunamadı."
+        return format_term_report(term, self._dfs[ordinal], self._corpus_freqs[ordinal],
+                                  self.get_postings_with_tf(term))
+
+    def close(self):
+        """Eşlemeyi kapatır. Dışarıya verilmiş görünümler hâlâ kullanılıyorsa BufferError oluşabilir."""
+        for name in ('_doc_id_offsets', '_doc_id_blob', '_doc_lengths', '_term_offsets', '_term_blob',
+                     '_dfs', '_corpus_freqs', '_max_tfs', '_postings_starts', '_postings_docs', '_postings_tfs', '_mv'):
+            getattr(self, name).release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_index(path):
+    """save_index ile yazılmış indeksi bellek eşlemeli olarak açar."""
+    return MappedInvertedIndex(path)
+
+
+if __name__ == '__main__':
+    import os
+    import time
+    from inverted_index import InvertedIndex
+    from utils import load_documents_imdb, preprocess_text
+
+    IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data'
+    INDEX_PATH = 'imdb_index.bin'
+
+    raw_documents_full = load_documents_imdb(IMDB_DATA_PATH)
+    if raw_documents_full:
+        sample_doc_ids = list(raw_documents_full.keys())[:1000]
+        processed_docs_sample = {doc_id: preprocess_text(raw_documents_full[doc_id]) for doc_id in sample_doc_ids}
+
+        inv_idx = InvertedIndex()
+        inv_idx.build_index(processed_docs_sample)
+        inv_idx.save(INDEX_PATH)
+
+        start_time = time.perf_counter()
+        with load_index(INDEX_PATH) as mapped_idx:
+            print(f"mmap ile açılış süresi: {time.perf_counter() - start_time:.4f} sn")
+            for term in inv_idx.get_vocabulary()[:200]:
+                assert mapped_idx.get_df(term) == inv_idx.get_df(term)
+                assert dict(mapped_idx.get_postings_with_tf(term).items()) == dict(inv_idx.get_postings_with_tf(term))
+            test_term = inv_idx.get_vocabulary()[0]
+            print(mapped_idx.get_term_data_for_report(test_term))
+        os.remove(INDEX_PATH)
+    else:
+        print("Doküman yüklenemedi.")
@@ -0,0 +1,83 @@
+# ingest.py
+
+import time
+
+from inverted_index import InvertedIndex
+from utils import iter_batches, iter_documents_imdb, preprocess_documents_parallel
+
+
+def ingest_documents(documents, inverted_index=None, batch_size=1000, num_workers=1,
+                     use_stemming=True, metadata=None, on_batch=None, stats=None, fast=True):
+    """
+    (doc_id, metadata, text) üçlülerini (ör. utils.iter_documents_imdb çıktısı) akış halinde
+    ön işleyip indekse ekler. Ham metinler batch_size'lık gruplar halinde okunur, ön işlenir ve
+    indekse verildikten sonra bırakılır; bu yüzden en yüksek bellek kullanımı korpus boyutuna değil
+    batch_size'a (ve num_workers'a) bağlıdır. Korpusun tamamı hiçbir zaman bir sözlükte tutulmaz.
+
+    inverted_index: None ise (veya boşsa) indeks build_index ile tek geçişte kurulur; dolu bir
+                    indeks verilirse dokümanlar add_documents ile batch batch eklenir.
+    metadata: Verilirse (dict), {doc_id: metadata} ile doldurulur.
+    on_batch: Verilirse her batch'in ham [(doc_id, metadata, text), ...] listesiyle çağrılır
+              (ör. metinleri bir doküman deposuna yazmak için).
+    stats: Verilirse (dict), docs, seconds ve docs_per_sec anahtarları ile doldurulur.
+    fast: True ise ön işleme preprocess_text ile aynı çıktıyı veren FastAnalyzer ile yapılır.
+    Returns: Kullanılan InvertedIndex nesnesi.
+    """
+    if inverted_index is None:
+        inverted_index = InvertedIndex()
+    if stats is None:
+        stats = {}
+    start_time = time.perf_counter()
+    doc_count = 0
+
+    def texts():
+        nonlocal doc_count
+        for batch in iter_batches(documents, batch_size):
+            if on_batch is not None:
+                on_batch(batch)
+            for doc_id, doc_metadata, text in batch:
+                if metadata is not None:
+                    metadata[doc_id] = doc_metadata
+                doc_count += 1
+                yield doc_id, text
+
+    processed = preprocess_documents_parallel(texts(), num_workers=num_workers, chunk_size=max(1, batch_size // 4),
+                                              use_stemming=use_stemming, fast=fast)
+    if inverted_index.total_docs == 0:
+        # Boş indeks: segment/birleştirme maliyeti olmadan tek geçişte kurulur.
+        inverted_index.build_index(processed)
+    else:
+        for batch in iter_batches(processed, batch_size):
+            inverted_index.add_documents(batch)
+
+    elapsed = time.perf_counter() - start_time
+    stats.update({
+        'docs': doc_count,
+        'seconds': elapsed,
+        'docs_per_sec': doc_count / elapsed if elapsed > 0 else 0.0,
+    })
+    print(f"Akış halinde indeksleme: {doc_count} doküman, {elapsed:.2f} sn "
+          f"({stats['docs_per_sec']:.0f} doküman/sn, batch boyutu {batch_size}).")
+    return inverted_index
+
+
+def ingest_imdb(data_path_root, inverted_index=None, batch_size=1000, num_workers=None, **kwargs):
+    """IMDb dizinini belleğe toplu yüklemeden okuyup indeksler (bkz. ingest_documents)."""
+    return ingest_documents(iter_documents_imdb(data_path_root), inverted_index=inverted_index,
+                            batch_size=batch_size, num_workers=num_workers, **kwargs)
+
+
+if __name__ == '__main__':
+    import sys
+    import tracemalloc
+    from itertools import islice
+
+    data_path = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    tracemalloc.start()
+    ii = ingest_documents(islice(iter_documents_imdb(data_path), limit), batch_size=250)
+    ingest_documents(islice(iter_documents_imdb(data_path), limit, limit + 250), inverted_index=ii, batch_size=100)
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"Doküman: {ii.total_docs}, terim: {len(ii.get_vocabulary())}, "
+          f"bellek: {current / 2**20:.1f} MiB (tepe {peak / 2**20:.1f} MiB)")
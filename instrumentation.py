@@ -0,0 +1,337 @@
+# instrumentation.py
+#
+# SearchEngine için isteğe bağlı sorgu ölçümü: her sorgu için aşama süreleri ve sayaçları içeren bir
+# iz (QueryTrace), mod ve aşama başına gecikme histogramları ve yavaş sorgu günlüğü.
+#   instrumentation = SearchInstrumentation(slow_query_threshold_ms=50)
+#   search_engine = SearchEngine(inv_index, instrumentation=instrumentation)
+#   ...
+#   print(instrumentation.to_text())     # Prometheus metin biçimi
+#   instrumentation.snapshot()           # aynı veriler sözlük olarak
+# Ölçüm kapalıyken (instrumentation=None) sorgu başına maliyet birkaç öznitelik kontrolüdür.
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+# Gecikme histogramı kova üst sınırları (saniye): 10 µs'den ~10 sn'ye iki katına çıkarak.
+DEFAULT_LATENCY_BUCKETS = tuple(1e-5 * 2 ** i for i in range(21))
+
+
+class QueryTrace:
+    """
+    Tek bir sorgunun izi. lap(stage) bir önceki işaretten bu yana geçen süreyi aşamaya ekler;
+    count(name, n) sayacı artırır. Sayaçlar:
+        terms            : işlenmiş benzersiz sorgu terimi sayısı
+        postings_decoded : okunan postings girdisi sayısı (MaxScore'da gerçekten skorlanan/yoklanan,
+                           diğer yollarda erişilen postings listelerinin uzunlukları toplamı)
+        candidates       : skorlanan (ya da Boolean'da birleşime/kesişime giren) aday doküman sayısı
+        select_candidates: en iyi top_n seçimine (sınırlı yığına) giren akümülatör girdisi sayısı
+        results          : döndürülen sonuç sayısı
+    """
+
+    __slots__ = ('mode', 'query', 'started_at', 'total_seconds', 'stages', 'counters',
+                 'cached', 'error', '_last_mark')
+
+    def __init__(self, mode, query):
+        self.mode = mode
+        self.query = query
+        self.started_at = time.time()
+        self.total_seconds = 0.0
+        self.stages = {}
+        self.counters = {}
+        self.cached = False
+        self.error = None
+        self._last_mark = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last_mark)
+        self._last_mark = now
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'query': self.query,
+            'started_at': self.started_at,
+            'total_ms': self.total_seconds * 1000,
+            'stages_ms': {stage: seconds * 1000 for stage, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'cached': self.cached,
+            'error': self.error,
+        }
+
+    def __repr__(self):
+        stages = ', '.join(f"{stage}={seconds * 1000:.3f}ms" for stage, seconds in self.stages.items())
+        return f"QueryTrace({self.mode!r}, {self.query!r}, total={self.total_seconds * 1000:.3f}ms, {stages}, {self.counters})"
+
+
+class LatencyHistogram:
+    """Sabit kovalı kümülatif gecikme histogramı (Prometheus histogram semantiği)."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1) # son kova: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        low, high = 0, len(self.buckets)
+        while low < high: # seconds <= buckets[i] olan ilk kova
+            mid = (low + high) // 2
+            if seconds <= self.buckets[mid]:
+                high = mid
+            else:
+                low = mid + 1
+        self.bucket_counts[low] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """q (0..100) yüzdeliğinin kova üst sınırına göre tahmini (saniye)."""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(upper_bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        cumulative, buckets = 0, {}
+        for upper_bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            buckets[upper_bound] = cumulative
+        return {
+            'count': self.count,
+            'sum_seconds': self.sum,
+            'max_seconds': self.max,
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'p99_seconds': self.percentile(99),
+            'buckets': buckets,
+        }
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+class SearchInstrumentation:
+    """
+    Sorgu izlerini toplayan ölçüm nesnesi; SearchEngine'e instrumentation parametresiyle verilir.
+    Birden çok iş parçacığından (ör. search_many executor='thread') güvenle kullanılabilir.
+
+    slow_query_threshold_ms: Toplam süresi bu eşiği aşan sorgular yavaş sorgu günlüğüne yazılır
+        (None: günlük kapalı).
+    slow_query_log_size: Bellekte tutulan en fazla yavaş sorgu sayısı.
+    slow_query_log_path: Verilirse yavaş sorgular bu dosyaya JSON satırları olarak da eklenir.
+    print_slow_queries: True ise yavaş sorgular konsola da yazdırılır.
+    keep_traces: Bellekte tutulan son iz sayısı (0: yalnızca toplamlar tutulur).
+    """
+
+    def __init__(self, slow_query_threshold_ms=100.0, slow_query_log_size=100, slow_query_log_path=None,
+                 print_slow_queries=False, keep_traces=0, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self.slow_query_log_path = slow_query_log_path
+        self.print_slow_queries = print_slow_queries
+        self.buckets = tuple(buckets)
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self.recent_traces = deque(maxlen=keep_traces)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.query_histograms = {}   # mod -> LatencyHistogram
+            self.stage_histograms = {}   # (mod, aşama) -> LatencyHistogram
+            self.counter_totals = {}     # (mod, sayaç) -> toplam
+            self.cache_hits = {}         # mod -> önbellekten dönen sorgu sayısı
+            self.errors = {}             # mod -> hata ile biten sorgu sayısı
+            self.slow_queries.clear()
+            self.recent_traces.clear()
+
+    def start(self, mode, query):
+        trace = QueryTrace(mode, query)
+        self._local.current = trace
+        return trace
+
+    def current_trace(self):
+        """Bu iş parçacığında sürmekte olan sorgunun izi (yoksa None)."""
+        return getattr(self._local, 'current', None)
+
+    def last_trace(self):
+        """Bu iş parçacığında tamamlanan son sorgunun izi (yoksa None)."""
+        return getattr(self._local, 'last', None)
+
+    def finish(self, trace, error=None):
+        """İzi tamamlar ve toplamlara ekler (complete + record)."""
+        return self.record(self.complete(trace, error))
+
+    def complete(self, trace, error=None):
+        """İzin toplam süresini (ve hatasını) yazar; toplamlara eklemez (bkz. record)."""
+        trace.total_seconds = time.perf_counter() - trace._last_mark + sum(trace.stages.values())
+        if error is not None:
+            trace.error = f"{type(error).__name__}: {error}"
+        self._local.current = None
+        self._local.last = trace
+        return trace
+
+    def record(self, trace):
+        """
+        Tamamlanmış bir izi histogramlara, sayaçlara ve yavaş sorgu günlüğüne ekler. search_many'nin
+        süreç havuzu işçilerinde tamamlanan izler ana süreçte bununla kaydedilir.
+        """
+        mode = trace.mode
+        is_slow = self.slow_query_threshold_ms is not None and trace.total_seconds * 1000 >= self.slow_query_threshold_ms
+        with self._lock:
+            histogram = self.query_histograms.get(mode)
+            if histogram is None:
+                histogram = self.query_histograms[mode] = LatencyHistogram(self.buckets)
+            histogram.observe(trace.total_seconds)
+            for stage, seconds in trace.stages.items():
+                stage_histogram = self.stage_histograms.get((mode, stage))
+                if stage_histogram is None:
+                    stage_histogram = self.stage_histograms[(mode, stage)] = LatencyHistogram(self.buckets)
+                stage_histogram.observe(seconds)
+            for name, value in trace.counters.items():
+                self.counter_totals[(mode, name)] = self.counter_totals.get((mode, name), 0) + value
+            if trace.cached:
+                self.cache_hits[mode] = self.cache_hits.get(mode, 0) + 1
+            if trace.error is not None:
+                self.errors[mode] = self.errors.get(mode, 0) + 1
+            self.recent_traces.append(trace)
+            if is_slow:
+                self.slow_queries.append(trace)
+
+        if is_slow:
+            self._log_slow_query(trace)
+        return trace
+
+    def _log_slow_query(self, trace):
+        if self.print_slow_queries:
+            print(f"YAVAŞ SORGU ({trace.total_seconds * 1000:.1f} ms >= {self.slow_query_threshold_ms} ms): {trace!r}")
+        if self.slow_query_log_path:
+            line = json.dumps(trace.to_dict(), ensure_ascii=False)
+            with self._lock, open(self.slow_query_log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def snapshot(self):
+        """Tüm toplamların sözlük hali (JSON'a yazılabilir)."""
+        with self._lock:
+            modes = {}
+            for mode, histogram in self.query_histograms.items():
+                modes[mode] = {
+                    'latency': histogram.to_dict(),
+                    'stages': {stage: stage_histogram.to_dict()
+                               for (stage_mode, stage), stage_histogram in self.stage_histograms.items()
+                               if stage_mode == mode},
+                    'counters': {name: total for (counter_mode, name), total in self.counter_totals.items()
+                                 if counter_mode == mode},
+                    'cache_hits': self.cache_hits.get(mode, 0),
+                    'errors': self.errors.get(mode, 0),
+                }
+            return {
+                'modes': modes,
+                'slow_query_threshold_ms': self.slow_query_threshold_ms,
+                'slow_queries': [trace.to_dict() for trace in self.slow_queries],
+            }
+
+    def to_text(self):
+        """Toplamları Prometheus metin biçiminde döndürür."""
+        lines = []
+        with self._lock:
+            histogram_groups = (
+                ('search_query_seconds', "Sorgu başına toplam süre.",
+                 [((('mode', mode),), histogram) for mode, histogram in self.query_histograms.items()]),
+                ('search_stage_seconds', "Sorgu aşaması başına süre.",
+                 [((('mode', mode), ('stage', stage)), histogram)
+                  for (mode, stage), histogram in self.stage_histograms.items()]),
+            )
+            for metric, description, series in histogram_groups:
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in series:
+                    cumulative = 0
+                    for upper_bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f"{metric}_bucket{_format_labels(labels + (('le', repr(upper_bound)),))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum!r}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+            lines.append("# HELP search_query_events_total Sorgu sayaçlarının toplamları.")
+            lines.append("# TYPE search_query_events_total counter")
+            for (mode, name), total in sorted(self.counter_totals.items()):
+                lines.append(f"search_query_events_total{_format_labels((('mode', mode), ('counter', name)))} {total}")
+            lines.append("# TYPE search_query_cache_hits_total counter")
+            for mode, hits in sorted(self.cache_hits.items()):
+                lines.append(f"search_query_cache_hits_total{_format_labels((('mode', mode),))} {hits}")
+            lines.append("# TYPE search_query_errors_total counter")
+            for mode, errors in sorted(self.errors.items()):
+                lines.append(f"search_query_errors_total{_format_labels((('mode', mode),))} {errors}")
+            lines.append("# TYPE search_slow_queries gauge")
+            lines.append(f"search_slow_queries {len(self.slow_queries)}")
+        return '\n'.join(lines) + '\n'
+
+
+def traced(mode):
+    """
+    SearchEngine'in genel sorgu metotları için dekoratör: ölçüm açıksa bir iz başlatır ve metot
+    bitince (hata olsa da) kaydeder. Ölçüm kapalıyken metot doğrudan çağrılır.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, query, *args, **kwargs):
+            instrumentation = self.instrumentation
+            if instrumentation is None:
+                return method(self, query, *args, **kwargs)
+            trace = instrumentation.start(mode, query)
+            try:
+                result = method(self, query, *args, **kwargs)
+            except Exception as e:
+                instrumentation.finish(trace, error=e)
+                raise
+            trace.count('results', len(result))
+            instrumentation.finish(trace)
+            return result
+        return wrapper
+    return decorator
+
+
+if __name__ == '__main__':
+    import random
+    from inverted_index import InvertedIndex
+    from search import SearchEngine
+
+    random.seed(0)
+    vocabulary = ["space", "alien", "invasion", "comedy", "horror", "thriller", "romance", "drama", "robot", "war"]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = {f"doc_{i}": random.choices(vocabulary, weights, k=random.randint(20, 200)) for i in range(20000)}
+    inv_idx = InvertedIndex()
+    inv_idx.build_index(documents)
+
+    instrumentation = SearchInstrumentation(slow_query_threshold_ms=5, print_slow_queries=True)
+    search_engine = SearchEngine(inv_idx, instrumentation=instrumentation)
+    for query in ("space alien", "horror thriller", "robot war drama", "space alien"):
+        search_engine.tfidf_rank(query, top_n=5)
+        print(instrumentation.last_trace())
+        search_engine.boolean_search(query, 'AND')
+        print(instrumentation.last_trace())
+
+    snapshot = instrumentation.snapshot()
+    for mode, metrics in snapshot['modes'].items():
+        latency = metrics['latency']
+        print(f"{mode}: {latency['count']} sorgu, p50 ~{latency['p50_seconds'] * 1000:.2f} ms, "
+              f"önbellekten {metrics['cache_hits']}, sayaçlar {metrics['counters']}")
+    print(f"Yavaş sorgu sayısı: {len(snapshot['slow_queries'])}")
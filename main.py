@@ -4,12 +4,24 @@ import os
 import random 
 
 from utils import (
+    iter_documents_imdb,
     load_documents_imdb,
     preprocess_text,
-    create_vocabulary_report_detailed
+    preprocess_documents_parallel,
+    create_vocabulary_report_detailed,
+    tee_to_writers
 )
 from inverted_index import InvertedIndex
 from search import SearchEngine
+from doc_store import DocumentStoreWriter, load_document_store
+from snippets import (
+    SnippetBuilder,
+    SnippetIndexWriter,
+    highlight,
+    load_snippet_index,
+    save_snippet_index,
+    snippet_index_path
+)
 from evaluation import (
     precision_recall_f1,
     average_precision,
@@ -19,6 +31,77 @@ from colorama import Fore, Style, init as colorama_init
 
 colorama_init(autoreset=True) 
 
+IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data'
+SNIPPET_INDEX_PATH = 'imdb_reviews.snippets' # Demo'nun özet indeksi (korpus değişirse silinmelidir)
+
+def initialize_search_engine(data_path=IMDB_DATA_PATH, num_workers=None, doc_store_path=None, **search_engine_options):
+    """
+    Raporlama adımları olmadan dokümanları yükler, ön işler, ters indeksi kurar ve arama motorunu
+    oluşturur (app.py ve server.py için).
+    doc_store_path: Verilirse raw_documents olarak sözlük yerine bu yoldaki sıkıştırılmış doküman
+        deposu (DocumentStore) döndürülür; böylece tüm külliyat bellekte tutulmaz. Depo ve yanındaki
+        özet indeksi (snippets.snippet_index_path) varsa yeniden kullanılır ve indeks depodaki
+        metinlerden kurulur (veri dizini okunmaz; korpus değişirse dosyalar silinmelidir). Yoksa
+        dokümanlar veri dizininden akış halinde okunup ön işlenirken eksik dosyalara tek geçişte yazılır.
+    search_engine_options: SearchEngine'e aktarılır (ör. cache_size, instrumentation).
+
+    Returns:
+        tuple: (search_engine, raw_documents, inv_index); yükleme başarısızsa (None, None, None).
+    """
+    if doc_store_path:
+        return _initialize_with_doc_store(data_path, num_workers, doc_store_path, search_engine_options)
+    raw_documents = load_documents_imdb(data_path)
+    if not raw_documents:
+        print(Fore.RED + Style.BRIGHT + "HATA: Doküman yükleme başarısız. Lütfen veri seti konumunu kontrol edin." + Style.RESET_ALL)
+        return None, None, None
+    inv_index = InvertedIndex()
+    inv_index.build_index(preprocess_documents_parallel(raw_documents, num_workers=num_workers, fast=True))
+    return SearchEngine(inv_index, **search_engine_options), raw_documents, inv_index
+
+def _open_existing(path, loader):
+    """Dosya varsa ve geçerliyse loader ile açar; yoksa veya yarım kalmış bir yazımdan kaldıysa None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return loader(path)
+    except ValueError as e:
+        print(Fore.YELLOW + f"Uyarı: {e} Dosya yeniden yazılacak." + Style.RESET_ALL)
+        return None
+
+def _initialize_with_doc_store(data_path, num_workers, doc_store_path, search_engine_options):
+    annotations_path = snippet_index_path(doc_store_path)
+    raw_documents = _open_existing(doc_store_path, load_document_store)
+    writers = []
+    if raw_documents is not None:
+        documents = raw_documents.items()
+        annotations = _open_existing(annotations_path, load_snippet_index)
+        if annotations is not None:
+            annotations.close() # Yalnızca geçerliliği kontrol edilir; özetleri gösteren taraf kendisi açar
+        if annotations is None or len(annotations) != len(raw_documents):
+            writers.append(SnippetIndexWriter(annotations_path))
+    else:
+        documents = ((doc_id, text) for doc_id, _, text in iter_documents_imdb(data_path))
+        writers = [DocumentStoreWriter(doc_store_path), SnippetIndexWriter(annotations_path)]
+
+    inv_index = InvertedIndex()
+    try:
+        inv_index.build_index(preprocess_documents_parallel(tee_to_writers(documents, writers),
+                                                            num_workers=num_workers, fast=True))
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    if inv_index.total_docs == 0:
+        for writer in writers:
+            writer.abort()
+        print(Fore.RED + Style.BRIGHT + "HATA: Doküman yükleme başarısız. Lütfen veri seti konumunu kontrol edin." + Style.RESET_ALL)
+        return None, None, None
+    for writer in writers:
+        writer.close()
+    if raw_documents is None:
+        raw_documents = load_document_store(doc_store_path)
+    return SearchEngine(inv_index, **search_engine_options), raw_documents, inv_index
+
 def run_project_and_interactive_demo():
     """
     Proje dökümanındaki tüm gereksinimleri (Bölüm I-V) sırayla çalıştırır,
@@ -27,8 +110,6 @@ def run_project_and_interactive_demo():
     """
 
     # --- VERİ YÜKLEME ---
-    IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data' 
-    
     print(Fore.CYAN + Style.BRIGHT + "="*80)
     print(Fore.CYAN + Style.BRIGHT + "PROJE BAŞLATILIYOR: IMDb DOKÜMANLARI YÜKLENİYOR...")
     print(Fore.CYAN + Style.BRIGHT + "="*80 + Style.RESET_ALL)
@@ -45,7 +126,9 @@ def run_project_and_interactive_demo():
     print(Fore.CYAN + Style.BRIGHT + "="*80 + Style.RESET_ALL)
     final_vocabulary, processed_documents_all = create_vocabulary_report_detailed(
         raw_documents_all, 
-        sample_size=2
+        sample_size=2,
+        num_workers=None, # Tüm çekirdekler kullanılır
+        fast=True # preprocess_text ile aynı çıktı, önbellekli hızlı ön işleyici
     )
     print(Fore.GREEN + Style.BRIGHT + "\nBölüm I tamamlandı.\n" + Style.RESET_ALL)
 
@@ -55,6 +138,7 @@ def run_project_and_interactive_demo():
     print(Fore.CYAN + Style.BRIGHT + "="*80 + Style.RESET_ALL)
     inv_index = InvertedIndex()
     inv_index.build_index(processed_documents_all)
+    del processed_documents_all # İndeks kurulduktan sonra işlenmiş token listelerine gerek yok
     
     if final_vocabulary:
         report_term_example_idx = len(final_vocabulary) // 3
@@ -67,6 +151,16 @@ def run_project_and_interactive_demo():
 
     # --- ARAMA MOTORU NESNESİNİ OLUŞTUR ---
     search_engine = SearchEngine(inv_index)
+    # Sonuç listelerinde ilk karakterler yerine sorgu terimlerini içeren cümle penceresi gösterilir.
+    # Özet kayıtları tüm dokümanlar için bir kez diske yazılır (sonraki çalıştırmalar dosyayı yeniden
+    # kullanır); böylece gösterilen her sonuç için inceleme yeniden analiz edilmez.
+    snippet_annotations = load_snippet_index(SNIPPET_INDEX_PATH) if os.path.exists(SNIPPET_INDEX_PATH) else None
+    if snippet_annotations is None or len(snippet_annotations) != len(raw_documents_all):
+        if snippet_annotations is not None:
+            snippet_annotations.close()
+        save_snippet_index(raw_documents_all, SNIPPET_INDEX_PATH)
+        snippet_annotations = load_snippet_index(SNIPPET_INDEX_PATH)
+    snippet_builder = SnippetBuilder(raw_documents_all, snippet_annotations)
 
     # --- TEST SORGULARI VE GROUND TRUTH (MANUEL OLUŞTURULMALI!) ---
     print(Fore.CYAN + Style.BRIGHT + "="*80)
@@ -90,6 +184,14 @@ def run_project_and_interactive_demo():
 
     K_FOR_PRF_EVAL = 10 
 
+    # Tüm test sorguları tek seferde değerlendirilir: her sorgu bir kez ön işlenir ve ortak terimlerin
+    # postings'leri bir kez alınır. Bölüm III ve IV sonuçları bu toplu sonuçtan okunur.
+    batch_results = search_engine.search_many(
+        list(example_queries_ground_truth.keys()),
+        modes=('and', 'or', 'tfidf'),
+        top_n=len(raw_documents_all)
+    )
+
     all_boolean_and_retrieved_for_map = []
     all_boolean_or_retrieved_for_map = []
     all_tfidf_retrieved_ranked_for_map = []
@@ -101,17 +203,17 @@ def run_project_and_interactive_demo():
     print(Fore.YELLOW + "Proje Dökümanı Gereksinim 3: 'Aşağıda belirtilen sorgular için Boolean retrieval sonuçlarını gösteriniz...'" + Style.RESET_ALL)
     print(Fore.CYAN + Style.BRIGHT + "="*80 + Style.RESET_ALL)
 
-    for query_text, relevant_docs_gt_set in example_queries_ground_truth.items():
+    for (query_text, relevant_docs_gt_set), query_results in zip(example_queries_ground_truth.items(), batch_results):
         print(Fore.MAGENTA + f"\n--- Sorgu: '{query_text}' ---" + Style.RESET_ALL)
         
-        retrieved_bool_and = search_engine.boolean_search(query_text, operator='AND')
+        retrieved_bool_and = query_results['and']
         print(Fore.GREEN + f"\n  Boolean (AND) Sonuçları:" + Style.RESET_ALL)
         print(f"    Alınan Doküman Sayısı: {len(retrieved_bool_and)}")
         print(f"    Doküman Kimlikleri (ilk {K_FOR_PRF_EVAL}): {retrieved_bool_and[:K_FOR_PRF_EVAL]}")
         if len(retrieved_bool_and) > K_FOR_PRF_EVAL: print("    ...")
         if relevant_docs_gt_set: all_boolean_and_retrieved_for_map.append(retrieved_bool_and)
 
-        retrieved_bool_or = search_engine.boolean_search(query_text, operator='OR')
+        retrieved_bool_or = query_results['or']
         print(Fore.GREEN + f"\n  Boolean (OR) Sonuçları:" + Style.RESET_ALL)
         print(f"    Alınan Doküman Sayısı: {len(retrieved_bool_or)}")
         print(f"    Doküman Kimlikleri (ilk {K_FOR_PRF_EVAL}): {retrieved_bool_or[:K_FOR_PRF_EVAL]}")
@@ -128,16 +230,19 @@ def run_project_and_interactive_demo():
     print(Fore.YELLOW + "Proje Dökümanı Gereksinim 4: '...aynı sorgu seti için TF-IDf puanlamasını kullanarak belgeleri çıkarınız...'" + Style.RESET_ALL)
     print(Fore.CYAN + Style.BRIGHT + "="*80 + Style.RESET_ALL)
 
-    for query_text, relevant_docs_gt_set in example_queries_ground_truth.items():
+    for (query_text, relevant_docs_gt_set), query_results in zip(example_queries_ground_truth.items(), batch_results):
         print(Fore.MAGENTA + f"\n--- Sorgu: '{query_text}' ---" + Style.RESET_ALL)
-        tfidf_ranked_scores_full = search_engine.tfidf_rank(query_text, top_n=len(raw_documents_all))
+        tfidf_ranked_scores_full = query_results['tfidf']
         
         print(Fore.GREEN + f"\n  TF-IDF Sıralı Sonuçlar (TF-IDF ağırlıklarına göre, ilk {K_FOR_PRF_EVAL} gösteriliyor):" + Style.RESET_ALL)
         if not tfidf_ranked_scores_full: 
             print("    Hiç doküman bulunamadı.")
         else:
-            for i, (doc_id, score) in enumerate(tfidf_ranked_scores_full[:K_FOR_PRF_EVAL]):
-                 print(f"    {i+1}. Doküman ID: {doc_id} (Skor: {score:.4f}) - Başlık (ilk 50 krk): {raw_documents_all.get(doc_id, 'N/A')[:50]}...")
+            top_ranked = tfidf_ranked_scores_full[:K_FOR_PRF_EVAL]
+            snippets = snippet_builder.snippets([doc_id for doc_id, _ in top_ranked], query_text)
+            for i, (doc_id, score) in enumerate(top_ranked):
+                 print(f"    {i+1}. Doküman ID: {doc_id} (Skor: {score:.4f})")
+                 print(f"       Özet: {highlight(snippets[doc_id], Style.BRIGHT, Style.NORMAL)}")
         
         if relevant_docs_gt_set:
             tfidf_retrieved_ranked_ids = [doc_id for doc_id, score in tfidf_ranked_scores_full]
@@ -260,8 +365,9 @@ def run_project_and_interactive_demo():
             print(Fore.GREEN + Style.BRIGHT + f"\n>>> Boolean ({bool_operator}) Sonuçları ({len(boolean_results)} doküman bulundu):" + Style.RESET_ALL)
             if not boolean_results: print(Fore.YELLOW + "   Bu sorgu için sonuç bulunamadı.")
             else:
+                snippets = snippet_builder.snippets(boolean_results[:K_FOR_DYNAMIC_PRF], user_query)
                 for i, doc_id in enumerate(boolean_results[:K_FOR_DYNAMIC_PRF]):
-                    print(Fore.CYAN + f"  {i+1}. {doc_id} - İçerik (ilk 70 krk): {raw_documents_all.get(doc_id, '')[:70]}...")
+                    print(Fore.CYAN + f"  {i+1}. {doc_id} - Özet: {highlight(snippets[doc_id], Fore.YELLOW, Fore.CYAN)}")
                 if len(boolean_results) > K_FOR_DYNAMIC_PRF: print(Fore.YELLOW + f"   ... ({len(boolean_results) - K_FOR_DYNAMIC_PRF} daha fazla)")
 
             if pseudo_relevant_docs_dynamic or not processed_user_query_terms:
@@ -277,8 +383,9 @@ def run_project_and_interactive_demo():
             print(Fore.GREEN + Style.BRIGHT + f"\n>>> TF-IDF Sıralı Sonuçlar (ilk {len(tfidf_results_scores)}):" + Style.RESET_ALL)
             if not tfidf_results_scores: print(Fore.YELLOW + "   Bu sorgu için sonuç bulunamadı.")
             else:
+                snippets = snippet_builder.snippets(tfidf_ids, user_query)
                 for i, (doc_id, score) in enumerate(tfidf_results_scores):
-                    print(Fore.CYAN + f"  {i+1}. {doc_id} (Skor: {score:.4f}) - İçerik (ilk 70 krk): {raw_documents_all.get(doc_id, '')[:70]}...")
+                    print(Fore.CYAN + f"  {i+1}. {doc_id} (Skor: {score:.4f}) - Özet: {highlight(snippets[doc_id], Fore.YELLOW, Fore.CYAN)}")
 
             if pseudo_relevant_docs_dynamic or not processed_user_query_terms:
                 p_tf_dyn, r_tf_dyn, f1_tf_dyn = precision_recall_f1(tfidf_ids, pseudo_relevant_docs_dynamic)
@@ -0,0 +1,351 @@
+# postings_codec.py
+
+from array import array
+from bisect import bisect_left
+from collections.abc import ItemsView, Mapping
+from itertools import accumulate
+
+# Postings'ler BLOCK_SIZE'lık bloklar halinde kodlanır. Her blok kendi başına çözülebilir:
+# blok içindeki ilk doküman numarası bir önceki bloğun son doküman numarasına göre fark (delta)
+# olarak yazılır, bu yüzden bir dokümanı aramak için yalnızca ilgili blok çözülür.
+BLOCK_SIZE = 128
+
+
+def vbyte_encode(numbers, out):
+    """
+    Negatif olmayan tamsayıları Variable-Byte ile kodlayıp out (bytearray) sonuna ekler.
+    Her bayt 7 bit veri taşır; sayının son baytında en yüksek bit 1'dir.
+    """
+    for number in numbers:
+        while number >= 128:
+            out.append(number & 0x7F)
+            number >>= 7
+        out.append(number | 0x80)
+
+
+def vbyte_decode(data, pos, count):
+    """data[pos:] içinden count adet VByte sayı çözer. Returns: (sayılar listesi, yeni konum)."""
+    numbers = []
+    append = numbers.append
+    for _ in range(count):
+        number = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            if byte & 0x80:
+                number |= (byte & 0x7F) << shift
+                break
+            number |= byte << shift
+            shift += 7
+        append(number)
+    return numbers, pos
+
+
+def bitpack_encode(numbers, width, out):
+    """count adet sayıyı her biri width bit olacak şekilde (little-endian) out sonuna ekler."""
+    if width == 0:
+        return
+    value = 0
+    for i, number in enumerate(numbers):
+        value |= number << (i * width)
+    out += value.to_bytes((len(numbers) * width + 7) // 8, 'little')
+
+
+def bitpack_decode(data, pos, count, width):
+    """bitpack_encode ile yazılmış count adet sayıyı çözer. Returns: (sayılar listesi, yeni konum)."""
+    if width == 0:
+        return [0] * count, pos
+    end = pos + (count * width + 7) // 8
+    value = int.from_bytes(data[pos:end], 'little')
+    mask = (1 << width) - 1
+    return [(value >> (i * width)) & mask for i in range(count)], end
+
+
+def encode_positions(positions):
+    """Artan sıralı token konumlarını fark (delta) + VByte olarak kodlar."""
+    out = bytearray()
+    previous = 0
+    gaps = []
+    for position in positions:
+        gaps.append(position - previous)
+        previous = position
+    vbyte_encode(gaps, out)
+    return bytes(out)
+
+
+def decode_positions(data, count):
+    """encode_positions ile kodlanmış count adet konumu çözer."""
+    gaps, _ = vbyte_decode(data, 0, count)
+    return list(accumulate(gaps))
+
+
+class VByteCodec:
+    """Blok: [n] + VByte(doküman farkları - 1) + VByte(tf - 1)."""
+    name = 'vbyte'
+
+    def encode_block(self, gaps, tfs_minus_one, out):
+        out.append(len(gaps) - 1)
+        vbyte_encode(gaps, out)
+        vbyte_encode(tfs_minus_one, out)
+
+    def decode_block(self, data, pos):
+        count = data[pos] + 1
+        gaps, pos = vbyte_decode(data, pos + 1, count)
+        tfs_minus_one, _ = vbyte_decode(data, pos, count)
+        return gaps, tfs_minus_one
+
+
+class BitPackCodec:
+    """Blok: [n][fark bit genişliği][tf bit genişliği] + bit-paketlenmiş farklar + bit-paketlenmiş tf'ler."""
+    name = 'bitpack'
+
+    def encode_block(self, gaps, tfs_minus_one, out):
+        gap_width = max(gaps).bit_length()
+        tf_width = max(tfs_minus_one).bit_length()
+        out += bytes((len(gaps) - 1, gap_width, tf_width))
+        bitpack_encode(gaps, gap_width, out)
+        bitpack_encode(tfs_minus_one, tf_width, out)
+
+    def decode_block(self, data, pos):
+        count, gap_width, tf_width = data[pos] + 1, data[pos + 1], data[pos + 2]
+        gaps, pos = bitpack_decode(data, pos + 3, count, gap_width)
+        tfs_minus_one, _ = bitpack_decode(data, pos, count, tf_width)
+        return gaps, tfs_minus_one
+
+
+CODECS = {
+    VByteCodec.name: VByteCodec(),
+    BitPackCodec.name: BitPackCodec(),
+}
+
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Desteklenmeyen postings codec'i: '{name}'. Seçenekler: {', '.join(CODECS)}") from None
+
+
+class EncodedPostings:
+    """
+    Bir terimin sıkıştırılmış postings'i. Bloklar tek bir bytes nesnesinde art arda durur;
+    block_offsets ve block_last_docs (her bloğun son doküman numarası) sayesinde bir doküman
+    numarası için yalnızca ilgili blok çözülür. Son çözülen blok önbellekte tutulur.
+    """
+    __slots__ = ('codec', 'data', 'block_offsets', 'block_last_docs', 'count', '_cache')
+
+    def __init__(self, doc_nums, tfs, codec):
+        self.codec = codec
+        self.count = len(doc_nums)
+        self.block_offsets = array('I')
+        self.block_last_docs = array('I')
+        out = bytearray()
+        previous_doc = -1
+        for start in range(0, self.count, BLOCK_SIZE):
+            block_docs = doc_nums[start:start + BLOCK_SIZE]
+            block_tfs = tfs[start:start + BLOCK_SIZE]
+            gaps = []
+            for doc_num in block_docs:
+                gaps.append(doc_num - previous_doc - 1)
+                previous_doc = doc_num
+            self.block_offsets.append(len(out))
+            self.block_last_docs.append(previous_doc)
+            codec.encode_block(gaps, [tf - 1 for tf in block_tfs], out)
+        self.data = bytes(out)
+        self._cache = (-1, None) # (blok numarası, çözülmüş blok); tek atamayla güncellenir
+
+    @property
+    def num_blocks(self):
+        return len(self.block_offsets)
+
+    def nbytes(self):
+        """Kodlanmış veri + blok meta verisinin bayt cinsinden boyutu."""
+        return len(self.data) + self.block_offsets.itemsize * len(self.block_offsets) * 2
+
+    def decode_block(self, block_no):
+        """Bir bloğu çözer. Returns: (doküman numaraları listesi, tf listesi)."""
+        cached_block_no, cached = self._cache
+        if block_no == cached_block_no:
+            return cached
+        gaps, tfs_minus_one = self.codec.decode_block(self.data, self.block_offsets[block_no])
+        base = self.block_last_docs[block_no - 1] if block_no > 0 else -1
+        doc_nums = list(accumulate((gap + 1 for gap in gaps), initial=base))[1:]
+        decoded = (doc_nums, [tf + 1 for tf in tfs_minus_one])
+        self._cache = (block_no, decoded)
+        return decoded
+
+    def find_block(self, doc_num):
+        """doc_num'u içerebilecek bloğun numarası; doc_num son dokümandan büyükse num_blocks."""
+        return bisect_left(self.block_last_docs, doc_num)
+
+    def get_tf(self, doc_num):
+        """Yalnızca ilgili bloğu çözerek doc_num'un tf'sini döndürür (yoksa 0)."""
+        block_no = self.find_block(doc_num)
+        if block_no >= self.num_blocks:
+            return 0
+        doc_nums, tfs = self.decode_block(block_no)
+        pos = bisect_left(doc_nums, doc_num)
+        if pos < len(doc_nums) and doc_nums[pos] == doc_num:
+            return tfs[pos]
+        return 0
+
+    def iter_blocks(self):
+        """Blokları sırayla çözerek (doküman numaraları, tf'ler) çiftleri üretir."""
+        for block_no in range(self.num_blocks):
+            yield self.decode_block(block_no)
+
+    def decode_all(self):
+        """Tüm postings'i çözer. Returns: (array('I') doküman numaraları, array('I') tf'ler)."""
+        doc_nums = array('I')
+        tfs = array('I')
+        for block_docs, block_tfs in self.iter_blocks():
+            doc_nums.extend(block_docs)
+            tfs.extend(block_tfs)
+        return doc_nums, tfs
+
+
+class BlockPostingsCursor:
+    """
+    EncodedPostings üzerinde ileri yönlü imleç (bkz. inverted_index.ArrayPostingsCursor).
+    next_geq önce blokların son doküman numaraları üzerinden blok atlar (skip), ardından yalnızca
+    hedefin düştüğü bloğu çözer; atlanan bloklar hiç çözülmez.
+    """
+    __slots__ = ('postings', 'block_no', 'block_docs', 'block_tfs', 'pos')
+
+    def __init__(self, postings):
+        self.postings = postings
+        self.block_no = -1
+        self.block_docs = []
+        self.block_tfs = []
+        self.pos = 0
+        self._load_block(0)
+
+    def __len__(self):
+        return self.postings.count
+
+    def _load_block(self, block_no):
+        self.block_no = block_no
+        self.pos = 0
+        if block_no < self.postings.num_blocks:
+            self.block_docs, self.block_tfs = self.postings.decode_block(block_no)
+        else:
+            self.block_docs, self.block_tfs = [], []
+
+    def doc(self):
+        return self.block_docs[self.pos] if self.pos < len(self.block_docs) else None
+
+    def tf(self):
+        return self.block_tfs[self.pos]
+
+    def next_geq(self, target):
+        """İmleci target'a eşit ya da büyük ilk dokümana ilerletir ve onu döndürür (yoksa None)."""
+        if self.block_no >= self.postings.num_blocks:
+            return None
+        if self.postings.block_last_docs[self.block_no] < target:
+            block_no = bisect_left(self.postings.block_last_docs, target, self.block_no + 1)
+            self._load_block(block_no)
+            if block_no >= self.postings.num_blocks:
+                return None
+        self.pos = bisect_left(self.block_docs, target, self.pos)
+        return self.block_docs[self.pos]
+
+
+class _EncodedPostingsItemsView(ItemsView):
+    def __iter__(self):
+        view = self._mapping
+        doc_ids = view.index.doc_ids
+        for block_docs, block_tfs in view.postings.iter_blocks():
+            for doc_num, tf in zip(block_docs, block_tfs):
+                yield doc_ids[doc_num], tf
+
+
+class EncodedPostingsView(Mapping):
+    """
+    EncodedPostings üzerinde {doc_id: tf} gibi davranan görünüm (bkz. inverted_index.PostingsView).
+    Tekil erişimler (get, in) yalnızca ilgili bloğu, dolaşma ise blokları sırayla çözer.
+    """
+    __slots__ = ('postings', 'index')
+
+    def __init__(self, postings, index):
+        self.postings = postings
+        self.index = index
+
+    def get(self, doc_id, default=None):
+        doc_num = self.index.get_doc_num(doc_id)
+        if doc_num is None:
+            return default
+        tf = self.postings.get_tf(doc_num)
+        return tf if tf > 0 else default
+
+    def __getitem__(self, doc_id):
+        tf = self.get(doc_id)
+        if tf is None:
+            raise KeyError(doc_id)
+        return tf
+
+    def __contains__(self, doc_id):
+        return self.get(doc_id) is not None
+
+    def __iter__(self):
+        doc_ids = self.index.doc_ids
+        for block_docs, _ in self.postings.iter_blocks():
+            for doc_num in block_docs:
+                yield doc_ids[doc_num]
+
+    def __len__(self):
+        return self.postings.count
+
+    def items(self):
+        return _EncodedPostingsItemsView(self)
+
+
+if __name__ == '__main__':
+    # Codec karşılaştırması: IMDb verisi üzerinde boyut ve çözme hızı.
+    import random
+    import time
+    from inverted_index import CompactInvertedIndex
+    from utils import load_documents_imdb, preprocess_text
+
+    IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data'
+    SAMPLE_SIZE = 5000 # Tüm korpus için None
+
+    raw_documents_full = load_documents_imdb(IMDB_DATA_PATH)
+    if raw_documents_full:
+        doc_ids = list(raw_documents_full.keys())[:SAMPLE_SIZE]
+        compact_idx = CompactInvertedIndex()
+        compact_idx.build_index((doc_id, preprocess_text(raw_documents_full[doc_id])) for doc_id in doc_ids)
+        vocabulary = compact_idx.get_vocabulary()
+        total_postings = sum(compact_idx.get_df(term) for term in vocabulary)
+        raw_bytes = total_postings * 8 # uint32 doküman numarası + uint32 tf
+        print(f"\n{len(vocabulary)} terim, {total_postings} posting. Sıkıştırılmamış: {raw_bytes / 1024:.0f} KB")
+
+        random.seed(42)
+        probes = [(term, random.randrange(compact_idx.total_docs)) for term in random.choices(vocabulary, k=20000)]
+        print(f"{'codec':<10}{'boyut (KB)':>12}{'bayt/posting':>14}{'oran':>8}{'çözme (Mposting/sn)':>22}{'rastgele erişim (µs)':>22}")
+        for codec_name, codec in CODECS.items():
+            start_time = time.perf_counter()
+            encoded = {}
+            for term in vocabulary:
+                doc_nums, tfs = compact_idx.get_postings_arrays(term)
+                encoded[term] = EncodedPostings(doc_nums, tfs, codec)
+            encode_seconds = time.perf_counter() - start_time
+            encoded_bytes = sum(postings.nbytes() for postings in encoded.values())
+
+            start_time = time.perf_counter()
+            for postings in encoded.values():
+                for _ in postings.iter_blocks():
+                    pass
+            decode_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            for term, doc_num in probes:
+                encoded[term].get_tf(doc_num)
+            probe_seconds = time.perf_counter() - start_time
+
+            print(f"{codec_name:<10}{encoded_bytes / 1024:>12.0f}{encoded_bytes / total_postings:>14.2f}"
+                  f"{raw_bytes / encoded_bytes:>8.2f}{total_postings / decode_seconds / 1e6:>22.2f}"
+                  f"{probe_seconds / len(probes) * 1e6:>22.2f}")
+            print(f"{'':<10}(kodlama: {encode_seconds:.2f} sn)")
+    else:
+        print("Doküman yüklenemedi.")
@@ -0,0 +1,270 @@
+# query_parser.py
+
+import re
+
+from utils import preprocess_text
+
+# Sorgu dili:
+#   sorgu     := or_ifade
+#   or_ifade  := and_ifade (OR and_ifade)*
+#   and_ifade := not_ifade ([AND] not_ifade)*     -> yan yana yazılan ifadeler AND ile bağlanır
+#   not_ifade := NOT not_ifade | birincil
+#   birincil  := '(' or_ifade ')' | '"' ifade '"' | kelime
+# Yalnızca büyük harfle yazılan AND/OR/NOT operatördür; küçük harfli and/or/not sıradan kelimedir ve
+# stopword olarak elenir (ör. "movies not worth watching" -> And(movi, worth, watch)).
+# Örnek: (thriller OR horror) AND NOT comedy
+#        "special effects" AND NOT "bad acting"
+_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"?|([^\s()"]+))')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+class QuerySyntaxError(ValueError):
+    """Sorgu metni dilbilgisine uymadığında fırlatılır."""
+
+
+class TermNode:
+    __slots__ = ('term', 'cost')
+
+    def __init__(self, term):
+        self.term = term
+        self.cost = None
+
+    def __repr__(self):
+        return f"Term({self.term!r})"
+
+
+class PhraseNode:
+    """Art arda geçmesi gereken işlenmiş terimler (ör. "special effects" -> ['special', 'effect'])."""
+    __slots__ = ('terms', 'cost')
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.cost = None
+
+    def __repr__(self):
+        return f"Phrase({self.terms!r})"
+
+
+class AndNode:
+    __slots__ = ('children', 'cost')
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = None
+
+    def __repr__(self):
+        return f"And({', '.join(map(repr, self.children))})"
+
+
+class OrNode:
+    __slots__ = ('children', 'cost')
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = None
+
+    def __repr__(self):
+        return f"Or({', '.join(map(repr, self.children))})"
+
+
+class NotNode:
+    __slots__ = ('child', 'cost')
+
+    def __init__(self, child):
+        self.child = child
+        self.cost = None
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+
+def tokenize_query(query_string):
+    """Sorgu metnini ('(', ')', ('PHRASE', metin), ('OP', ad), ('WORD', kelime)) belirteçlerine ayırır."""
+    tokens = []
+    pos = 0
+    query_string = query_string.strip()
+    while pos < len(query_string):
+        match = _TOKEN_PATTERN.match(query_string, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"Sorgu çözümlenemedi (konum {pos}): {query_string!r}")
+        pos = match.end()
+        open_paren, close_paren, phrase, word = match.groups()
+        if open_paren:
+            tokens.append(('(', None))
+        elif close_paren:
+            tokens.append((')', None))
+        elif phrase is not None:
+            tokens.append(('PHRASE', phrase))
+        elif word in _OPERATORS:
+            tokens.append(('OP', word))
+        else:
+            tokens.append(('WORD', word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens, use_stemming=True):
+        self.tokens = tokens
+        self.pos = 0
+        self.use_stemming = use_stemming
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def advance(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return None
+        node = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise QuerySyntaxError(f"Beklenmeyen belirteç: {self.peek()}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == ('OP', 'OR'):
+            self.advance()
+            children.append(self.parse_and())
+        return _make_nary(OrNode, children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while True:
+            kind, value = self.peek()
+            if kind == 'OP' and value == 'AND':
+                self.advance()
+            elif kind not in ('WORD', 'PHRASE', '(') and not (kind == 'OP' and value == 'NOT'):
+                break
+            children.append(self.parse_not())
+        return _make_nary(AndNode, children)
+
+    def parse_not(self):
+        if self.peek() == ('OP', 'NOT'):
+            self.advance()
+            child = self.parse_not()
+            return NotNode(child) if child is not None else None
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, value = self.advance()
+        if kind == '(':
+            node = self.parse_or()
+            if self.advance()[0] != ')':
+                raise QuerySyntaxError("Kapanmamış parantez.")
+            return node
+        if kind == 'PHRASE':
+            terms = preprocess_text(value, use_stemming=self.use_stemming)
+            if len(terms) > 1:
+                return PhraseNode(terms)
+            return TermNode(terms[0]) if terms else None
+        if kind == 'WORD':
+            terms = preprocess_text(value, use_stemming=self.use_stemming)
+            # Bir kelime birden fazla terime ayrılabilir (ör. "cannot" -> can, not); hepsi aranır.
+            return _make_nary(AndNode, [TermNode(term) for term in terms])
+        if kind is None:
+            raise QuerySyntaxError("Sorgu beklenmedik şekilde bitti: bir terim veya ifade bekleniyordu.")
+        raise QuerySyntaxError(f"Beklenmeyen belirteç: {(kind, value)}")
+
+
+def _make_nary(node_class, children):
+    """Boş (stopword'e dönüşmüş) çocukları atar; tek çocuk kalırsa onu döndürür."""
+    children = [child for child in children if child is not None]
+    if not children:
+        return None
+    if len(children) == 1:
+        return children[0]
+    return node_class(children)
+
+
+def parse_query(query_string, use_stemming=True):
+    """
+    Sorgu metnini bir sorgu ağacına çevirir. Kelimeler ve ifadeler preprocess_text ile işlenir;
+    tamamen stopword'lerden oluşan kısımlar ağaçtan düşer. Sorgu boş kalırsa None döner.
+    """
+    return _Parser(tokenize_query(query_string), use_stemming).parse()
+
+
+def plan_query(node, inverted_index):
+    """
+    Sorgu ağacını indeksteki DF değerlerine göre yeniden düzenler ve her düğüme tahmini maliyet
+    (eşleşebilecek en fazla doküman sayısı) yazar:
+      - İç içe aynı tür AND/OR düğümleri düzleştirilir, NOT NOT x -> x olur.
+      - AND çocukları maliyete göre artan sıralanır; NOT çocukları en sona alınır ve
+        değerlendirmede tümleyen küme yerine akış halinde fark (filtre) olarak uygulanır.
+      - DF'si 0 olan bir terim AND'i boşaltır, OR'dan ise atılır.
+    Returns: Planlanmış ağaç (sonuç kesin boşsa None).
+    """
+    if node is None:
+        return None
+    total_docs = inverted_index.total_docs
+
+    if isinstance(node, TermNode):
+        node.cost = inverted_index.get_df(node.term)
+        return node if node.cost > 0 else None
+
+    if isinstance(node, PhraseNode):
+        node.cost = min(inverted_index.get_df(term) for term in node.terms)
+        return node if node.cost > 0 else None
+
+    if isinstance(node, NotNode):
+        if isinstance(node.child, NotNode):
+            return plan_query(node.child.child, inverted_index)
+        child = plan_query(node.child, inverted_index)
+        if child is None:
+            # NOT (boş küme) -> tüm dokümanlar
+            node.child = None
+            node.cost = total_docs
+            return node
+        node.child = child
+        node.cost = total_docs - child.cost
+        return node
+
+    if isinstance(node, AndNode):
+        children = []
+        for child in node.children:
+            child = plan_query(child, inverted_index)
+            if child is None:
+                return None
+            if isinstance(child, NotNode) and child.child is None:
+                continue # x AND NOT (boş) -> x
+            children.extend(child.children if isinstance(child, AndNode) else [child])
+        positives = sorted((c for c in children if not isinstance(c, NotNode)), key=lambda c: c.cost)
+        negatives = sorted((c for c in children if isinstance(c, NotNode)), key=lambda c: c.cost)
+        if not positives and not negatives:
+            # Tüm çocuklar NOT (boş küme) idi -> tüm dokümanlar
+            all_docs = NotNode(None)
+            all_docs.cost = total_docs
+            return all_docs
+        node.children = positives + negatives
+        node.cost = positives[0].cost if positives else min(c.cost for c in negatives)
+        return node if len(node.children) > 1 else node.children[0]
+
+    if isinstance(node, OrNode):
+        children = []
+        for child in node.children:
+            child = plan_query(child, inverted_index)
+            if child is None:
+                continue
+            children.extend(child.children if isinstance(child, OrNode) else [child])
+        if not children:
+            return None
+        children.sort(key=lambda c: c.cost)
+        node.children = children
+        node.cost = min(total_docs, sum(c.cost for c in children))
+        return node if len(children) > 1 else children[0]
+
+    raise TypeError(f"Bilinmeyen sorgu düğümü: {node!r}")
+
+
+if __name__ == '__main__':
+    for example in ['(thriller OR horror) AND NOT comedy',
+                    '"special effects" great',
+                    'world war two',
+                    'NOT (boring OR bad)',
+                    'the AND of',
+                    'movies not worth watching']:
+        print(f"{example!r:45} -> {parse_query(example)!r}")
@@ -1,28 +1,228 @@
 # search.py
 
-import math # calculate_doc_score_for_query için tfidf.py içinde kullanılabilir, burada doğrudan gerekmez
-from collections import defaultdict
+import heapq
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from operator import itemgetter
 
 # utils.py'den sorgu ön işleme için fonksiyonu import ediyoruz
-from utils import preprocess_text
+from utils import iter_batches, preprocess_text
 
-# tfidf.py'den doküman skorlama fonksiyonunu import ediyoruz
+from instrumentation import traced
+from inverted_index import ArrayPostingsCursor
+from query_parser import AndNode, NotNode, OrNode, PhraseNode, TermNode, parse_query, plan_query
+
+# tfidf.py'den doküman skorlama fonksiyonlarını import ediyoruz
 # Bu importun çalışması için tfidf.py dosyasının aynı dizinde olması gerekir.
 try:
-    from tfidf import calculate_doc_score_for_query
+    from tfidf import (
+        calculate_doc_score_for_query,
+        calculate_idf,
+        calculate_tf_log_normalized,
+        accumulate_tfidf_scores,
+        accumulate_tfidf_scores_maxscore,
+    )
 except ImportError:
-    print("UYARI: tfidf.py modülü bulunamadı veya calculate_doc_score_for_query fonksiyonu eksik.")
+    print("UYARI: tfidf.py modülü bulunamadı veya skorlama fonksiyonları eksik.")
     print("TF-IDF sıralaması düzgün çalışmayabilir.")
     # Alternatif olarak, TF-IDF mantığını buraya geri taşıyabilirsiniz veya hatayı düzeltin.
     def calculate_doc_score_for_query(*args, **kwargs): # Placeholder
         return 0.0
+    def accumulate_tfidf_scores(*args, **kwargs): # Placeholder
+        return {}
+    def accumulate_tfidf_scores_maxscore(*args, **kwargs): # Placeholder
+        return {}
+    def calculate_idf(*args, **kwargs): # Placeholder
+        return 0.0
+    def calculate_tf_log_normalized(*args, **kwargs): # Placeholder
+        return 0.0
+
+from bm25 import DEFAULT_B, DEFAULT_K1, accumulate_bm25_scores, compute_bm25_norms, validate_bm25_params
+
+
+class QueryResultCache:
+    """
+    Sorgu sonuçları için LRU önbellek (isteğe bağlı TTL ile). Her girdi, hesaplandığı andaki indeks
+    kuşağıyla (generation) saklanır; indeks değiştiyse girdi bayat sayılıp atılır ve asla döndürülmez.
+    Çoklu iş parçacığından güvenle kullanılabilir.
+    max_size: En fazla girdi sayısı (0: önbellek kapalı).
+    ttl: Saniye cinsinden girdi ömrü (None: süresiz).
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict() # key -> (generation, son geçerlilik zamanı, sonuç)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, generation):
+        """Geçerli bir girdi varsa (True, sonuç), yoksa (False, None) döndürür."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value = entry
+                if entry_generation == generation and (expires_at is None or time.monotonic() < expires_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, generation, value):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (generation, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+
+SEARCH_MODES = ('and', 'or', 'tfidf', 'bm25')
+
+
+class _SharedTermData:
+    """
+    search_many için indeks önünde duran terim verisi önbelleği: bir toplu sorgudaki her terimin
+    postings'i, df'i ve postings kümesi indeksten yalnızca bir kez alınır. İndeksin get_* arayüzünü
+    taklit ettiği için mevcut değerlendirme fonksiyonlarına indeks yerine verilebilir.
+    """
+
+    def __init__(self, inverted_index):
+        self.ii = inverted_index
+        self._postings = {}
+        self._postings_sets = {}
+        self._dfs = {}
+        self._arrays = {}
+        if hasattr(inverted_index, 'get_postings_arrays') and hasattr(inverted_index, 'get_postings_cursor'):
+            self.get_postings_cursor = self._array_cursor
+        elif hasattr(inverted_index, 'get_postings_cursor'):
+            self.get_postings_cursor = inverted_index.get_postings_cursor
+
+    def __getattr__(self, name):
+        # total_docs, doc_ids, get_doc_length, get_max_tf ... doğrudan indekse yönlendirilir.
+        return getattr(self.ii, name)
+
+    def get_postings_with_tf(self, term):
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = self._postings[term] = self.ii.get_postings_with_tf(term)
+        return postings
+
+    def get_postings_list(self, term):
+        postings_set = self._postings_sets.get(term)
+        if postings_set is None:
+            postings_set = self._postings_sets[term] = set(self.get_postings_with_tf(term))
+        return postings_set
+
+    def get_df(self, term):
+        df = self._dfs.get(term)
+        if df is None:
+            df = self._dfs[term] = self.ii.get_df(term)
+        return df
+
+    def _array_cursor(self, term):
+        # İmleçler durum tuttuğu için her seferinde yenisi, paylaşılan dizilerin üzerinde kurulur.
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            arrays = self._arrays[term] = self.ii.get_postings_arrays(term)
+        return ArrayPostingsCursor(*arrays)
+
+
+_pool_search_engine = None # search_many'nin süreç havuzundaki işçilerinin (fork ile devralınan) motoru
+
+def _init_search_worker(search_engine):
+    global _pool_search_engine
+    _pool_search_engine = search_engine
+
+def _search_worker(term_lists, modes, top_n, pruning, queries):
+    # Ölçüm açıksa işçide tamamlanan izler sonuçlarla birlikte ana sürece döndürülür.
+    traces = [] if _pool_search_engine.instrumentation is not None else None
+    results = _pool_search_engine._evaluate_term_lists(term_lists, modes, top_n, pruning, queries, traces)
+    return results, traces
+
 
 class SearchEngine:
-    def __init__(self, inverted_index_obj):
+    def __init__(self, inverted_index_obj, cache_size=1024, cache_ttl=None, instrumentation=None):
         """
         inverted_index_obj: Oluşturulmuş InvertedIndex sınıfının bir örneği.
+        cache_size: Sonuç önbelleğinin en fazla girdi sayısı (0: önbellek kapalı).
+        cache_ttl: Önbellek girdilerinin saniye cinsinden ömrü (None: indeks değişene kadar geçerli).
+        instrumentation: instrumentation.SearchInstrumentation örneği verilirse boolean_search,
+            boolean_query, tfidf_rank ve bm25_rank sorgularının aşama süreleri ve sayaçları ölçülür
+            (None: ölçüm kapalı).
         """
         self.ii = inverted_index_obj
+        self.instrumentation = instrumentation
+        self._local = threading.local() # İş parçacığına özgü durum (last_pruning_stats)
+        self.result_cache = QueryResultCache(cache_size, cache_ttl)
+        self._tfidf_matrix = None # (indeks kuşağı, vector_scoring.TfidfMatrix), ilk toplu sorguda derlenir
+        self._bm25_norms = OrderedDict() # (indeks kuşağı, k1, b) -> doküman uzunluk normalizasyon tablosu
+
+    def _index_generation(self):
+        # Salt-okunur indeksler (Compact/Mapped) değişmediği için kuşakları sabittir.
+        return getattr(self.ii, 'generation', 0)
+
+    @property
+    def last_pruning_stats(self):
+        """
+        Bu iş parçacığında çalışan son budamalı (MaxScore) sorgunun sayaçları. SearchEngine
+        search_many(executor='thread') ve sunucunun iş parçacığı havuzundan eşzamanlı kullanıldığı
+        için sayaçlar iş parçacığı başına tutulur.
+        """
+        return getattr(self._local, 'pruning_stats', {})
+
+    def _current_trace(self):
+        """Ölçüm açıksa sürmekte olan sorgunun izi (instrumentation.QueryTrace), değilse None."""
+        instrumentation = self.instrumentation
+        return None if instrumentation is None else instrumentation.current_trace()
+
+    def _cached(self, key, compute, trace=None):
+        """
+        key için önbellekteki sonucu döndürür; yoksa compute() ile hesaplayıp saklar.
+        Sonuç listeleri kopyalanarak döndürülür; çağıranın listeyi değiştirmesi önbelleği bozmaz.
+        """
+        generation = self._index_generation()
+        found, result = self.result_cache.get(key, generation)
+        if trace is not None:
+            trace.lap('cache_lookup')
+            trace.cached = found
+        if not found:
+            result = compute()
+            self.result_cache.put(key, generation, result)
+        return list(result)
+
+    def cache_stats(self):
+        """Sonuç önbelleğinin sayaçları: hits, misses, hit_rate, evictions, invalidations, size."""
+        return self.result_cache.stats()
 
     def _merge_postings_and(self, postings_set1, postings_set2):
         """
@@ -36,12 +236,72 @@ class SearchEngine:
         """
         return postings_set1.union(postings_set2)
 
+    def _intersect_terms(self, terms, index=None, trace=None):
+        """
+        Terimlerin postings listelerinin kesişimini (AND) postings'leri kopyalamadan alır.
+        Terimler DF'ye göre sıralanır; en kısa liste adayları belirler. İndeks sıralı postings
+        imleçleri sunuyorsa (get_postings_cursor) diğer listelerde galloping (üstel) arama ile
+        ilerlenir, aksi halde adaylar diğer terimlerin postings sözlüklerinde aranır. Her iki
+        durumda da maliyet en kısa listenin uzunluğuyla orantılıdır.
+
+        index: Verilirse self.ii yerine kullanılır (ör. search_many'nin paylaşılan terim verisi).
+        trace: Ölçüm açıksa sorgunun izi; 'postings' ve 'intersect' aşamaları buna yazılır.
+
+        Returns:
+            list: Kesişimdeki doküman ID'leri (indeksteki doküman sırasıyla).
+        """
+        ii = self.ii if index is None else index
+        sorted_terms_by_df = sorted(terms, key=ii.get_df)
+        if not sorted_terms_by_df or ii.get_df(sorted_terms_by_df[0]) == 0:
+            return [] # Bir terim bile indekste yoksa AND sonucu boştur.
+
+        if not hasattr(ii, 'get_postings_cursor'):
+            shortest_postings = ii.get_postings_with_tf(sorted_terms_by_df[0])
+            other_postings = [ii.get_postings_with_tf(term) for term in sorted_terms_by_df[1:]]
+            if trace is not None:
+                trace.lap('postings')
+                # Yalnızca en kısa liste dolaşılır; diğer listelerde aday başına bir arama yapılır.
+                trace.count('postings_decoded', len(shortest_postings))
+                trace.count('candidates', len(shortest_postings))
+            result = [doc_id for doc_id in shortest_postings
+                      if all(doc_id in postings for postings in other_postings)]
+            if trace is not None:
+                trace.lap('intersect')
+            return result
+
+        cursors = [ii.get_postings_cursor(term) for term in sorted_terms_by_df]
+        if trace is not None:
+            trace.lap('postings')
+            trace.count('postings_decoded', sum(ii.get_df(term) for term in sorted_terms_by_df))
+            trace.count('candidates', ii.get_df(sorted_terms_by_df[0]))
+        lead, others = cursors[0], cursors[1:]
+        doc_ids = ii.doc_ids
+        result = []
+        candidate = lead.doc()
+        while candidate is not None:
+            for cursor in others:
+                found = cursor.next_geq(candidate)
+                if found is None:
+                    candidate = None
+                    break
+                if found != candidate:
+                    # Aday bu listede yok: en kısa listeyi bulunan dokümana kadar ilerlet.
+                    candidate = lead.next_geq(found)
+                    break
+            else:
+                result.append(doc_ids[candidate])
+                candidate = lead.next_geq(candidate + 1)
+        if trace is not None:
+            trace.lap('intersect')
+        return result
+
+    @traced('boolean')
     def boolean_search(self, query_string, operator='AND'):
         """
         Basit Boolean arama yapar.
         Sorgudaki terimleri işler, postings listelerini alır.
         AND operasyonu için, en düşük doküman frekansına (DF) sahip terimden
-        başlayarak kesişim alır (optimizasyon).
+        başlayarak postings'leri kopyalamadan kesişim alır (bkz. _intersect_terms).
         OR operasyonu için birleşim alır.
 
         Args:
@@ -51,68 +311,254 @@ class SearchEngine:
         Returns:
             list: Eşleşen doküman ID'lerinin listesi.
         """
+        if operator.upper() not in ('AND', 'OR'):
+            raise ValueError("Desteklenmeyen operatör. Lütfen 'AND' veya 'OR' kullanın.")
+
         processed_query_terms = list(set(preprocess_text(query_string))) # Benzersiz ve işlenmiş sorgu terimleri
+        trace = self._current_trace()
+        if trace is not None:
+            trace.mode = operator.lower()
+            trace.lap('preprocess')
+            trace.count('terms', len(processed_query_terms))
         
         if not processed_query_terms:
             print("Sorgu işlenemedi veya boş. Sonuç döndürülmüyor.")
             return []
 
-        # İndekste bulunan ve postings listesi olan terimleri ve postings'lerini al
-        term_postings_map = {} # {term: set_of_doc_ids}
-        valid_terms_for_query = []
+        cache_key = ('boolean', operator.upper(), tuple(sorted(processed_query_terms)))
+        return self._cached(cache_key, lambda: self._boolean_search_terms(processed_query_terms, operator.upper(), trace=trace),
+                            trace)
+
+    def _boolean_search_terms(self, processed_query_terms, operator, index=None, trace=None):
+        ii = self.ii if index is None else index
+        if operator == 'AND':
+            return self._intersect_terms(processed_query_terms, ii, trace)
 
+        # OR: indekste bulunan terimlerin postings'lerinin birleşimi
+        result_doc_ids_set = set()
         for term in processed_query_terms:
-            # InvertedIndex'ten sadece doc_id'leri içeren seti al
-            postings_set_for_term = self.ii.get_postings_list(term) 
+            postings_set_for_term = ii.get_postings_list(term)
             if postings_set_for_term: # Eğer terim indekste varsa ve en az bir dokümanda geçiyorsa
-                term_postings_map[term] = postings_set_for_term
-                valid_terms_for_query.append(term)
-            else:
-                # Eğer AND işlemi yapılıyorsa ve bir terim bile indekste yoksa, sonuç boş kümedir.
-                if operator.upper() == 'AND':
-                    # print(f"'{term}' terimi indekste bulunamadı veya hiçbir dokümanda geçmiyor. AND sorgusu boş sonuç döndürecek.")
-                    return []
-        
-        if not valid_terms_for_query:
-            # print("Sorgudaki geçerli terimlerin hiçbiri indekste bulunamadı.")
-            return []
-        
-        # Terimleri postings listelerinin uzunluğuna (DF'ye eşdeğer) göre sırala (küçükten büyüğe).
-        # Bu, AND operasyonunda en kısıtlayıcı (en az dokümanda geçen) terimle başlamayı sağlar.
-        sorted_terms_by_df_length = sorted(valid_terms_for_query, key=lambda t: len(term_postings_map[t]))
-        
-        # İlk terimin doküman ID seti ile başla
-        result_doc_ids_set = term_postings_map[sorted_terms_by_df_length[0]]
-
-        # Kalan terimlerle merge işlemi yap
-        if operator.upper() == 'AND':
-            for i in range(1, len(sorted_terms_by_df_length)):
-                current_term = sorted_terms_by_df_length[i]
-                result_doc_ids_set = self._merge_postings_and(result_doc_ids_set, term_postings_map[current_term])
-                if not result_doc_ids_set:  # Eğer kesişim herhangi bir noktada boşalırsa, daha fazla devam etmeye gerek yok.
-                    break
-        elif operator.upper() == 'OR':
-            for i in range(1, len(sorted_terms_by_df_length)):
-                current_term = sorted_terms_by_df_length[i]
-                result_doc_ids_set = self._merge_postings_or(result_doc_ids_set, term_postings_map[current_term])
-        else:
-            raise ValueError("Desteklenmeyen operatör. Lütfen 'AND' veya 'OR' kullanın.")
+                result_doc_ids_set = self._merge_postings_or(result_doc_ids_set, postings_set_for_term)
+                if trace is not None:
+                    trace.count('postings_decoded', len(postings_set_for_term))
+        if trace is not None:
+            trace.lap('union')
+            trace.count('candidates', len(result_doc_ids_set))
             
         return list(result_doc_ids_set)
 
-    def tfidf_rank(self, query_string, top_n=10):
+    @traced('query')
+    def boolean_query(self, query_string):
+        """
+        AND / OR / NOT, parantez ve tırnak içindeki ifadeleri destekleyen Boolean sorgu.
+        Örn: '(thriller OR horror) AND NOT comedy'
+        Sorgu query_parser.parse_query ile ağaca çevrilir, plan_query ile DF'ye göre en ucuz
+        işlenenler öne alınacak şekilde planlanır ve akış halinde değerlendirilir.
+
+        Args:
+            query_string (str): Kullanıcının girdiği sorgu.
+
+        Returns:
+            list: Eşleşen doküman ID'lerinin listesi.
+        """
+        query_tree = parse_query(query_string)
+        trace = self._current_trace()
+        if trace is not None:
+            trace.lap('parse')
+        if query_tree is None:
+            return []
+        # Ağacın metin gösterimi, işlenmiş terimleri ve yapıyı içeren normalize bir anahtardır.
+        return self._cached(('query', repr(query_tree)), lambda: self._evaluate_query_tree(query_tree, trace), trace)
+
+    def _evaluate_query_tree(self, query_tree, trace=None):
+        plan = plan_query(query_tree, self.ii)
+        if trace is not None:
+            trace.lap('plan')
+        if plan is None:
+            return []
+        result = list(self._evaluate_query_node(plan))
+        if trace is not None:
+            trace.lap('evaluate')
+        return result
+
+    def _all_doc_ids(self):
+        doc_ids = getattr(self.ii, 'doc_ids', None)
+        return doc_ids if doc_ids is not None else self.ii.doc_lengths.keys()
+
+    def _query_node_membership(self, node):
+        """Bir düğüm için 'doc_id in ...' testini destekleyen nesne: terimlerde postings'in kendisi."""
+        if isinstance(node, TermNode):
+            return self.ii.get_postings_with_tf(node.term)
+        return set(self._evaluate_query_node(node))
+
+    def _evaluate_query_node(self, node):
+        """
+        Planlanmış bir sorgu düğümünü değerlendirir ve eşleşen doc_id'leri üreten bir iterable döndürür.
+        AND, en ucuz pozitif çocuğun sonuçlarını akış halinde diğer çocuklarla süzer; NOT çocukları
+        tümleyen küme oluşturulmadan bu akıştan çıkarılır (streaming difference).
+        """
+        if isinstance(node, TermNode):
+            return iter(self.ii.get_postings_with_tf(node.term))
+
+        if isinstance(node, PhraseNode):
+            return iter(self._phrase_match(node.terms))
+
+        if isinstance(node, NotNode):
+            if node.child is None:
+                return iter(self._all_doc_ids())
+            excluded = self._query_node_membership(node.child)
+            return (doc_id for doc_id in self._all_doc_ids() if doc_id not in excluded)
+
+        if isinstance(node, AndNode):
+            positives = [child for child in node.children if not isinstance(child, NotNode)]
+            exclusions = [self._query_node_membership(child.child)
+                          for child in node.children if isinstance(child, NotNode) and child.child is not None]
+            filters = []
+            if positives and all(isinstance(child, TermNode) for child in positives):
+                stream = iter(self._intersect_terms([child.term for child in positives]))
+            elif positives:
+                stream = self._evaluate_query_node(positives[0])
+                filters = [self._query_node_membership(child) for child in positives[1:]]
+            else:
+                stream = iter(self._all_doc_ids())
+            return (doc_id for doc_id in stream
+                    if all(doc_id in f for f in filters) and not any(doc_id in e for e in exclusions))
+
+        if isinstance(node, OrNode):
+            return iter(dict.fromkeys(chain.from_iterable(self._evaluate_query_node(child) for child in node.children)))
+
+        raise TypeError(f"Bilinmeyen sorgu düğümü: {node!r}")
+
+    def _has_positions(self):
+        return getattr(self.ii, 'has_positions', False)
+
+    def _phrase_match(self, terms):
+        """
+        İşlenmiş terimlerin art arda geçtiği dokümanları döndürür. Önce doküman düzeyinde kesişim
+        alınır; konumlar yalnızca bu aday dokümanlar için, en seyrek terimden başlanarak çözülür
+        ve aday başlangıç konumları boşalınca kalan terimlerin konumları hiç çözülmez.
+        İndeks konum saklamıyorsa ifade, terimlerinin hepsini içeren dokümanlarla eşleşir.
+        """
+        candidates = self._intersect_terms(list(set(terms)))
+        if not self._has_positions() or len(terms) < 2:
+            return candidates
+        term_postings = {term: self.ii.get_postings_with_tf(term) for term in set(terms)}
+        matches = []
+        for doc_id in candidates:
+            # (terim, ifadedeki konumu) çiftlerini dokümandaki tf'ye göre artan sırayla işle.
+            offsets = sorted(enumerate(terms), key=lambda item: term_postings[item[1]][doc_id])
+            start_positions = None
+            for offset, term in offsets:
+                shifted = {position - offset for position in self.ii.get_positions(term, doc_id)}
+                start_positions = shifted if start_positions is None else start_positions & shifted
+                if not start_positions:
+                    break
+            if start_positions:
+                matches.append(doc_id)
+        return matches
+
+    def phrase_search(self, phrase_string):
+        """
+        İfade (phrase) araması: sorgu terimlerinin, ön işleme sonrası token sırasında art arda
+        geçtiği dokümanları döndürür. Örn: 'special effects', 'world war two'.
+        Konumsal indeks (InvertedIndex(store_positions=True)) gerektirir; yoksa AND gibi davranır.
+        """
+        terms = preprocess_text(phrase_string)
+        if not terms:
+            print("İfade sorgusu işlenemedi veya boş.")
+            return []
+        return self._phrase_match(terms)
+
+    def proximity_search(self, query_string, window=5):
+        """
+        Yakınlık araması: sorgudaki tüm terimlerin, en fazla `window` token genişliğinde bir
+        pencere içinde (sırası önemsiz) geçtiği dokümanları döndürür.
+        Konumlar yalnızca doküman düzeyindeki kesişimden geçen adaylar için çözülür.
+        """
+        terms = list(set(preprocess_text(query_string)))
+        if not terms:
+            print("Yakınlık sorgusu işlenemedi veya boş.")
+            return []
+        candidates = self._intersect_terms(terms)
+        if not self._has_positions() or len(terms) < 2:
+            return candidates
+        matches = []
+        for doc_id in candidates:
+            # Tüm terimlerin konumlarını birleştirip her terimi kapsayan en dar pencereyi ara.
+            merged = sorted((position, term_no)
+                            for term_no, term in enumerate(terms)
+                            for position in self.ii.get_positions(term, doc_id))
+            if self._min_covering_span(merged, len(terms)) < window:
+                matches.append(doc_id)
+        return matches
+
+    @staticmethod
+    def _min_covering_span(merged_positions, num_terms):
+        """
+        Sıralı (konum, terim_no) listesinde her terimden en az birini içeren en dar pencerenin
+        genişliğini (son konum - ilk konum) kayan pencere ile bulur.
+        """
+        counts = [0] * num_terms
+        covered = 0
+        left = 0
+        best_span = float('inf')
+        for position, term_no in merged_positions:
+            if counts[term_no] == 0:
+                covered += 1
+            counts[term_no] += 1
+            while covered == num_terms:
+                left_position, left_term_no = merged_positions[left]
+                best_span = min(best_span, position - left_position)
+                counts[left_term_no] -= 1
+                if counts[left_term_no] == 0:
+                    covered -= 1
+                left += 1
+        return best_span
+
+    def _select_top_n(self, doc_scores, top_n, trace=None):
+        """
+        Akümülatördeki pozitif skorlu dokümanlardan en iyi top_n tanesini sınırlı bir yığın (heap)
+        ile seçer: O(n log top_n). Sonuç, skorlara göre azalan sırada (doc_id, score) listesidir;
+        eşit skorlar akümülatöre eklenme sırasını korur.
+        """
+        positive_scores = ((doc_id, score) for doc_id, score in doc_scores.items() if score > 0)
+        top = heapq.nlargest(top_n, positive_scores, key=itemgetter(1))
+        if trace is not None:
+            trace.lap('select_top_n')
+            trace.count('select_candidates', len(doc_scores))
+        return top
+
+    @traced('tfidf')
+    def tfidf_rank(self, query_string, top_n=10, pruning=None, compare_exhaustive=False):
         """
         TF-IDF ağırlıklandırması kullanarak dokümanları sorguya göre sıralar.
-        Sıralama, tfidf.py modülündeki calculate_doc_score_for_query fonksiyonu ile yapılır.
+        Skorlar tfidf.py'deki accumulate_tfidf_scores ile "term-at-a-time" olarak hesaplanır
+        (her terimin postings'i bir kez dolaşılır, IDF terim başına bir kez hesaplanır) ve
+        en iyi top_n sonuç sınırlı bir yığınla seçilir.
+
+        pruning='maxscore' verilirse ilk top_n'e giremeyecek dokümanlar MaxScore ile atlanır
+        (rank-safe; döndürülen skorlar budamasız sonuçla aynıdır). Sayaçlar
+        (bu iş parçacığı için) self.last_pruning_stats içine yazılır; compare_exhaustive=True ise budamasız
+        değerlendirmede skorlanacak doküman sayısı da (docs_exhaustive) hesaplanır.
+
+        Sonuçlar (işlenmiş terimler, top_n, budama) anahtarıyla önbelleğe alınır; önbellekten
+        dönen sorgularda last_pruning_stats güncellenmez. compare_exhaustive=True önbelleği atlar.
 
         Args:
             query_string (str): Kullanıcının girdiği sorgu.
             top_n (int): Döndürülecek en iyi sonuç sayısı.
+            pruning (str|None): None (tam değerlendirme) veya 'maxscore'.
+            compare_exhaustive (bool): Karşılaştırma için tam aday sayısını da hesapla.
 
         Returns:
             list: (doc_id, score) çiftlerinden oluşan sıralı bir liste.
         """
         processed_query_terms = list(set(preprocess_text(query_string)))
+        trace = self._current_trace()
+        if trace is not None:
+            trace.lap('preprocess')
+            trace.count('terms', len(processed_query_terms))
         if not processed_query_terms:
             print("TF-IDF için sorgu işlenemedi veya boş.")
             return []
@@ -121,34 +567,288 @@ class SearchEngine:
         if N == 0:
             print("TF-IDF için indekste hiç doküman bulunmuyor.")
             return []
-            
-        doc_scores = defaultdict(float)
 
-       
-        candidate_docs = set()
-        for term in processed_query_terms:
-            candidate_docs.update(self.ii.get_postings_list(term))
+        if pruning not in (None, 'maxscore'):
+            raise ValueError("Desteklenmeyen budama yöntemi. Lütfen None veya 'maxscore' kullanın.")
+        if compare_exhaustive:
+            return self._tfidf_rank_terms(processed_query_terms, N, top_n, pruning, compare_exhaustive, trace=trace)
+        cache_key = ('tfidf', pruning, top_n, tuple(sorted(processed_query_terms)))
+        return self._cached(cache_key, lambda: self._tfidf_rank_terms(processed_query_terms, N, top_n, pruning, trace=trace),
+                            trace)
+
+    def _tfidf_rank_terms(self, processed_query_terms, N, top_n, pruning, compare_exhaustive=False, index=None,
+                          trace=None):
+        ii = self.ii if index is None else index
+        if top_n <= 0:
+            return []
+        if pruning is None:
+            doc_scores = accumulate_tfidf_scores(processed_query_terms, ii, N)
+            if trace is not None:
+                trace.lap('score')
+                trace.count('postings_decoded', sum(ii.get_df(term) for term in processed_query_terms))
+                trace.count('candidates', len(doc_scores))
+        else:
+            doc_scores = self._maxscore_scores(processed_query_terms, N, top_n, compare_exhaustive, ii, trace)
+        if not doc_scores:
+            return []
 
-        if not candidate_docs:
-    
+        return self._select_top_n(doc_scores, top_n, trace)
+
+    @traced('bm25')
+    def bm25_rank(self, query_string, top_n=10, k1=DEFAULT_K1, b=DEFAULT_B, delta=0.0):
+        """
+        Okapi BM25 ile sıralama; delta > 0 verilirse BM25+ (terimi içeren her dokümana idf * delta
+        alt sınırı eklenir, uzun dokümanların aşırı cezalandırılması önlenir).
+        Skorlar tfidf_rank ile aynı "term-at-a-time" akümülatör ve sınırlı yığınla seçilir.
+        Doküman uzunluk normalizasyonları (k1, b) çifti başına bir kez yoğun bir tabloya hesaplanır
+        ve indeks değişene kadar yeniden kullanılır.
+
+        Args:
+            query_string (str): Kullanıcının girdiği sorgu.
+            top_n (int): Döndürülecek en iyi sonuç sayısı.
+            k1 (float): tf doygunluk parametresi (>= 0).
+            b (float): Uzunluk normalizasyonu oranı (0..1).
+            delta (float): BM25+ alt sınırı (0: klasik BM25).
+
+        Returns:
+            list: (doc_id, score) çiftlerinden oluşan sıralı bir liste.
+        """
+        validate_bm25_params(k1, b, delta)
+        processed_query_terms = list(set(preprocess_text(query_string)))
+        trace = self._current_trace()
+        if trace is not None:
+            trace.lap('preprocess')
+            trace.count('terms', len(processed_query_terms))
+        if not processed_query_terms:
+            print("BM25 için sorgu işlenemedi veya boş.")
+            return []
+        if self.ii.total_docs == 0:
+            print("BM25 için indekste hiç doküman bulunmuyor.")
             return []
+        cache_key = ('bm25', k1, b, delta, top_n, tuple(sorted(processed_query_terms)))
+        return self._cached(cache_key, lambda: self._bm25_rank_terms(processed_query_terms, top_n, k1, b, delta, trace=trace),
+                            trace)
+
+    def _get_bm25_norms(self, k1, b):
+        """(k1, b) için doküman normalizasyon tablosu; son birkaç parametre çifti saklanır."""
+        key = (self._index_generation(), k1, b)
+        norms = self._bm25_norms.get(key)
+        if norms is None:
+            norms = compute_bm25_norms(self.ii, k1, b)
+            self._bm25_norms[key] = norms
+            while len(self._bm25_norms) > 4:
+                self._bm25_norms.popitem(last=False)
+        return norms
+
+    def _bm25_rank_terms(self, processed_query_terms, top_n, k1=DEFAULT_K1, b=DEFAULT_B, delta=0.0, index=None,
+                         trace=None):
+        ii = self.ii if index is None else index
+        norms = self._get_bm25_norms(k1, b)
+        if trace is not None:
+            trace.lap('norms')
+        doc_scores = accumulate_bm25_scores(processed_query_terms, ii, self.ii.total_docs, k1, b, delta, norms=norms)
+        if trace is not None:
+            trace.lap('score')
+            trace.count('postings_decoded', sum(ii.get_df(term) for term in processed_query_terms))
+            trace.count('candidates', len(doc_scores))
+        if not doc_scores:
+            return []
+        return self._select_top_n(doc_scores, top_n, trace)
 
-        for doc_id in candidate_docs:
-        
-            score = calculate_doc_score_for_query(
-                processed_query_terms, 
-                doc_id,                
-                self.ii,               
-                N                      
-            )
-            if score > 0: 
-                doc_scores[doc_id] = score
-        
-        
-        sorted_docs_with_scores = sorted(doc_scores.items(), key=lambda item: item[1], reverse=True)
-        
-        return sorted_docs_with_scores[:top_n]
+    def tfidf_rank_batch(self, query_strings, top_n=10, batch_size=256):
+        """
+        Çok sayıda sorguyu TF-IDF ile toplu sıralar (değerlendirme/yeniden sıralama işleri için).
+        İndeks ilk çağrıda vector_scoring.TfidfMatrix'e derlenir ve indeks değişene kadar yeniden
+        kullanılır; sorgular batch_size'lık gruplar halinde tek matris çarpımıyla skorlanır.
+
+        Ölçüm açıksa çağrının tamamı tek bir 'tfidf_batch' iziyle ölçülür (aşamalar: compile,
+        score; 'results' sayacı sorgu sayısıdır).
+
+        Returns:
+            list: Her sorgu için tfidf_rank ile aynı biçimde (doc_id, score) listesi.
+        """
+        from vector_scoring import TfidfMatrix
+
+        def rank(trace):
+            generation = self._index_generation()
+            if self._tfidf_matrix is None or self._tfidf_matrix[0] != generation:
+                self._tfidf_matrix = (generation, TfidfMatrix.from_index(self.ii))
+            if trace is not None:
+                trace.lap('compile')
+            results = self._tfidf_matrix[1].rank_queries(query_strings, top_n, batch_size)
+            if trace is not None:
+                trace.lap('score')
+            return results
+
+        return self._run_traced('tfidf_batch', f"{len(query_strings)} sorgu", None, rank)
+
+    def search_many(self, query_strings, modes=SEARCH_MODES, top_n=10, pruning=None,
+                    executor=None, num_workers=None, chunk_size=64):
+        """
+        Birden çok sorguyu, istenen tüm modlarda (boolean 'and' / 'or', 'tfidf') tek seferde
+        değerlendirir. Her sorgu bir kez ön işlenir; toplu sorgudaki terimlerin postings'leri ve
+        df'leri indeksten yalnızca bir kez alınır ve tüm sorgu/mod değerlendirmeleri bu paylaşılan
+        veriyi kullanır. Sonuçlar tek tek boolean_search / tfidf_rank çağrılarıyla aynıdır ve
+        aynı sonuç önbelleğini kullanır.
 
+        Ölçüm açıksa her sorgu/mod değerlendirmesi için tekil metotlardaki gibi (aynı mod adıyla) bir
+        iz tutulur; ön işleme tüm modlar için bir kez yapıldığından
+        izlerde 'preprocess' aşaması yoktur. executor='process' ile izler işçilerden sonuçlarla
+        birlikte döner ve ana süreçte kaydedilir.
+
+        Args:
+            query_strings (list): Sorgu metinleri.
+            modes (tuple): 'and', 'or', 'tfidf' ve/veya 'bm25'.
+            top_n (int): 'tfidf' ve 'bm25' modlarında döndürülecek sonuç sayısı.
+            pruning (str|None): 'tfidf' modu için budama (bkz. tfidf_rank).
+            executor (str|None): None (seri), 'thread' veya 'process'. 'process' yalnızca fork
+                destekleyen sistemlerde kullanılabilir (indeks işçilere kopyalanmadan devredilir);
+                desteklenmiyorsa iş parçacığı havuzu kullanılır.
+            num_workers (int|None): Havuz boyutu (None: os.cpu_count()).
+            chunk_size (int): Havuzda bir işe verilen sorgu sayısı.
+
+        Returns:
+            list: Her sorgu için {mod: sonuç} sözlüğü; boolean modlarda doc_id listesi,
+            'tfidf' ve 'bm25' modlarında (doc_id, score) listesi (BM25 varsayılan k1 ve b ile).
+        """
+        modes = tuple(mode.lower() for mode in modes)
+        unknown_modes = set(modes) - set(SEARCH_MODES)
+        if unknown_modes:
+            raise ValueError(f"Desteklenmeyen arama modu: {sorted(unknown_modes)}. Kullanılabilir: {SEARCH_MODES}")
+        if executor not in (None, 'thread', 'process'):
+            raise ValueError("Desteklenmeyen executor. Lütfen None, 'thread' veya 'process' kullanın.")
+        if pruning not in (None, 'maxscore'):
+            raise ValueError("Desteklenmeyen budama yöntemi. Lütfen None veya 'maxscore' kullanın.")
+
+        term_lists = [tuple(set(preprocess_text(query))) for query in query_strings]
+        if 'bm25' in modes and self.ii.total_docs > 0:
+            self._get_bm25_norms(DEFAULT_K1, DEFAULT_B) # İşçiler (ve fork edilen süreçler) hazır tabloyu paylaşır
+        if executor is None:
+            return self._evaluate_term_lists(term_lists, modes, top_n, pruning, query_strings)
+
+        if executor == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+            print("UYARI: Bu sistemde fork desteklenmiyor; süreç havuzu yerine iş parçacığı havuzu kullanılıyor.")
+            executor = 'thread'
+        chunks = list(iter_batches(zip(term_lists, query_strings), chunk_size))
+        if executor == 'thread':
+            pool = ThreadPoolExecutor(max_workers=num_workers)
+            futures = [pool.submit(self._evaluate_term_lists, [terms for terms, _ in chunk], modes, top_n, pruning,
+                                   [query for _, query in chunk]) for chunk in chunks]
+            with pool:
+                return [result for future in futures for result in future.result()]
+        pool = ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('fork'),
+                                   initializer=_init_search_worker, initargs=(self,))
+        futures = [pool.submit(_search_worker, [terms for terms, _ in chunk], modes, top_n, pruning,
+                               [query for _, query in chunk]) for chunk in chunks]
+        results = []
+        with pool:
+            for future in futures:
+                chunk_results, traces = future.result()
+                results.extend(chunk_results)
+                for trace in traces or ():
+                    self.instrumentation.record(trace)
+        return results
+
+    def _evaluate_term_lists(self, term_lists, modes, top_n, pruning, queries=None, completed_traces=None):
+        """
+        search_many'nin işçisi: işlenmiş terim listelerini paylaşılan terim verisiyle değerlendirir.
+        queries: İzlerde gösterilecek sorgu metinleri (None: terimler).
+        completed_traces: Verilirse izler kaydedilmek yerine bu listeye eklenir (süreç havuzu işçisi).
+        """
+        shared = _SharedTermData(self.ii)
+        N = self.ii.total_docs
+        results = []
+        for query_no, terms in enumerate(term_lists):
+            query = queries[query_no] if queries is not None else ' '.join(terms)
+            query_results = {}
+            key_terms = tuple(sorted(terms))
+            for mode in modes:
+                if not terms or (mode in ('tfidf', 'bm25') and N == 0):
+                    query_results[mode] = self._run_traced(mode, query, terms, lambda trace: [], completed_traces)
+                elif mode == 'bm25':
+                    query_results[mode] = self._run_traced(mode, query, terms, lambda trace: self._cached(
+                        ('bm25', DEFAULT_K1, DEFAULT_B, 0.0, top_n, key_terms),
+                        lambda: self._bm25_rank_terms(list(terms), top_n, index=shared, trace=trace), trace),
+                        completed_traces)
+                elif mode == 'tfidf':
+                    query_results[mode] = self._run_traced(mode, query, terms, lambda trace: self._cached(
+                        ('tfidf', pruning, top_n, key_terms),
+                        lambda: self._tfidf_rank_terms(list(terms), N, top_n, pruning, index=shared, trace=trace), trace),
+                        completed_traces)
+                else:
+                    operator = mode.upper()
+                    query_results[mode] = self._run_traced(mode, query, terms, lambda trace: self._cached(
+                        ('boolean', operator, key_terms),
+                        lambda: self._boolean_search_terms(list(terms), operator, shared, trace), trace),
+                        completed_traces)
+            results.append(query_results)
+        return results
+
+    def _run_traced(self, mode, query, terms, compute, completed_traces=None):
+        """
+        Toplu yollardaki bir sorgu/mod değerlendirmesini (compute(trace)) traced dekoratörü gibi ölçer;
+        izin modu tekil metotlarla aynıdır ('and', 'or', 'tfidf', 'bm25').
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return compute(None)
+        trace = instrumentation.start(mode, query)
+        if terms is not None:
+            trace.count('terms', len(terms))
+        try:
+            result = compute(trace)
+        except Exception as e:
+            instrumentation.complete(trace, error=e)
+            self._keep_trace(trace, completed_traces)
+            raise
+        trace.count('results', len(result))
+        self._keep_trace(instrumentation.complete(trace), completed_traces)
+        return result
+
+    def _keep_trace(self, trace, completed_traces):
+        if completed_traces is None:
+            self.instrumentation.record(trace)
+        else:
+            completed_traces.append(trace)
+
+    def _maxscore_scores(self, processed_query_terms, N, top_n, compare_exhaustive=False, index=None, trace=None):
+        """MaxScore ile aday skorlarını hesaplar ve budama sayaçlarını last_pruning_stats'a yazar."""
+        ii = self.ii if index is None else index
+        stats = {}
+        candidate_scores = accumulate_tfidf_scores_maxscore(processed_query_terms, ii, N, top_n, stats)
+        if trace is not None:
+            trace.lap('score')
+            trace.count('postings_decoded', stats.get('postings_scored', 0) + stats.get('postings_probed', 0))
+            trace.count('candidates', stats.get('docs_scored', len(candidate_scores)))
+        # İlk top_n'e girecek adayların skorları, tam değerlendirmeyle bit düzeyinde aynı olması için
+        # terimler sorgu sırasıyla toplanarak yeniden hesaplanır. Toplama sırasından doğan yuvarlama
+        # farkları sınırda sıralamayı değiştirmesin diye eşiğe çok yakın adaylar da dahil edilir.
+        approximate_top = self._select_top_n(candidate_scores, top_n)
+        if approximate_top:
+            cutoff = approximate_top[-1][1] * (1 - 1e-9)
+            candidate_scores = [doc_id for doc_id, score in candidate_scores.items() if score >= cutoff]
+        term_weights = []
+        for term in processed_query_terms:
+            idf_val = calculate_idf(N, ii.get_df(term))
+            if idf_val > 0.0:
+                term_weights.append((ii.get_postings_with_tf(term), idf_val))
+        doc_scores = {}
+        for doc_id in candidate_scores:
+            score = 0.0
+            for postings_for_term, idf_val in term_weights:
+                term_freq_in_doc = postings_for_term.get(doc_id, 0)
+                if term_freq_in_doc > 0:
+                    score += calculate_tf_log_normalized(term_freq_in_doc) * idf_val
+            doc_scores[doc_id] = score
+        if compare_exhaustive:
+            exhaustive_candidates = set()
+            for term in processed_query_terms:
+                exhaustive_candidates.update(ii.get_postings_with_tf(term).keys())
+            stats['docs_exhaustive'] = len(exhaustive_candidates)
+        self._local.pruning_stats = stats
+        if trace is not None:
+            trace.lap('rescore')
+        return doc_scores
 
 if __name__ == '__main__':
   
@@ -237,4 +937,8 @@ if __name__ == '__main__':
     print(f"Sorgu (TF-IDF) 'kaybi':")
     if ranked_results_kaybi:
         for doc_id, score in ranked_results_kaybi:
-            print(f"  Doc ID: {doc_id}, Skor: {score:.4f} (Beklenen doc6)")
\ No newline at end of file
+            print(f"  Doc ID: {doc_id}, Skor: {score:.4f} (Beklenen doc6)")
+    print("\n--- Sonuç Önbelleği ---")
+    search_engine_instance.tfidf_rank(query_tfidf1, top_n=3)
+    search_engine_instance.tfidf_rank("aksiyon iyi filmi", top_n=3) # Aynı terimler, farklı sıra -> isabet
+    print(f"Önbellek sayaçları: {search_engine_instance.cache_stats()}")
@@ -0,0 +1,516 @@
+# server.py
+#
+# Önceden kurulmuş bir indeksi bir kez yükleyip HTTP/JSON üzerinden sorgu sunan uzun ömürlü yerel servis.
+#   python server.py --index imdb_index.bin --port 8080       -> cli.py build ile yazılmış indeks (mmap)
+#   python server.py --data data --port 8080                  -> IMDb dizininden bellek içi InvertedIndex
+#
+# Uç noktalar (gövde JSON):
+#   POST /search/boolean  {"query": "...", "operator": "AND"|"OR", "limit": 100}
+#   POST /search/query    {"query": "(a OR b) AND NOT c", "limit": 100}
+#   POST /search/tfidf    {"query": "...", "top_n": 10, "pruning": null|"maxscore"}
+#   POST /search/bm25     {"query": "...", "top_n": 10, "k1": 1.2, "b": 0.75, "delta": 0.0}
+#   POST /search/batch    {"queries": [...], "modes": ["and", "or", "tfidf", "bm25"], "top_n": 10, "limit": 100}
+#   GET  /health, GET /stats
+# --doc-store ile bir doküman deposu (doc_store.py) verilirse boolean/query/tfidf/bm25 istekleri
+# "preview": <karakter sayısı> alabilir; yanıtta döndürülen dokümanların metin önizlemeleri
+# "previews": {doc_id: metin} olarak yer alır. Metinler diskteki sıkıştırılmış depodan okunur.
+# "snippets": true ile sorguya yönelik özetler (snippets.py) "snippets": {doc_id: {"text": ...,
+# "highlights": [[başlangıç, bitiş], ...]}} olarak döner; varsa depo yanındaki özet indeksi kullanılır.
+#
+# Olay döngüsü yalnızca bağlantıları ve HTTP ayrıştırmayı yürütür; skorlama (ve yanıtın JSON'a
+# çevrilmesi) bir işçi havuzunda yapılır. Süreç havuzu fork ile kurulur, böylece işçiler indeksi
+# kopyalamadan devralır (search.SearchEngine.search_many ile aynı yöntem).
+# HTTP/1.1 keep-alive ve pipelining desteklenir: bir bağlantıdaki istekler eşzamanlı işlenir, yanıtlar
+# geliş sırasıyla yazılır. Geri basınç (backpressure):
+#   - Bağlantı başına en fazla pipeline_depth yanıt bekleyebilir; dolunca soketten okuma durur.
+#   - Havuzda aynı anda en fazla max_inflight iş çalışır; sırada bekleyen iş sayısı max_queue'ya
+#     ulaşınca yeni istekler 503 (Retry-After) ile reddedilir.
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from search import SEARCH_MODES
+from utils import preprocess_text
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_RESULT_LIMIT = 100
+
+_worker_engine = None # Havuz işçilerinin kullandığı arama motoru (fork ile devralınır)
+_worker_doc_store = None # İşçinin kendi açtığı doküman deposu (önizlemeler için; isteğe bağlı)
+_worker_snippet_builder = None # Depo üzerinde sorguya yönelik özet üretici
+
+
+class RequestError(Exception):
+    """İstemci hatası; HTTP durum koduyla yanıtlanır."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _init_worker(search_engine, doc_store_path=None):
+    global _worker_engine, _worker_doc_store, _worker_snippet_builder
+    _worker_engine = search_engine
+    _worker_doc_store = _worker_snippet_builder = None
+    if doc_store_path:
+        # Her işçi depoyu kendisi açar: blok önbelleği ve kilidi süreçler arasında paylaşılmaz.
+        from snippets import load_snippet_builder
+        _worker_snippet_builder = load_snippet_builder(doc_store_path)
+        _worker_doc_store = _worker_snippet_builder.documents
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def _error_body(message):
+    return _encode({'error': message})
+
+
+def _require_query(params):
+    query = params.get('query')
+    if not isinstance(query, str) or not query.strip():
+        raise RequestError(HTTPStatus.BAD_REQUEST, "'query' boş olmayan bir metin olmalıdır.")
+    return query
+
+
+def _int_param(params, name, default, minimum=0):
+    value = params.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' en az {minimum} olan bir tam sayı olmalıdır.")
+    return value
+
+
+def _ranked(results):
+    return [{'doc_id': doc_id, 'score': score} for doc_id, score in results]
+
+
+def _with_previews(payload, doc_ids, params):
+    """
+    params 'preview' içeriyorsa döndürülen dokümanların metin önizlemelerini, 'snippets' true ise
+    sorguya yönelik özetlerini yanıta ekler.
+    """
+    length = _int_param(params, 'preview', 0)
+    with_snippets = params.get('snippets', False)
+    if not isinstance(with_snippets, bool):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "'snippets' true veya false olmalıdır.")
+    if (length or with_snippets) and _worker_doc_store is None:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Önizleme ve özetler için servis --doc-store ile başlatılmalıdır.")
+    if length:
+        payload['previews'] = {doc_id: _worker_doc_store.get(doc_id, '')[:length] for doc_id in doc_ids}
+    if with_snippets:
+        payload['snippets'] = {
+            doc_id: {'text': text, 'highlights': highlights}
+            for doc_id, (text, highlights) in _worker_snippet_builder.snippets(doc_ids, params['query']).items()
+        }
+    return payload
+
+
+def _boolean_endpoint(search_engine, params):
+    limit = _int_param(params, 'limit', DEFAULT_RESULT_LIMIT)
+    results = search_engine.boolean_search(_require_query(params), operator=str(params.get('operator', 'AND')))
+    return _with_previews({'count': len(results), 'results': results[:limit]}, results[:limit], params)
+
+
+def _query_endpoint(search_engine, params):
+    limit = _int_param(params, 'limit', DEFAULT_RESULT_LIMIT)
+    results = search_engine.boolean_query(_require_query(params))
+    return _with_previews({'count': len(results), 'results': results[:limit]}, results[:limit], params)
+
+
+def _tfidf_endpoint(search_engine, params):
+    top_n = _int_param(params, 'top_n', 10, minimum=1)
+    results = search_engine.tfidf_rank(_require_query(params), top_n=top_n, pruning=params.get('pruning'))
+    return _with_previews({'results': _ranked(results)}, [doc_id for doc_id, _ in results], params)
+
+
+def _bm25_endpoint(search_engine, params):
+    top_n = _int_param(params, 'top_n', 10, minimum=1)
+    options = {name: params[name] for name in ('k1', 'b', 'delta') if name in params}
+    for name, value in options.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' bir sayı olmalıdır.")
+    results = search_engine.bm25_rank(_require_query(params), top_n=top_n, **options)
+    return _with_previews({'results': _ranked(results)}, [doc_id for doc_id, _ in results], params)
+
+
+def _batch_endpoint(search_engine, params):
+    queries = params.get('queries')
+    if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "'queries' metinlerden oluşan bir liste olmalıdır.")
+    modes = params.get('modes', ['tfidf'])
+    if not isinstance(modes, list) or not all(isinstance(mode, str) for mode in modes):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'modes' şunlardan oluşan bir liste olmalıdır: {list(SEARCH_MODES)}")
+    top_n = _int_param(params, 'top_n', 10, minimum=1)
+    limit = _int_param(params, 'limit', DEFAULT_RESULT_LIMIT)
+    results = []
+    for query_results in search_engine.search_many(queries, modes=modes, top_n=top_n):
+        formatted = {}
+        for mode, mode_results in query_results.items():
+            if mode in ('tfidf', 'bm25'):
+                formatted[mode] = _ranked(mode_results)
+            else:
+                formatted[mode] = {'count': len(mode_results), 'results': mode_results[:limit]}
+        results.append(formatted)
+    return {'results': results}
+
+
+_ENDPOINTS = {
+    '/search/boolean': _boolean_endpoint,
+    '/search/query': _query_endpoint,
+    '/search/tfidf': _tfidf_endpoint,
+    '/search/bm25': _bm25_endpoint,
+    '/search/batch': _batch_endpoint,
+}
+
+
+def _execute(path, params):
+    """
+    Havuz işçisinde bir isteği çalıştırır ve (durum kodu, JSON gövdesi) döndürür. Yanıt burada
+    kodlanır; olay döngüsü büyük sonuç listelerini JSON'a çevirmekle meşgul olmaz.
+    """
+    start_time = time.perf_counter()
+    try:
+        payload = _ENDPOINTS[path](_worker_engine, params)
+    except RequestError as e:
+        return int(e.status), _error_body(str(e))
+    except ValueError as e: # Geçersiz operatör/budama/mod, QuerySyntaxError, BM25 parametreleri
+        return int(HTTPStatus.BAD_REQUEST), _error_body(str(e))
+    payload['took_ms'] = (time.perf_counter() - start_time) * 1000
+    return int(HTTPStatus.OK), _encode(payload)
+
+
+def _format_response(status, body, keep_alive, extra_headers=()):
+    status = HTTPStatus(status)
+    headers = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *extra_headers,
+    ]
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+
+class SearchServer:
+    """
+    SearchEngine'i asyncio üzerinde HTTP/JSON ile sunar.
+
+    search_engine: Sunulacak search.SearchEngine (indeks bir kez yüklenmiş olmalıdır).
+    executor: 'process' (fork ile süreç havuzu; GIL'e takılmadan çok çekirdek kullanır) veya
+        'thread'. fork desteklenmiyorsa iş parçacığı havuzu kullanılır. Süreç havuzunda her işçi
+        indeksin kurulduğu andaki halini görür ve kendi sonuç önbelleğini tutar.
+    num_workers: Havuz boyutu (None: os.cpu_count()).
+    max_inflight: Havuzda aynı anda çalışan en fazla iş (None: 2 x num_workers).
+    max_queue: Çalışmak için sırada bekleyebilecek en fazla iş; aşılırsa 503 döner.
+    pipeline_depth: Bir bağlantıda yanıtı bekleyen en fazla istek.
+    request_timeout: Bir işin saniye cinsinden süre sınırı; aşılırsa 504 döner.
+    idle_timeout: Boşta bekleyen keep-alive bağlantılarının kapatılma süresi (sn).
+    doc_store_path: Önizlemeler için doküman deposu dosyası (doc_store.save_document_store); her
+        işçi dosyayı mmap ile kendisi açar.
+    """
+
+    def __init__(self, search_engine, host='127.0.0.1', port=8080, executor='process', num_workers=None,
+                 max_inflight=None, max_queue=4096, pipeline_depth=16, request_timeout=30.0, idle_timeout=60.0,
+                 doc_store_path=None):
+        if executor not in ('process', 'thread'):
+            raise ValueError("Desteklenmeyen executor. Lütfen 'process' veya 'thread' kullanın.")
+        if executor == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+            print("UYARI: Bu sistemde fork desteklenmiyor; süreç havuzu yerine iş parçacığı havuzu kullanılıyor.")
+            executor = 'thread'
+        self.search_engine = search_engine
+        self.host = host
+        self.port = port
+        self.executor = executor
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or 2 * self.num_workers
+        self.max_queue = max_queue
+        self.pipeline_depth = pipeline_depth
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.doc_store_path = doc_store_path
+        self._pool = None
+        self._server = None
+        self._slots = None
+        self._started_at = None
+        self._connection_tasks = set()
+        self._queued = 0
+        self._inflight = 0
+        self.connections = 0
+        self.requests = 0
+        self.rejected = 0
+        self.status_counts = {}
+
+    async def start(self):
+        # NLTK kaynakları (stopwords, stemmer, tokenizer) havuzdan önce yüklenir; işçiler bunları
+        # devralır ve ilk sorgu yükleme süresini ödemez.
+        preprocess_text("warm up")
+        if self.executor == 'process':
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=multiprocessing.get_context('fork'),
+                                             initializer=_init_worker, initargs=(self.search_engine, self.doc_store_path))
+            # İşçiler dinlemeye başlamadan önce fork edilir; sonradan fork edilen bir işçi açık istemci
+            # soketlerini devralır ve kapatılan bağlantıların karşı tarafa kapanmamasına yol açar.
+            await asyncio.get_running_loop().run_in_executor(self._pool, _worker_ready)
+        else:
+            _init_worker(self.search_engine, self.doc_store_path)
+            self._pool = ThreadPoolExecutor(max_workers=self.num_workers)
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1] # port=0 ise işletim sisteminin verdiği port
+        self._started_at = time.monotonic()
+        print(f"Arama servisi http://{self.host}:{self.port} adresinde dinliyor "
+              f"({self.executor} havuzu, {self.num_workers} işçi, en fazla {self.max_inflight} eşzamanlı iş).")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._connection_tasks): # Açık keep-alive bağlantıları kapatılır.
+                task.cancel()
+            await asyncio.gather(*self._connection_tasks, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            'uptime_seconds': time.monotonic() - self._started_at if self._started_at else 0.0,
+            'executor': self.executor,
+            'workers': self.num_workers,
+            'connections': self.connections,
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'inflight': self._inflight,
+            'queued': self._queued,
+            'status_counts': {str(status): count for status, count in sorted(self.status_counts.items())},
+        }
+
+    async def _read_request(self, reader):
+        """
+        Bir HTTP isteği okur. Returns: (method, path, body, keep_alive) veya bağlantı kapandıysa None.
+        """
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.idle_timeout)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Eksik HTTP başlığı.")
+            return None
+        except asyncio.LimitOverrunError:
+            raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "HTTP başlığı çok büyük.")
+        except asyncio.TimeoutError:
+            return None
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Geçersiz istek satırı.")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        if 'transfer-encoding' in headers:
+            raise RequestError(HTTPStatus.NOT_IMPLEMENTED, "Transfer-Encoding desteklenmiyor; Content-Length kullanın.")
+        try:
+            content_length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Geçersiz Content-Length.")
+        if content_length < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Geçersiz Content-Length.")
+        if content_length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "İstek gövdesi çok büyük.")
+        body = await reader.readexactly(content_length) if content_length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method.upper(), target.split('?', 1)[0], body, keep_alive
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._connection_tasks.add(task)
+        responses = asyncio.Queue(maxsize=self.pipeline_depth)
+        writer_task = asyncio.create_task(self._write_responses(responses, writer))
+        cancelled = False
+        try:
+            while not writer_task.done():
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    await responses.put((self._completed(int(e.status), _error_body(str(e))), False))
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                self.requests += 1
+                # Kuyruk doluysa burada beklenir ve soketten okuma durur (bağlantı başına geri basınç).
+                await responses.put((asyncio.ensure_future(self._dispatch(method, path, body)), keep_alive))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError: # Sunucu kapatılıyor
+            cancelled = True
+        try:
+            if cancelled:
+                writer_task.cancel()
+            else:
+                await responses.put(None)
+                await writer_task
+        except asyncio.CancelledError: # Sunucu, kalan yanıtlar yazılırken kapatılıyor
+            writer_task.cancel()
+            cancelled = True
+        self.connections -= 1
+        self._connection_tasks.discard(task)
+        writer.close()
+        if not cancelled:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    def _completed(self, status, body, extra_headers=()):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result((status, body, extra_headers))
+        return future
+
+    async def _write_responses(self, responses, writer):
+        """Yanıtları isteklerin geliş sırasıyla yazar (HTTP pipelining)."""
+        connection_open = True
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            future, keep_alive = item
+            status, body, extra_headers = await future
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if not connection_open:
+                continue # İstemci gitti; kalan yanıtlar yalnızca tüketilir.
+            try:
+                writer.write(_format_response(status, body, keep_alive, extra_headers))
+                await writer.drain()
+            except ConnectionError:
+                connection_open = False
+            if not keep_alive:
+                connection_open = False
+
+    async def _dispatch(self, method, path, body):
+        """Bir isteği çalıştırır. Returns: (durum kodu, gövde, ek başlıklar)."""
+        if path == '/health':
+            return int(HTTPStatus.OK), _encode({'status': 'ok', 'total_docs': self.search_engine.ii.total_docs}), ()
+        if path == '/stats':
+            return int(HTTPStatus.OK), _encode(self.stats()), ()
+        if path not in _ENDPOINTS:
+            return int(HTTPStatus.NOT_FOUND), _error_body(f"Bilinmeyen uç nokta: {path}"), ()
+        if method != 'POST':
+            return int(HTTPStatus.METHOD_NOT_ALLOWED), _error_body("Arama uç noktaları POST ile çağrılmalıdır."), ('Allow: POST',)
+        try:
+            params = json.loads(body or b'{}')
+        except ValueError:
+            return int(HTTPStatus.BAD_REQUEST), _error_body("Gövde geçerli bir JSON değil."), ()
+        if not isinstance(params, dict):
+            return int(HTTPStatus.BAD_REQUEST), _error_body("Gövde bir JSON nesnesi olmalıdır."), ()
+
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            return int(HTTPStatus.SERVICE_UNAVAILABLE), _error_body("Sunucu meşgul, daha sonra tekrar deneyin."), ('Retry-After: 1',)
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._inflight += 1
+        try:
+            job = self._pool.submit(_execute, path, params)
+        except Exception as e: # Havuz kapatılmış veya bozulmuş (ör. süreç çöktü)
+            self._release_slot()
+            return int(HTTPStatus.INTERNAL_SERVER_ERROR), _error_body(f"{type(e).__name__}: {e}"), ()
+        # Yuva, yanıt beklenirken değil havuzdaki iş gerçekten bittiğinde bırakılır: zaman aşımına uğrayan
+        # bir iş çalışmayı sürdürdüğü sürece max_inflight sınırına sayılır.
+        job.add_done_callback(functools.partial(self._job_done, asyncio.get_running_loop()))
+        try:
+            # Zaman aşımında wait_for işi iptal eder; henüz başlamamış bir iş havuzdan çıkarılır.
+            status, response_body = await asyncio.wait_for(asyncio.wrap_future(job), self.request_timeout)
+        except asyncio.TimeoutError:
+            return int(HTTPStatus.GATEWAY_TIMEOUT), _error_body("İstek süre sınırını aştı."), ()
+        except Exception as e: # İşçide beklenmeyen hata (ör. süreç çöktü)
+            return int(HTTPStatus.INTERNAL_SERVER_ERROR), _error_body(f"{type(e).__name__}: {e}"), ()
+        return status, response_body, ()
+
+    def _job_done(self, loop, job):
+        # Havuz işi bittiğinde (veya başlamadan iptal edildiğinde) havuzun iş parçacığından çağrılır.
+        try:
+            loop.call_soon_threadsafe(self._release_slot)
+        except RuntimeError: # Olay döngüsü kapanmış; bırakılacak yuva kalmadı.
+            pass
+
+    def _release_slot(self):
+        self._inflight -= 1
+        self._slots.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arama motorunu HTTP/JSON servisi olarak çalıştırır.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--index', help="cli.py build ile yazılmış indeks dosyası (mmap ile açılır).")
+    source.add_argument('--data', help="Bellek içi indeks kurulacak IMDb veri dizini.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--executor', choices=('process', 'thread'), default='process')
+    parser.add_argument('--workers', type=int, default=None, help="İşçi sayısı (varsayılan: çekirdek sayısı).")
+    parser.add_argument('--max-inflight', type=int, default=None)
+    parser.add_argument('--max-queue', type=int, default=4096)
+    parser.add_argument('--pipeline-depth', type=int, default=16)
+    parser.add_argument('--cache-size', type=int, default=1024, help="İşçi başına sonuç önbelleği boyutu.")
+    parser.add_argument('--doc-store', default=None,
+                        help="Önizlemeler için doküman deposu dosyası (--data ile verilirse ve yoksa bu yola yazılır).")
+    args = parser.parse_args(argv)
+
+    from search import SearchEngine
+    if args.index:
+        from index_store import load_index
+        search_engine = SearchEngine(load_index(args.index), cache_size=args.cache_size)
+    else:
+        from main import initialize_search_engine
+        search_engine, raw_documents, _ = initialize_search_engine(args.data, doc_store_path=args.doc_store,
+                                                                   cache_size=args.cache_size)
+        if search_engine is None:
+            return 1
+        if args.doc_store:
+            raw_documents.close() # İşçiler depoyu kendileri açar
+        del raw_documents # Ham metinler bellekte tutulmaz; önizlemeler depodan okunur.
+
+    server = SearchServer(search_engine, host=args.host, port=args.port, executor=args.executor,
+                          num_workers=args.workers, max_inflight=args.max_inflight, max_queue=args.max_queue,
+                          pipeline_depth=args.pipeline_depth, doc_store_path=args.doc_store)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Arama servisi durduruldu.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
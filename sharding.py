@@ -0,0 +1,319 @@
+# sharding.py
+#
+# Doküman bölümlemeli (document-partitioned) indeks: dokümanlar doc_id'nin özetine (crc32) göre N
+# işçi sürece dağıtılır; her süreç kendi InvertedIndex parçasını (shard) ve SearchEngine'ini tutar.
+# Böylece sorgular GIL'e takılmadan N çekirdekte paralel değerlendirilir.
+#
+# TF-IDF ve BM25 skorlarının tek bir indeksle aynı olması için parçalar yerel değil küresel
+# koleksiyon istatistiklerini kullanır: indeksleme bitince her parçanın df'leri toplanır ve her
+# parçaya kendi terimlerinin küresel df'i, toplam doküman sayısı (N) ve ortalama doküman uzunluğu
+# gönderilir. Sorgular koordinatörde bir kez ön işlenir, tüm parçalara yayınlanır (scatter) ve
+# parçaların kısmi sonuçları birleştirilir (gather): sıralı modlarda her parçanın top_n listesi
+# birleştirilip en iyi top_n seçilir, Boolean modlarda parça sonuçları art arda eklenir.
+
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from itertools import chain
+from operator import itemgetter
+
+from bm25 import DEFAULT_B, DEFAULT_K1, validate_bm25_params
+from inverted_index import InvertedIndex
+from search import SEARCH_MODES, SearchEngine
+from utils import FastAnalyzer, iter_batches, preprocess_text_fast
+
+
+def shard_of(doc_id, num_shards):
+    """Dokümanın parça numarası; süreçler ve çalıştırmalar arasında kararlıdır (hash() gibi rastgele değildir)."""
+    return zlib.crc32(str(doc_id).encode('utf-8')) % num_shards
+
+
+class _GlobalStatsIndex:
+    """
+    Bir parça indeksinin önünde duran görünüm: get_df, total_docs ve avg_doc_length küresel
+    koleksiyon değerlerini döndürür, diğer her şey (postings, doküman uzunlukları, max_tf ...)
+    parçanın kendi indeksine yönlendirilir. SearchEngine'e indeks yerine verilir.
+    """
+
+    def __init__(self, shard_index, global_dfs, total_docs, avg_doc_length):
+        self.shard_index = shard_index
+        self.global_dfs = global_dfs # Yalnızca bu parçada geçen terimlerin küresel df'leri
+        self.total_docs = total_docs
+        self.avg_doc_length = avg_doc_length
+
+    def __getattr__(self, name):
+        return getattr(self.shard_index, name)
+
+    def get_df(self, term):
+        # Parçada geçmeyen terimin bu parçaya katkısı yoktur; 0 döndürmek AND'i de doğru kısa keser.
+        return self.global_dfs.get(term, 0)
+
+
+def _shard_main(conn, shard_no, use_stemming, cache_size):
+    """Parça sürecinin komut döngüsü. Komutlar (ad, argümanlar...) demetleridir."""
+    analyzer = FastAnalyzer(use_stemming=use_stemming)
+    processed_documents = {}
+    shard_index = None
+    search_engine = None
+    pending_error = None
+    while True:
+        try:
+            command, *args = conn.recv()
+        except EOFError:
+            break
+        if command == 'close':
+            break
+        if command == 'add':
+            # Yanıt gönderilmez (koordinatör beklemeden sonraki grubu yollar); hata 'build'de bildirilir.
+            documents, analyzed = args
+            try:
+                for doc_id, content in documents:
+                    processed_documents[doc_id] = content if analyzed else analyzer(content)
+            except Exception as e:
+                pending_error = pending_error or f"{type(e).__name__}: {e}"
+            continue
+        try:
+            if command == 'build':
+                if pending_error is not None:
+                    raise RuntimeError(pending_error)
+                shard_index = InvertedIndex()
+                shard_index.build_index(processed_documents)
+                processed_documents = None
+                local_dfs = {term: shard_index.get_df(term) for term in shard_index.get_vocabulary()}
+                reply = (local_dfs, shard_index.total_docs, sum(shard_index.doc_lengths.values()))
+            elif command == 'stats':
+                global_dfs, total_docs, avg_doc_length = args
+                search_engine = SearchEngine(_GlobalStatsIndex(shard_index, global_dfs, total_docs, avg_doc_length),
+                                             cache_size=cache_size)
+                reply = None
+            elif command == 'search':
+                term_lists, modes, top_n, pruning = args
+                reply = search_engine._evaluate_term_lists(term_lists, modes, top_n, pruning)
+            elif command == 'bm25':
+                term_lists, top_n, k1, b, delta = args
+                reply = [search_engine._bm25_rank_terms(list(terms), top_n, k1, b, delta) if terms else []
+                         for terms in term_lists]
+            elif command == 'info':
+                reply = {
+                    'shard': shard_no,
+                    'pid': os.getpid(),
+                    'docs': shard_index.total_docs if shard_index is not None else len(processed_documents),
+                    'terms': len(shard_index.index) if shard_index is not None else 0,
+                    'cache': search_engine.cache_stats() if search_engine is not None else None,
+                }
+            else:
+                raise ValueError(f"Bilinmeyen parça komutu: {command!r}")
+            conn.send(('ok', reply))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class ShardedSearchEngine:
+    """
+    N parça süreci üzerinde SearchEngine ile aynı sorgu arayüzü (boolean_search, tfidf_rank,
+    bm25_rank, search_many). Sıralı sonuçların skorları tek indeksli SearchEngine ile aynıdır;
+    eşit skorlu dokümanların ve Boolean sonuçlarının sırası farklı olabilir.
+    İndeks index_documents ile bir kez kurulur ve sonra salt okunurdur.
+
+    num_shards: Parça (süreç) sayısı (None: os.cpu_count()).
+    use_stemming: Parçalarda ve sorgularda kullanılan ön işleme (bkz. utils.FastAnalyzer).
+    cache_size: Parça başına sonuç önbelleği boyutu.
+    start_method: multiprocessing başlatma yöntemi (None: platform varsayılanı).
+
+    Kullanım:
+        with ShardedSearchEngine(num_shards=4) as engine:
+            engine.index_documents(raw_documents)
+            engine.tfidf_rank("space alien invasion")
+    """
+
+    def __init__(self, num_shards=None, use_stemming=True, cache_size=1024, start_method=None):
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.use_stemming = use_stemming
+        self.total_docs = 0
+        self.avg_doc_length = 0
+        self.global_dfs = {}
+        self._indexed = False
+        self._lock = threading.Lock()
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        for shard_no in range(self.num_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_shard_main, args=(child_conn, shard_no, use_stemming, cache_size),
+                                      daemon=True, name=f"shard-{shard_no}")
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def _broadcast(self, commands):
+        """
+        Her parçaya komutunu gönderir, sonra yanıtları toplar; parçalar komutları paralel çalıştırır.
+        commands: Tek bir komut (tüm parçalara aynısı) veya parça başına bir komut listesi.
+        """
+        if not isinstance(commands, list):
+            commands = [commands] * self.num_shards
+        with self._lock:
+            for conn, command in zip(self._connections, commands):
+                conn.send(command)
+            replies = [conn.recv() for conn in self._connections]
+        errors = [f"parça {shard_no}: {payload}" for shard_no, (status, payload) in enumerate(replies) if status != 'ok']
+        if errors:
+            raise RuntimeError("Parça hatası: " + "; ".join(errors))
+        return [payload for _, payload in replies]
+
+    def index_documents(self, documents, analyzed=False, batch_size=1000):
+        """
+        Dokümanları parçalara dağıtıp indeksler ve küresel istatistikleri parçalara yayar.
+        documents: {doc_id: metin} sözlüğü veya (doc_id, metin) çiftleri (akış olabilir).
+            analyzed=True ise metin yerine önceden işlenmiş token listeleri verilir.
+        Ham metinler parça süreçlerinde paralel ön işlenir; koordinatör yalnızca dağıtım yapar.
+        """
+        if self._indexed:
+            raise RuntimeError("Parçalı indeks yalnızca bir kez kurulabilir.")
+        start_time = time.perf_counter()
+        items = documents.items() if hasattr(documents, 'items') else documents
+        buffers = [[] for _ in range(self.num_shards)]
+        with self._lock:
+            for doc_id, content in items:
+                shard_no = shard_of(doc_id, self.num_shards)
+                buffer = buffers[shard_no]
+                buffer.append((doc_id, content))
+                if len(buffer) >= batch_size:
+                    # Parça yetişemezse boru dolar ve send bekler (doğal geri basınç).
+                    self._connections[shard_no].send(('add', buffer, analyzed))
+                    buffers[shard_no] = []
+            for conn, buffer in zip(self._connections, buffers):
+                if buffer:
+                    conn.send(('add', buffer, analyzed))
+
+        shard_stats = self._broadcast(('build',))
+        global_dfs = {}
+        total_length = 0
+        for local_dfs, shard_docs, shard_length in shard_stats:
+            for term, df in local_dfs.items():
+                global_dfs[term] = global_dfs.get(term, 0) + df
+            self.total_docs += shard_docs
+            total_length += shard_length
+        self.avg_doc_length = total_length / self.total_docs if self.total_docs > 0 else 0
+        self.global_dfs = global_dfs
+        # Her parçaya yalnızca kendi terimlerinin küresel df'i gönderilir.
+        self._broadcast([('stats', {term: global_dfs[term] for term in local_dfs}, self.total_docs, self.avg_doc_length)
+                         for local_dfs, _, _ in shard_stats])
+        self._indexed = True
+        print(f"Parçalı indeks: {self.total_docs} doküman, {len(global_dfs)} terim, {self.num_shards} parça "
+              f"({', '.join(str(shard_docs) for _, shard_docs, _ in shard_stats)} doküman), "
+              f"{time.perf_counter() - start_time:.2f} sn.")
+
+    def get_df(self, term):
+        return self.global_dfs.get(term, 0)
+
+    def get_vocabulary(self):
+        return list(self.global_dfs.keys())
+
+    def shard_info(self):
+        """Parça başına doküman/terim sayısı, süreç kimliği ve önbellek sayaçları."""
+        return self._broadcast(('info',))
+
+    def _preprocess(self, query_string):
+        return tuple(set(preprocess_text_fast(query_string, use_stemming=self.use_stemming)))
+
+    @staticmethod
+    def _merge(mode, shard_results, top_n):
+        if mode in ('tfidf', 'bm25'):
+            return heapq.nlargest(top_n, chain.from_iterable(shard_results), key=itemgetter(1))
+        return list(chain.from_iterable(shard_results))
+
+    def search_many(self, query_strings, modes=SEARCH_MODES, top_n=10, pruning=None, chunk_size=256):
+        """
+        SearchEngine.search_many ile aynı arayüz: her sorgu için {mod: sonuç} sözlüğü döndürür.
+        Sorgular chunk_size'lık gruplar halinde tüm parçalara yayınlanır; her parça grubu kendi
+        payına düşen dokümanlar üzerinde değerlendirir.
+        """
+        modes = tuple(mode.lower() for mode in modes)
+        unknown_modes = set(modes) - set(SEARCH_MODES)
+        if unknown_modes:
+            raise ValueError(f"Desteklenmeyen arama modu: {sorted(unknown_modes)}. Kullanılabilir: {SEARCH_MODES}")
+        if pruning not in (None, 'maxscore'):
+            raise ValueError("Desteklenmeyen budama yöntemi. Lütfen None veya 'maxscore' kullanın.")
+        results = []
+        for chunk in iter_batches([self._preprocess(query) for query in query_strings], chunk_size):
+            shard_replies = self._broadcast(('search', chunk, modes, top_n, pruning))
+            for query_no in range(len(chunk)):
+                results.append({mode: self._merge(mode, [reply[query_no][mode] for reply in shard_replies], top_n)
+                                for mode in modes})
+        return results
+
+    def boolean_search(self, query_string, operator='AND'):
+        """Parçaların Boolean sonuçlarının birleşimi (doküman bölümlemeli olduğu için kesin sonuç)."""
+        if operator.upper() not in ('AND', 'OR'):
+            raise ValueError("Desteklenmeyen operatör. Lütfen 'AND' veya 'OR' kullanın.")
+        mode = operator.lower()
+        return self.search_many([query_string], modes=(mode,))[0][mode]
+
+    def tfidf_rank(self, query_string, top_n=10, pruning=None):
+        """Parçaların (küresel IDF ile hesaplanmış) top_n listelerinden en iyi top_n."""
+        return self.search_many([query_string], modes=('tfidf',), top_n=top_n, pruning=pruning)[0]['tfidf']
+
+    def bm25_rank(self, query_string, top_n=10, k1=DEFAULT_K1, b=DEFAULT_B, delta=0.0):
+        """Parçaların (küresel N, df ve ortalama uzunlukla hesaplanmış) BM25 top_n listelerinden en iyi top_n."""
+        validate_bm25_params(k1, b, delta)
+        terms = self._preprocess(query_string)
+        shard_replies = self._broadcast(('bm25', [terms], top_n, k1, b, delta))
+        return self._merge('bm25', [reply[0] for reply in shard_replies], top_n)
+
+    def close(self):
+        """Parça süreçlerini kapatır."""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.send(('close',))
+                except (BrokenPipeError, OSError):
+                    pass
+                conn.close()
+            for process in self._processes:
+                process.join(timeout=5)
+            self._connections = []
+            self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == '__main__':
+    import random
+
+    random.seed(0)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = {f"doc_{i}": random.choices(vocabulary, weights, k=random.randint(20, 200)) for i in range(40000)}
+    queries = [' '.join(random.sample(vocabulary[:2000], random.randint(1, 4))) for _ in range(2000)]
+    term_lists = [list(set(query.split())) for query in queries]
+
+    single_index = InvertedIndex()
+    single_index.build_index(documents)
+    single_engine = SearchEngine(single_index, cache_size=0)
+    start_time = time.perf_counter()
+    expected = [single_engine._tfidf_rank_terms(terms, single_index.total_docs, 10, None) for terms in term_lists]
+    single_seconds = time.perf_counter() - start_time
+
+    with ShardedSearchEngine(num_shards=4, cache_size=0) as sharded_engine:
+        # Sentetik "termN" tokenları ön işlemeden geçmez; dokümanlar ve sorgu terimleri işlenmiş verilir.
+        sharded_engine.index_documents(documents, analyzed=True)
+        start_time = time.perf_counter()
+        shard_replies = sharded_engine._broadcast(('search', [tuple(terms) for terms in term_lists], ('tfidf',), 10, None))
+        actual = [sharded_engine._merge('tfidf', [reply[query_no]['tfidf'] for reply in shard_replies], 10)
+                  for query_no in range(len(term_lists))]
+        sharded_seconds = time.perf_counter() - start_time
+
+    for expected_top, actual_top in zip(expected, actual):
+        assert [score for _, score in expected_top] == [score for _, score in actual_top]
+    print(f"{len(queries)} TF-IDF sorgusu: tek indeks {single_seconds:.2f} sn, 4 parça {sharded_seconds:.2f} sn "
+          f"({os.cpu_count()} çekirdek). Skorlar aynı.")
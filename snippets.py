@@ -0,0 +1,297 @@
+# snippets.py
+
+import json
+import os
+import re
+from bisect import bisect_right
+
+from doc_store import DocumentStoreWriter, load_document_store
+from utils import get_fast_analyzer
+
+# Sorguya yönelik özet (snippet) üretimi. İndeksleme sırasında her doküman için cümle pencereleri ve
+# analiz edilmiş terimlerin özgün metindeki karakter aralıkları bir "özet indeksi" dosyasına yazılır.
+# Sonuç gösterilirken yalnızca sorgu terimleri bu kayıtta aranır: en çok sorgu terimi içeren pencere
+# seçilir ve eşleşen kelimeler işaretlenir; dokümanın tamamı yeniden ön işlenmez.
+#
+# Özet indeksi, doc_store biçiminde (sıkıştırılmış bloklar + LRU blok önbelleği) saklanır; her
+# dokümanın değeri şu JSON kaydıdır:
+#   [[pencere başlangıçları], {terim: [fark, uzunluk, fark, uzunluk, ...]}]
+# Pencereler ardışıktır; bir pencere bir sonrakinin başlangıcında (sonuncusu metnin sonunda) biter.
+# Bir terimin geçişleri artan sıradadır; her başlangıç, aynı terimin önceki geçişinin başlangıcına
+# göre fark olarak saklanır (ilki 0'a göre). Küçük sayılar kaydı ~%20 küçültür.
+WINDOW_CHARS = 160 # Kısa ardışık cümleler pencere bu uzunluğa ulaşana kadar birleştirilir
+SNIPPET_CHARS = 240 # Özetin en fazla uzunluğu (uzun bir cümle bu uzunluğa kırpılır)
+SNIPPET_INDEX_SUFFIX = '.snippets'
+SNIPPET_BLOCK_SIZE = 4 * 1024 # Kayıtlar ~2 KB; küçük bloklar rastgele erişimde daha az veri açar
+
+_SENTENCE_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+|(?:<br\s*/?>\s*)+', re.IGNORECASE)
+_DISPLAY_TAG_PATTERN = re.compile(r'<[^>]+>')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def snippet_index_path(doc_store_path):
+    """Bir doküman deposunun yanındaki özet indeksi dosyasının yolu (ör. imdb_docs.store.snippets)."""
+    return doc_store_path + SNIPPET_INDEX_SUFFIX
+
+
+def sentence_windows(text, window_chars=WINDOW_CHARS):
+    """
+    Metni cümle sınırlarından (., !, ? sonrası boşluk ve <br />) pencerelere böler; kısa ardışık
+    cümleler pencere en az window_chars uzunluğa ulaşana kadar birleştirilir.
+    Returns: pencere başlangıçları (ilki 0).
+    """
+    starts = [0]
+    for match in _SENTENCE_BREAK_PATTERN.finditer(text):
+        boundary = match.end()
+        if boundary - starts[-1] >= window_chars and boundary < len(text):
+            starts.append(boundary)
+    return starts
+
+
+def annotate_document(text, analyzer, window_chars=WINDOW_CHARS):
+    """Bir dokümanın özet indeksi kaydını (pencere başlangıçları ve terim aralıkları) JSON olarak üretir."""
+    term_spans = {}
+    last_starts = {}
+    for term, start, end in analyzer.analyze_spans(text):
+        spans = term_spans.get(term)
+        if spans is None:
+            term_spans[term] = [start, end - start]
+        else:
+            spans += (start - last_starts[term], end - start)
+        last_starts[term] = start
+    return json.dumps([sentence_windows(text, window_chars), term_spans], separators=(',', ':'))
+
+
+class SnippetIndexWriter:
+    """
+    Dokümanları sırayla ekleyerek özet indeksi dosyası yazar (indeks kurulurken akışla birlikte).
+    use_stemming: İndeksi kuran ön işleyiciyle aynı olmalıdır; aksi halde sorgu terimleri eşleşmez.
+    """
+
+    def __init__(self, path, use_stemming=True, window_chars=WINDOW_CHARS, codec='zlib',
+                 block_size=SNIPPET_BLOCK_SIZE):
+        self.path = path
+        self.window_chars = window_chars
+        self._analyzer = get_fast_analyzer(use_stemming)
+        self._writer = DocumentStoreWriter(path, codec=codec, block_size=block_size)
+
+    def add(self, doc_id, text):
+        self._writer.add(doc_id, annotate_document(text, self._analyzer, self.window_chars))
+
+    def add_documents(self, documents):
+        for doc_id, text in (documents.items() if hasattr(documents, 'items') else documents):
+            self.add(doc_id, text)
+
+    def close(self):
+        return self._writer.close()
+
+    def abort(self):
+        self._writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_snippet_index(documents, path, use_stemming=True, window_chars=WINDOW_CHARS, codec='zlib'):
+    """{doc_id: metin} sözlüğü (veya (doc_id, metin) çiftleri) için özet indeksi dosyası yazar."""
+    with SnippetIndexWriter(path, use_stemming, window_chars, codec) as writer:
+        writer.add_documents(documents)
+    return path
+
+
+def highlight(snippet, before='**', after='**'):
+    """(metin, vurgular) özetini, eşleşen kelimeleri before/after ile sararak tek metne çevirir."""
+    text, highlights = snippet
+    pieces = []
+    position = 0
+    for start, end in highlights:
+        pieces += (text[position:start], before, text[start:end], after)
+        position = end
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+class SnippetBuilder:
+    """
+    Sonuç listeleri için sorguya yönelik özetler üretir.
+
+    documents: {doc_id: metin} eşlemesi (sözlük veya doc_store.DocumentStore).
+    annotations: Özet indeksi (load_snippet_index ile açılmış); None ise ya da doküman kayıtta yoksa
+        kayıt o doküman için anında çıkarılır (yine yalnızca gösterilen doküman için).
+    use_stemming: Sorgu ve (kayıt yoksa) doküman terimlerini üreten ön işleyici ayarı.
+    max_chars: Özetin en fazla uzunluğu.
+    """
+
+    def __init__(self, documents, annotations=None, use_stemming=True, max_chars=SNIPPET_CHARS,
+                 window_chars=WINDOW_CHARS):
+        self.documents = documents
+        self.annotations = annotations
+        self.max_chars = max_chars
+        self.window_chars = window_chars
+        self._analyzer = get_fast_analyzer(use_stemming)
+
+    def query_terms(self, query):
+        return set(self._analyzer(query))
+
+    def _annotation(self, doc_id, text):
+        if self.annotations is not None:
+            record = self.annotations.get(doc_id)
+            if record is not None:
+                return json.loads(record)
+        return json.loads(annotate_document(text, self._analyzer, self.window_chars))
+
+    def snippet(self, doc_id, query_terms):
+        """
+        query_terms: Ön işlenmiş sorgu terimleri (query_terms(sorgu)).
+        Returns: (özet metni, [(başlangıç, bitiş), ...] vurgu aralıkları); doküman yoksa ('', []).
+        """
+        text = self.documents.get(doc_id)
+        if not text:
+            return '', []
+        window_starts, term_spans = self._annotation(doc_id, text)
+
+        # Pencere başına eşleşen farklı terimler ve toplam eşleşme sayısı.
+        matches = []
+        window_terms = {}
+        window_hits = {}
+        for term in query_terms:
+            spans = term_spans.get(term)
+            if not spans:
+                continue
+            span_start = 0
+            for i in range(0, len(spans), 2):
+                span_start += spans[i]
+                window_no = bisect_right(window_starts, span_start) - 1
+                window_terms.setdefault(window_no, set()).add(term)
+                window_hits[window_no] = window_hits.get(window_no, 0) + 1
+                matches.append((span_start, span_start + spans[i + 1]))
+        if window_terms:
+            best = max(window_terms, key=lambda window_no: (len(window_terms[window_no]), window_hits[window_no], -window_no))
+        else:
+            best = 0
+        start = window_starts[best]
+        end = window_starts[best + 1] if best + 1 < len(window_starts) else len(text)
+        matches = sorted(span for span in matches if start <= span[0] and span[1] <= end)
+        start, end = self._trim(text, start, end, matches)
+        return self._render(text, start, end, [span for span in matches if start <= span[0] and span[1] <= end])
+
+    def _trim(self, text, start, end, matches):
+        # Pencere max_chars'tan uzunsa ilk eşleşmenin biraz öncesinden başlayan bir parçası alınır;
+        # parça kelime sınırlarına hizalanır.
+        if end - start <= self.max_chars:
+            return start, end
+        if matches:
+            start = max(start, min(matches[0][0] - self.max_chars // 4, end - self.max_chars))
+            if start > 0 and not text[start - 1].isspace():
+                space = text.find(' ', start, matches[0][0])
+                start = space + 1 if space != -1 else start
+            tag_end = text.find('>', start, matches[0][0]) # Bir etiketin (ör. <br />) ortasından başlanmaz
+            if tag_end != -1 and '<' not in text[start:tag_end]:
+                start = tag_end + 1
+        cut = start + self.max_chars
+        space = text.rfind(' ', start, cut)
+        end = space if space > start else cut
+        tag_start = text.rfind('<', start, end) # Yarım kalan bir etiketle bitirilmez
+        if tag_start != -1 and '>' not in text[tag_start:end]:
+            end = tag_start
+        return start, end
+
+    def _render(self, text, start, end, matches):
+        # Parçalar ayrı ayrı gösterime hazırlanır (etiketler ve art arda boşluklar tek boşluk olur),
+        # böylece vurgu aralıkları çıktı metnine göre yeniden hesaplanır.
+        pieces = []
+        highlights = []
+        length = 0
+
+        def emit(piece, highlighted=False):
+            nonlocal length
+            piece = _WHITESPACE_PATTERN.sub(' ', _DISPLAY_TAG_PATTERN.sub(' ', piece))
+            if pieces and pieces[-1].endswith(' ') and piece.startswith(' '):
+                piece = piece[1:]
+            if highlighted:
+                highlights.append((length, length + len(piece)))
+            pieces.append(piece)
+            length += len(piece)
+
+        if start > 0:
+            emit('...')
+        position = start
+        for match_start, match_end in matches:
+            if match_start < position: # Treebank bölmesiyle aynı aralık iki kez gelebilir
+                continue
+            emit(text[position:match_start])
+            emit(text[match_start:match_end], highlighted=True)
+            position = match_end
+        emit(text[position:end])
+        if end < len(text):
+            emit('...')
+
+        snippet_text = ''.join(pieces)
+        stripped = snippet_text.lstrip()
+        offset = len(snippet_text) - len(stripped)
+        return stripped.rstrip(), [(s - offset, e - offset) for s, e in highlights]
+
+    def snippets(self, doc_ids, query):
+        """Bir sorgunun sonuçları için özetler: {doc_id: (metin, vurgular)}. Sorgu bir kez ön işlenir."""
+        query_terms = self.query_terms(query)
+        return {doc_id: self.snippet(doc_id, query_terms) for doc_id in doc_ids}
+
+
+def load_snippet_index(path, cache_blocks=16):
+    """save_snippet_index / SnippetIndexWriter ile yazılmış özet indeksini bellek eşlemeli olarak açar."""
+    return load_document_store(path, cache_blocks)
+
+
+def load_snippet_builder(doc_store_path, use_stemming=True, max_chars=SNIPPET_CHARS):
+    """
+    Doküman deposunu ve (varsa) yanındaki özet indeksini açıp bir SnippetBuilder döndürür.
+    Özet indeksi yoksa kayıtlar gösterilen dokümanlar için anında çıkarılır.
+    """
+    annotations_path = snippet_index_path(doc_store_path)
+    annotations = None
+    if os.path.exists(annotations_path):
+        annotations = load_snippet_index(annotations_path)
+    else:
+        print(f"Uyarı: '{annotations_path}' özet indeksi bulunamadı; özetler her sonuç için anında çıkarılacak.")
+    return SnippetBuilder(load_document_store(doc_store_path), annotations, use_stemming, max_chars)
+
+
+if __name__ == '__main__':
+    import time
+    from utils import load_documents_imdb
+
+    IMDB_DATA_PATH = r'C:\Users\ayseo\OneDrive\Masaüstü\bilgi-erisim-sistemleri-proje\data'
+    SNIPPETS_PATH = 'imdb_docs.snippets'
+
+    raw_documents_full = load_documents_imdb(IMDB_DATA_PATH)
+    if raw_documents_full:
+        start_time = time.perf_counter()
+        save_snippet_index(raw_documents_full, SNIPPETS_PATH)
+        print(f"  yazma: {time.perf_counter() - start_time:.2f} sn")
+
+        from inverted_index import InvertedIndex
+        from search import SearchEngine
+        from utils import preprocess_documents_parallel
+        inv_index = InvertedIndex()
+        inv_index.build_index(preprocess_documents_parallel(raw_documents_full, fast=True))
+        search_engine = SearchEngine(inv_index)
+
+        builder = SnippetBuilder(raw_documents_full, load_snippet_index(SNIPPETS_PATH))
+        for query in ("amazing suspense thriller movie", "space alien invasion film"):
+            results = search_engine.bm25_rank(query, top_n=5)
+            start_time = time.perf_counter()
+            snippets = builder.snippets([doc_id for doc_id, _ in results], query)
+            elapsed = time.perf_counter() - start_time
+            print(f"\nSorgu: '{query}' ({len(results)} özet, {elapsed * 1000:.2f} ms)")
+            for doc_id, score in results:
+                print(f"  {doc_id} ({score:.3f}): {highlight(snippets[doc_id])}")
+        builder.annotations.close()
+        os.remove(SNIPPETS_PATH)
+    else:
+        print("Doküman yüklenemedi.")
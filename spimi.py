@@ -0,0 +1,233 @@
+# spimi.py
+
+import heapq
+import os
+import shutil
+import struct
+import tempfile
+import time
+from array import array
+from collections import defaultdict
+
+from index_store import BYTE_ORDER, HEADER_STRUCT, MAGIC, align_section, load_index, write_section
+
+# Sıralı bir çalışma (run) dosyası, utf-8 bayt sırasına göre dizilmiş terim kayıtlarından oluşur:
+#   _RUN_RECORD (terim bayt uzunluğu, posting sayısı) + terim + uint32 doküman no'ları + uint32 tf'ler
+# Bir bloğa giren dokümanların numaraları önceki bloklarınkinden büyük olduğundan, aynı terimin
+# çalışmalardaki postings'leri çalışma sırasıyla art arda eklendiğinde sıralı kalır.
+_RUN_RECORD = struct.Struct('<II')
+_ITEM_SIZE = array('I').itemsize
+
+# Bellek bütçesi tahmini için yaklaşık maliyetler (CPython, 64 bit): yeni bir terim sözlük girdisi,
+# terim dizgesi ve iki boş array nesnesi getirir; her posting iki uint32 ekler.
+_TERM_OVERHEAD_BYTES = 320
+_POSTING_BYTES = 2 * _ITEM_SIZE
+
+
+def _iter_run(path):
+    """Bir çalışma dosyasındaki (terim baytları, doküman no'ları, tf'ler) kayıtlarını sırayla okur."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_RUN_RECORD.size)
+            if not header:
+                return
+            term_length, count = _RUN_RECORD.unpack(header)
+            term = f.read(term_length)
+            doc_nums = array('I')
+            doc_nums.frombytes(f.read(count * _ITEM_SIZE))
+            tfs = array('I')
+            tfs.frombytes(f.read(count * _ITEM_SIZE))
+            yield term, doc_nums, tfs
+
+
+class SPIMIBuilder:
+    """
+    Tek geçişli bellek içi indeksleme (SPIMI) ile belleğe sığmayan korpuslar için indeks kurar.
+    Postings'ler bellek bütçesi dolana kadar bir bellek içi blokta biriktirilir, sonra blok terim
+    sırasıyla diske sıralı bir çalışma (run) olarak yazılır. finish() tüm çalışmaları k-yollu
+    birleştirerek index_store formatında tek bir dosya üretir; dosya load_index ile açılır.
+    Terim istatistikleri (df, toplam korpus frekansı, max_tf, doküman uzunlukları, ortalama
+    uzunluk) InvertedIndex.build_index + save_index ile birebir aynıdır.
+
+    Bellekte yalnızca aktif blok ile doküman başına 12 bayt (doc_id ofseti ve uzunluğu) ve
+    birleştirme sırasında terim başına birkaç sayı tutulur; doc_id metinleri ve birleştirilmiş
+    postings'ler geçici dosyalara akıtılır.
+    """
+
+    def __init__(self, output_path, memory_budget_mb=256, temp_dir=None):
+        self.output_path = output_path
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.temp_dir = tempfile.mkdtemp(prefix='spimi_', dir=temp_dir)
+        self.run_paths = []
+        self.total_docs = 0
+        self.total_length = 0
+        self._block = defaultdict(lambda: (array('I'), array('I'))) # {term: (doküman no'ları, tf'ler)}
+        self._block_bytes = 0
+        self._doc_id_offsets = array('Q', [0])
+        self._doc_id_blob_size = 0
+        self._doc_lengths = array('I')
+        self._doc_id_file = open(os.path.join(self.temp_dir, 'doc_ids.bin'), 'wb')
+
+    def add_document(self, doc_id, tokens):
+        doc_num = self.total_docs
+        self.total_docs += 1
+        self.total_length += len(tokens)
+        self._doc_lengths.append(len(tokens))
+        encoded_id = str(doc_id).encode('utf-8')
+        self._doc_id_file.write(encoded_id)
+        self._doc_id_blob_size += len(encoded_id)
+        self._doc_id_offsets.append(self._doc_id_blob_size)
+
+        term_counts_in_doc = defaultdict(int)
+        for token in tokens:
+            term_counts_in_doc[token] += 1
+        block = self._block
+        for term, tf_in_doc in term_counts_in_doc.items():
+            if term not in block:
+                self._block_bytes += _TERM_OVERHEAD_BYTES + len(term)
+            doc_nums, tfs = block[term]
+            doc_nums.append(doc_num)
+            tfs.append(tf_in_doc)
+        self._block_bytes += len(term_counts_in_doc) * _POSTING_BYTES
+        if self._block_bytes >= self.memory_budget:
+            self._flush_block()
+
+    def add_documents(self, processed_documents):
+        """processed_documents: {doc_id: tokens} veya (doc_id, tokens) çiftleri (akış olabilir)."""
+        if hasattr(processed_documents, 'items'):
+            processed_documents = processed_documents.items()
+        for doc_id, tokens in processed_documents:
+            self.add_document(doc_id, tokens)
+
+    def _flush_block(self):
+        """Aktif bloğu terim sırasıyla yeni bir çalışma dosyasına yazar ve belleği boşaltır."""
+        if not self._block:
+            return
+        run_path = os.path.join(self.temp_dir, f'run_{len(self.run_paths):05d}.bin')
+        entries = sorted(((term.encode('utf-8'), postings) for term, postings in self._block.items()),
+                         key=lambda entry: entry[0])
+        with open(run_path, 'wb') as f:
+            for term, (doc_nums, tfs) in entries:
+                f.write(_RUN_RECORD.pack(len(term), len(doc_nums)))
+                f.write(term)
+                f.write(doc_nums.tobytes())
+                f.write(tfs.tobytes())
+        self.run_paths.append(run_path)
+        self._block = defaultdict(lambda: (array('I'), array('I')))
+        self._block_bytes = 0
+
+    def finish(self):
+        """
+        Son bloğu yazar, çalışmaları k-yollu birleştirip indeks dosyasını oluşturur ve geçici
+        dosyaları siler. Returns: output_path.
+        """
+        start_time = time.perf_counter()
+        self._flush_block()
+        self._doc_id_file.close()
+
+        term_offsets = array('Q', [0])
+        term_blob = bytearray()
+        dfs = array('I')
+        corpus_freqs = array('Q')
+        max_tfs = array('I')
+        postings_starts = array('Q', [0])
+        docs_path = os.path.join(self.temp_dir, 'postings_docs.bin')
+        tfs_path = os.path.join(self.temp_dir, 'postings_tfs.bin')
+        total_postings = 0
+
+        # heapq.merge kararlıdır: eşit terimler çalışma sırasıyla, yani artan doküman no'suyla gelir.
+        runs = [((term, run_index, doc_nums, tfs) for term, doc_nums, tfs in _iter_run(path))
+                for run_index, path in enumerate(self.run_paths)]
+        current_term = None
+        with open(docs_path, 'wb') as docs_file, open(tfs_path, 'wb') as tfs_file:
+            for term, _, doc_nums, tfs in heapq.merge(*runs, key=lambda record: record[0]):
+                if term != current_term:
+                    if current_term is not None:
+                        postings_starts.append(total_postings)
+                    current_term = term
+                    term_blob += term
+                    term_offsets.append(len(term_blob))
+                    dfs.append(0)
+                    corpus_freqs.append(0)
+                    max_tfs.append(0)
+                dfs[-1] += len(doc_nums)
+                corpus_freqs[-1] += sum(tfs)
+                max_tfs[-1] = max(max_tfs[-1], max(tfs))
+                docs_file.write(doc_nums.tobytes())
+                tfs_file.write(tfs.tobytes())
+                total_postings += len(doc_nums)
+        if current_term is not None:
+            postings_starts.append(total_postings)
+
+        avg_doc_length = self.total_length / self.total_docs if self.total_docs > 0 else 0
+        with open(self.output_path, 'wb') as f:
+            f.write(b'\0' * (len(MAGIC) + HEADER_STRUCT.size))
+            offsets = [write_section(f, self._doc_id_offsets)]
+            offsets.append(align_section(f))
+            with open(self._doc_id_file.name, 'rb') as doc_id_file:
+                shutil.copyfileobj(doc_id_file, f)
+            for data in (self._doc_lengths, term_offsets, term_blob, dfs, corpus_freqs, max_tfs, postings_starts):
+                offsets.append(write_section(f, data))
+            for section_path in (docs_path, tfs_path):
+                offsets.append(align_section(f))
+                with open(section_path, 'rb') as section_file:
+                    shutil.copyfileobj(section_file, f)
+            file_end = f.tell()
+            f.seek(0)
+            f.write(MAGIC)
+            f.write(HEADER_STRUCT.pack(
+                BYTE_ORDER, self.total_docs, len(dfs), total_postings,
+                float(avg_doc_length), *offsets, file_end,
+            ))
+
+        run_count = len(self.run_paths)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        elapsed = time.perf_counter() - start_time
+        print(f"SPIMI: {self.total_docs} doküman, {run_count} çalışma dosyası birleştirildi -> "
+              f"'{self.output_path}' ({len(dfs)} terim, {total_postings} posting, {elapsed:.2f} sn).")
+        return self.output_path
+
+    def abort(self):
+        """Yarım kalan kurulumun geçici dosyalarını siler."""
+        self._doc_id_file.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def build_index_spimi(processed_documents, output_path, memory_budget_mb=256, temp_dir=None):
+    """
+    processed_documents'ı (bkz. SPIMIBuilder.add_documents) SPIMI ile indeksleyip diske yazar ve
+    sonucu bellek eşlemeli MappedInvertedIndex olarak açar.
+    """
+    builder = SPIMIBuilder(output_path, memory_budget_mb=memory_budget_mb, temp_dir=temp_dir)
+    try:
+        builder.add_documents(processed_documents)
+    except BaseException:
+        builder.abort()
+        raise
+    builder.finish()
+    return load_index(output_path)
+
+
+if __name__ == '__main__':
+    import filecmp
+    import random
+    from inverted_index import InvertedIndex
+
+    random.seed(0)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = {f"doc_{i}": random.choices(vocabulary, weights, k=random.randint(20, 200)) for i in range(5000)}
+
+    in_memory = InvertedIndex()
+    in_memory.build_index(documents)
+    in_memory.save('index_in_memory.bin')
+
+    # Küçük bir bütçe ile çok sayıda çalışma dosyası oluşur.
+    with build_index_spimi(documents, 'index_spimi.bin', memory_budget_mb=1) as spimi_index:
+        for term in vocabulary[:50]:
+            assert spimi_index.get_df(term) == in_memory.get_df(term)
+            assert spimi_index.get_total_corpus_freq(term) == in_memory.get_total_corpus_freq(term)
+            assert spimi_index.get_max_tf(term) == in_memory.get_max_tf(term)
+    print("Dosyalar bayt bayt aynı:", filecmp.cmp('index_in_memory.bin', 'index_spimi.bin', shallow=False))
+    os.remove('index_in_memory.bin')
+    os.remove('index_spimi.bin')
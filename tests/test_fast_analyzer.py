@@ -0,0 +1,74 @@
+# FastAnalyzer'ın preprocess_text ile aynı terimleri ürettiğini depodaki IMDb örnekleri üzerinde doğrular.
+
+import os
+
+import pytest
+
+from utils import FastAnalyzer, verify_fast_analyzer
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+SAMPLE_SIZE = 250 # Her (bölüm, duygu) klasöründen okunan inceleme sayısı
+
+# Tokenizer'ın özel durumları: etiketler, kesme işaretleri, sayılar, noktalama, unicode.
+EDGE_CASES = {
+    'tags': "Great<br /><br />movie! <i>Loved</i> it.<BR>The END<p>",
+    'apostrophes': "I can't believe it's not butter; the actors' work wasn't bad.",
+    'numbers': "10/10, would watch 2 more times in 2024 -- 9.5 stars.",
+    'punctuation': "...wow!!! (really?) \"quoted\" -dashed- end.",
+    'unicode': "Café déjà vu — naïve Zoë’s “fiancé” was über-cool.",
+    'empty': "",
+    'only_tags': "<br /><b></b>",
+}
+
+
+def _sample_documents():
+    documents = dict(EDGE_CASES)
+    for split in ('train', 'test'):
+        for sentiment in ('pos', 'neg'):
+            directory = os.path.join(DATA_PATH, split, sentiment)
+            if not os.path.isdir(directory):
+                continue
+            for file_name in sorted(os.listdir(directory))[:SAMPLE_SIZE]:
+                with open(os.path.join(directory, file_name), 'r', encoding='utf-8') as f:
+                    documents[f'{split}/{sentiment}/{file_name}'] = f.read()
+    return documents
+
+
+def _has_wordnet():
+    import nltk
+    try:
+        nltk.data.find('corpora/wordnet')
+    except LookupError:
+        return False
+    return True
+
+
+@pytest.fixture(scope='module')
+def sample_documents():
+    return _sample_documents()
+
+
+@pytest.mark.parametrize('use_stemming, use_lemmatization', [
+    (True, False),
+    pytest.param(False, True, marks=pytest.mark.skipif(not _has_wordnet(), reason="NLTK wordnet verisi yok")),
+    (False, False),
+])
+def test_verify_fast_analyzer_has_no_mismatches(sample_documents, use_stemming, use_lemmatization):
+    assert len(sample_documents) > len(EDGE_CASES), "data/ altında örnek inceleme bulunamadı"
+    mismatches, stats = verify_fast_analyzer(sample_documents, use_stemming, use_lemmatization)
+    assert mismatches == []
+    assert stats['docs'] == len(sample_documents)
+
+
+def test_analyze_spans_matches_analyzer(sample_documents):
+    analyzer = FastAnalyzer()
+    for doc_id, text in sample_documents.items():
+        spans = analyzer.analyze_spans(text)
+        assert [term for term, _, _ in spans] == analyzer(text), doc_id
+        previous_start = 0
+        for term, start, end in spans:
+            assert previous_start <= start < end <= len(text), (doc_id, term)
+            surface = text[start:end]
+            assert '<' not in surface and '>' not in surface, (doc_id, term, surface)
+            assert surface[0].isalnum() and surface[-1].isalnum(), (doc_id, term, surface)
+            previous_start = start
@@ -0,0 +1,99 @@
+# Artımlı ekleme/silme/güncelleme ve segment birleştirmeden sonra InvertedIndex'in,
+# aynı dokümanlarla sıfırdan kurulan indeksle aynı sonuçları verdiğini doğrular.
+
+import random
+
+import pytest
+
+from inverted_index import InvertedIndex
+
+VOCABULARY = [f"term{i}" for i in range(60)]
+
+
+def _random_tokens(rng):
+    return rng.choices(VOCABULARY, k=rng.randint(0, 25))
+
+
+def _assert_matches_rebuild(index, documents):
+    rebuilt = InvertedIndex(store_positions=index.has_positions)
+    rebuilt.build_index(documents)
+    assert index.total_docs == rebuilt.total_docs
+    assert index.avg_doc_length == pytest.approx(rebuilt.avg_doc_length)
+    assert dict(index.doc_lengths) == dict(rebuilt.doc_lengths)
+    assert set(index.get_vocabulary()) == set(rebuilt.get_vocabulary())
+    for term in VOCABULARY:
+        postings = index.get_postings_with_tf(term)
+        expected = dict(rebuilt.get_postings_with_tf(term))
+        assert dict(postings.items()) == expected, term
+        assert len(postings) == len(expected)
+        for doc_id, tf in expected.items():
+            assert postings.get(doc_id) == tf
+        assert index.get_df(term) == rebuilt.get_df(term)
+        assert index.get_total_corpus_freq(term) == rebuilt.get_total_corpus_freq(term)
+        assert index.get_max_tf(term) >= rebuilt.get_max_tf(term) # silmeden sonra gevşek üst sınır
+        if index.has_positions:
+            for doc_id in expected:
+                assert index.get_positions(term, doc_id) == rebuilt.get_positions(term, doc_id)
+    for doc_id in documents:
+        assert index._is_live(doc_id)
+
+
+@pytest.mark.parametrize('background_merge', [False, True])
+@pytest.mark.parametrize('track_document_terms', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_random_updates_match_rebuild(seed, track_document_terms, background_merge):
+    rng = random.Random(seed)
+    documents = {f"doc{i}": _random_tokens(rng) for i in range(80)}
+    index = InvertedIndex(store_positions=seed == 0, track_document_terms=track_document_terms,
+                          max_segments=3, merge_ratio=0.2, background_merge=background_merge)
+    index.build_index(documents)
+    next_doc = len(documents)
+    deleted = []
+
+    for step in range(60):
+        batch = {}
+        for _ in range(rng.randint(1, 6)):
+            choice = rng.random()
+            if choice < 0.4 or not documents:
+                doc_id = f"doc{next_doc}"
+                next_doc += 1
+            elif choice < 0.7 or not deleted:
+                doc_id = rng.choice(sorted(documents)) # güncelleme
+            else:
+                doc_id = deleted.pop(rng.randrange(len(deleted))) # silinmiş doc_id'yi yeniden ekleme
+            batch[doc_id] = _random_tokens(rng)
+        index.add_documents(batch)
+        documents.update(batch)
+
+        doomed = rng.sample(sorted(documents), k=min(len(documents), rng.randint(0, 4)))
+        assert index.delete_documents(doomed + ["missing"]) == len(doomed)
+        for doc_id in doomed:
+            del documents[doc_id]
+        deleted.extend(doomed)
+
+        if step % 15 == 14:
+            index.merge_segments()
+        _assert_matches_rebuild(index, documents)
+
+    index.wait_for_merges()
+    index.merge_segments()
+    _assert_matches_rebuild(index, documents)
+    assert not index.segments and not index._pending_deletes and not index._superseded
+
+
+@pytest.mark.parametrize('merge_first', [False, True])
+def test_readd_deleted_document(merge_first):
+    documents = {'a': ['x', 'y', 'y'], 'b': ['y', 'z'], 'c': ['x']}
+    index = InvertedIndex(background_merge=False, merge_ratio=10)
+    index.build_index(documents)
+    index.delete_documents(['a'])
+    if merge_first:
+        index.merge_segments()
+    index.add_documents({'a': ['z', 'w']})
+    _assert_matches_rebuild(index, {'a': ['z', 'w'], 'b': ['y', 'z'], 'c': ['x']})
+    index.add_documents([('a', ['x', 'x']), ('a', ['w'])]) # aynı çağrıda iki kez güncelleme
+    expected = {'a': ['w'], 'b': ['y', 'z'], 'c': ['x']}
+    _assert_matches_rebuild(index, expected)
+    index.merge_segments()
+    _assert_matches_rebuild(index, expected)
+    assert index.get_postings_with_tf('x') == {'c': 1}
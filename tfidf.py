@@ -1,5 +1,6 @@
 # tfidf.py
 
+import heapq
 import math
 
 def calculate_tf_log_normalized(term_frequency_in_doc):
@@ -78,6 +79,143 @@ def calculate_doc_score_for_query(query_terms, doc_id, inverted_index, total_doc
     return score
 
 
+def accumulate_tfidf_scores(query_terms, inverted_index, total_documents_N):
+    """
+    Sorgunun tüm aday dokümanlarının TF-IDF skorlarını "term-at-a-time" yöntemiyle hesaplar.
+    Her terimin postings listesi yalnızca bir kez dolaşılır ve IDF terim başına bir kez hesaplanır;
+    skorlar bir akümülatörde ({doc_id: skor}) toplanır.
+    Terimler verilen sırayla işlendiği için her dokümanın skoru, aynı terim sırasıyla çağrılan
+    calculate_doc_score_for_query ile birebir aynıdır.
+    """
+    scores = {}
+    for term in query_terms:
+        idf_val = calculate_idf(total_documents_N, inverted_index.get_df(term))
+        if idf_val == 0.0: # Katkısı 0 olan terim skorları değiştirmez
+            continue
+        for doc_id, term_freq_in_doc in inverted_index.get_postings_with_tf(term).items():
+            if term_freq_in_doc > 0:
+                scores[doc_id] = scores.get(doc_id, 0.0) + (1 + math.log(term_freq_in_doc)) * idf_val
+    return scores
+
+def calculate_term_upper_bound(max_term_frequency, total_documents, document_frequency_of_term):
+    """
+    Bir terimin herhangi bir dokümana yapabileceği en yüksek TF-IDF katkısı (MaxScore üst sınırı).
+    TF log-normalize edildiği için bu değer, terimin indeksteki en yüksek tf'si ile elde edilir.
+    """
+    return calculate_tfidf_term_doc(max_term_frequency, total_documents, document_frequency_of_term)
+
+
+def accumulate_tfidf_scores_maxscore(query_terms, inverted_index, total_documents_N, top_n, stats=None):
+    """
+    MaxScore dinamik budaması ile TF-IDF skorlaması (rank-safe).
+    İndeks kurulurken terim başına yalnızca max_tf (get_max_tf) saklanır; terimin üst sınırı
+    (calculate_term_upper_bound) her sorguda bu değer, N ve df ile hesaplanır, çünkü N ve df
+    her ekleme/silmede değişir. Terimler üst sınırlarına göre büyükten küçüğe işlenir. Kalan
+    terimlerin üst sınırları toplamı, o ana kadarki top_n'inci en iyi kısmi skorun (eşik) altına
+    düştüğünde, yalnızca bu terimleri içeren bir doküman artık ilk top_n'e giremez: bu noktadan
+    sonra yeni doküman skorlanmaz, kalan ("non-essential") terimler yalnızca mevcut adaylar için
+    postings'te aranır ve eşiğe ulaşamayacak adaylar elenir.
+    Döndürülen akümülatör yalnızca ilk top_n'e girebilecek dokümanları içerir; bu dokümanların
+    skorları accumulate_tfidf_scores ile aynıdır (bkz. SearchEngine.tfidf_rank).
+
+    Eşik, en iyi top_n adayın skorlarını tutan sınırlı bir min-yığından okunur. Yığındaki skorlar
+    eklendikleri andaki değerlerdir (doküman sonraki terimlerle yükselmiş olabilir), bu yüzden eşik
+    her terim öncesinde yığın tazelenerek alınır; gerçek top_n'inci skoru asla aşmaz.
+
+    stats: Verilirse (dict) docs_scored, postings_scored, postings_probed ve
+           postings_exhaustive (tam değerlendirmede dolaşılacak posting sayısı) ile doldurulur.
+    """
+    if top_n <= 0:
+        if stats is not None:
+            stats.update({'docs_scored': 0, 'postings_scored': 0, 'postings_probed': 0, 'postings_exhaustive': 0})
+        return {}
+    term_bounds = []
+    postings_exhaustive = 0
+    for term in query_terms:
+        df_term = inverted_index.get_df(term)
+        idf_val = calculate_idf(total_documents_N, df_term)
+        if idf_val == 0.0:
+            continue
+        postings_exhaustive += df_term
+        upper_bound = calculate_term_upper_bound(inverted_index.get_max_tf(term), total_documents_N, df_term)
+        term_bounds.append((upper_bound, term, idf_val))
+    term_bounds.sort(key=lambda item: item[0], reverse=True)
+
+    # remaining_bounds[i]: i. ve sonraki terimlerin üst sınırları toplamı
+    remaining_bounds = [0.0] * (len(term_bounds) + 1)
+    for i in range(len(term_bounds) - 1, -1, -1):
+        remaining_bounds[i] = remaining_bounds[i + 1] + term_bounds[i][0]
+
+    def current_threshold():
+        if len(top_heap) < top_n:
+            return 0.0
+        top_heap[:] = [(scores[doc_id], doc_id) for _, doc_id in top_heap]
+        heapq.heapify(top_heap)
+        return top_heap[0][0]
+
+    def offer(doc_id, score):
+        # Yığında olmayan adayı yığına alır (dolu ise en küçüğün yerine); yeni giriş sınırını döndürür.
+        # Çağıran yalnızca skoru sınırı geçen adaylar için çağırır.
+        if doc_id in in_heap:
+            return floor
+        if len(top_heap) < top_n:
+            heapq.heappush(top_heap, (score, doc_id))
+        else:
+            _, dropped = heapq.heapreplace(top_heap, (score, doc_id))
+            in_heap.discard(dropped)
+        in_heap.add(doc_id)
+        return top_heap[0][0] if len(top_heap) == top_n else -1.0
+
+    scores = {}
+    top_heap = [] # (skor, doc_id): en iyi top_n aday, en küçüğü başta
+    in_heap = set()
+    floor = -1.0 # Yığın dolana kadar her aday girer; sonra yığının en küçük skoru
+    postings_scored = 0
+    postings_probed = 0
+    i = 0
+    # 1) "Essential" terimler: postings tamamen dolaşılır, yeni adaylar oluşabilir.
+    while i < len(term_bounds):
+        threshold = current_threshold()
+        floor = threshold if len(top_heap) == top_n else -1.0
+        if remaining_bounds[i] < threshold:
+            break
+        _, term, idf_val = term_bounds[i]
+        for doc_id, term_freq_in_doc in inverted_index.get_postings_with_tf(term).items():
+            if term_freq_in_doc > 0:
+                score = scores.get(doc_id, 0.0) + (1 + math.log(term_freq_in_doc)) * idf_val
+                scores[doc_id] = score
+                postings_scored += 1
+                if score > floor:
+                    floor = offer(doc_id, score)
+        i += 1
+    docs_scored = len(scores)
+
+    # 2) "Non-essential" terimler: yalnızca hâlâ ilk top_n'e girebilecek adaylar için aranır.
+    while i < len(term_bounds):
+        threshold = current_threshold()
+        floor = threshold if len(top_heap) == top_n else -1.0
+        scores = {doc_id: score for doc_id, score in scores.items() if score + remaining_bounds[i] >= threshold}
+        _, term, idf_val = term_bounds[i]
+        postings_for_term = inverted_index.get_postings_with_tf(term)
+        for doc_id in scores:
+            term_freq_in_doc = postings_for_term.get(doc_id, 0)
+            postings_probed += 1
+            if term_freq_in_doc > 0:
+                score = scores[doc_id] + (1 + math.log(term_freq_in_doc)) * idf_val
+                scores[doc_id] = score
+                if score > floor:
+                    floor = offer(doc_id, score)
+        i += 1
+
+    if stats is not None:
+        stats.update({
+            'docs_scored': docs_scored,
+            'postings_scored': postings_scored,
+            'postings_probed': postings_probed,
+            'postings_exhaustive': postings_exhaustive,
+        })
+    return scores
+
 if __name__ == '__main__':
     # Örnek Kullanım (Bu kısmı çalıştırmak için inverted_index ve utils gerekir)
     
@@ -1,40 +1,85 @@
 import os
 import re
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-import nltk # nltk.download çağrıları için
-
-# NLTK kaynaklarının indirilmiş olduğundan emin olun
-try:
-    stopwords.words('english')
-except LookupError:
-    nltk.download('stopwords')
-try:
-    word_tokenize("test")
-except LookupError:
-    nltk.download('punkt')
-try:
-    WordNetLemmatizer().lemmatize("cats")
-except LookupError:
-    nltk.download('wordnet')
-try:
-    PorterStemmer().stem("running")
-except LookupError: # Porter stemmer genelde punkt ile gelir ama emin olalım
-    pass
-
-
-stop_words_set = set(stopwords.words('english'))
-stemmer_porter = PorterStemmer()
-lemmatizer_wn = WordNetLemmatizer()
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-def load_documents_imdb(data_path_root):
+# NLTK ve kaynakları (stopwords, punkt, wordnet) modül içe aktarılırken değil, ilk kullanımda yüklenir.
+# Böylece utils/search'ü içe aktaran araçlar NLTK'nın içe aktarma maliyetini (~0.3 sn) ve ağ
+# erişimini yalnızca metin işlemeye gerçekten ihtiyaç duyduklarında öder; lemmatizer ise yalnızca
+# use_lemmatization=True ile çağrıldığında yüklenir. Eksik bir kaynak ilk kullanımda indirilir.
+# Eski modül düzeyindeki adlar (stop_words_set, stemmer_porter, lemmatizer_wn) __getattr__ ile
+# aynı şekilde erişilebilir kalır.
+_nltk_resources = {}
+
+def _load_nltk_resource(name, loader, package):
+    """loader() ile kaynağı yükler; LookupError alınırsa package'ı indirip bir kez daha dener."""
+    resource = _nltk_resources.get(name)
+    if resource is None:
+        try:
+            resource = loader()
+        except LookupError:
+            import nltk # nltk.download çağrıları için
+            nltk.download(package, quiet=True)
+            resource = loader()
+        _nltk_resources[name] = resource
+    return resource
+
+def _load_stop_words():
+    from nltk.corpus import stopwords
+    return set(stopwords.words('english'))
+
+def _load_stemmer():
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+def _load_lemmatizer():
+    from nltk.stem import WordNetLemmatizer
+    lemmatizer = WordNetLemmatizer()
+    lemmatizer.lemmatize("cats") # wordnet verisi ilk çağrıda yüklenir; eksikse burada LookupError oluşur
+    return lemmatizer
+
+def _load_word_tokenize():
+    from nltk.tokenize import word_tokenize
+    word_tokenize("test") # punkt verisi eksikse burada LookupError oluşur
+    return word_tokenize
+
+def get_stop_words():
+    return _nltk_resources.get('stop_words') or _load_nltk_resource('stop_words', _load_stop_words, 'stopwords')
+
+def get_stemmer():
+    return _nltk_resources.get('stemmer') or _load_nltk_resource('stemmer', _load_stemmer, 'punkt')
+
+def get_lemmatizer():
+    return _nltk_resources.get('lemmatizer') or _load_nltk_resource('lemmatizer', _load_lemmatizer, 'wordnet')
+
+def get_word_tokenize():
+    return _nltk_resources.get('word_tokenize') or _load_nltk_resource('word_tokenize', _load_word_tokenize, 'punkt')
+
+def word_tokenize(text):
+    return get_word_tokenize()(text)
+
+_LAZY_MODULE_ATTRIBUTES = {
+    'stop_words_set': get_stop_words,
+    'stemmer_porter': get_stemmer,
+    'lemmatizer_wn': get_lemmatizer,
+}
+
+def __getattr__(name):
+    loader = _LAZY_MODULE_ATTRIBUTES.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return loader()
+
+def iter_documents_imdb(data_path_root):
     """
-    IMDb veri setindeki dokümanları (train ve test altındaki pos/neg) yükler.
+    IMDb veri setindeki dokümanları (train ve test altındaki pos/neg) tek tek, diske erişildikçe üretir.
+    Aynı anda bellekte yalnızca bir doküman metni bulunur.
     data_path_root: 'aclImdb' klasörünün yolu.
-    Returns: {doc_id: text_content} şeklinde bir sözlük.
+    Yields: (doc_id, metadata, text) üçlüleri. doc_id'ler load_documents_imdb ile aynı sırada verilir
+            ("doc_0", "doc_1", ...); metadata: {'split', 'sentiment', 'file_name', 'rating'}.
     """
-    documents = {}
     doc_id_counter = 0 # Basit bir sayaçla benzersiz ID
 
     for split in ['train', 'test']:
@@ -51,15 +96,46 @@ def load_documents_imdb(data_path_root):
                 if filename.endswith(".txt"):
                     file_path = os.path.join(sentiment_path, filename)
                     with open(file_path, 'r', encoding='utf-8') as f:
-                        # Örnek ID: "train_pos_0_4.txt" -> "doc_0", "doc_1" ...
-                        doc_id = f"doc_{doc_id_counter}"
-                        documents[doc_id] = f.read()
-                        doc_id_counter += 1
+                        text = f.read()
+                    # Dosya adı "<inceleme no>_<puan>.txt" biçimindedir (ör. "0_9.txt").
+                    rating = filename[:-4].rpartition('_')[2]
+                    metadata = {
+                        'split': split,
+                        'sentiment': sentiment,
+                        'file_name': filename,
+                        'rating': int(rating) if rating.isdigit() else None,
+                    }
+                    # Örnek ID: "train_pos_0_4.txt" -> "doc_0", "doc_1" ...
+                    yield f"doc_{doc_id_counter}", metadata, text
+                    doc_id_counter += 1
+
+def load_documents_imdb(data_path_root):
+    """
+    IMDb veri setindeki dokümanları (train ve test altındaki pos/neg) yükler.
+    data_path_root: 'aclImdb' klasörünün yolu.
+    Returns: {doc_id: text_content} şeklinde bir sözlük.
+    Tüm korpusu belleğe alır; akış halinde okumak için iter_documents_imdb kullanılabilir.
+    """
+    documents = {doc_id: text for doc_id, _, text in iter_documents_imdb(data_path_root)}
     if not documents:
         print(f"HATA: {data_path_root} altında hiç doküman yüklenemedi. Lütfen dosya yollarını kontrol edin.")
         print("IMDb veri setini 'data/aclImdb/' şeklinde çıkardığınızdan emin olun.")
     return documents
 
+def iter_batches(items, batch_size):
+    """Herhangi bir iterable'ı batch_size boyutunda listeler halinde, akış bozulmadan gruplar."""
+    return _iter_chunks(items, batch_size)
+
+def tee_to_writers(documents, writers):
+    """
+    (doc_id, text) akışındaki her dokümanı aynen aktarırken writers'a (ör. doc_store.DocumentStoreWriter,
+    snippets.SnippetIndexWriter) da yazar; böylece ön işleme ve dosya yazımı tek geçişte yapılır.
+    """
+    for doc_id, text in documents:
+        for writer in writers:
+            writer.add(doc_id, text)
+        yield doc_id, text
+
 def preprocess_text(text, use_stemming=True, use_lemmatization=False):
     """
     Metni ön işler: lowercasing, HTML removal, punctuation removal, tokenization, stopword removal, stemming/lemmatization.
@@ -75,6 +151,9 @@ def preprocess_text(text, use_stemming=True, use_lemmatization=False):
     # 4. Tokenization
     tokens = word_tokenize(text)
     # 5. Stopword removal & Stemming/Lemmatization
+    stop_words_set = get_stop_words()
+    stemmer_porter = get_stemmer() if use_stemming else None
+    lemmatizer_wn = get_lemmatizer() if use_lemmatization and not use_stemming else None
     processed_tokens = []
     for token in tokens:
         if token not in stop_words_set and len(token) > 1: # Tek harfli tokenları da atla
@@ -86,10 +165,253 @@ def preprocess_text(text, use_stemming=True, use_lemmatization=False):
                 processed_tokens.append(token)
     return processed_tokens
 
-def create_vocabulary_report_detailed(documents, sample_size=3):
+_BR_PATTERN = re.compile(r'<br\s*/?>')
+_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+_NON_ALPHA_PATTERN = re.compile(r'[^a-z\s]')
+# Temizlenmiş ([a-z\s]) metinde word_tokenize'ın (Treebank) boşluk dışında yaptığı tek bölme,
+# bu kalıplaşmış kelimeleri ikiye ayırmaktır.
+_TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+# analyze_spans için: özgün (küçük harfe çevrilmemiş) metin üzerinde aynı bölmeyi yapan kalıplar.
+_BR_PATTERN_ANY_CASE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_ASCII_LETTER_PATTERN = re.compile(r'[A-Za-z]')
+
+
+class FastAnalyzer:
+    """
+    preprocess_text ile token token aynı çıktıyı üreten yüksek hızlı ön işleyici.
+    Düzenli ifadeler önceden derlenir, temizlenmiş metin word_tokenize yerine str.split ile
+    bölünür ve yüzey token -> terim (stopword ise None) dönüşümü sınırlı bir LRU önbellekte tutulur;
+    böylece stemmer her farklı kelime için bir kez çalışır.
+    cache_size: Önbellekteki en fazla farklı token sayısı (None: sınırsız).
+    """
+
+    def __init__(self, use_stemming=True, use_lemmatization=False, cache_size=100000):
+        self.use_stemming = use_stemming
+        self.use_lemmatization = use_lemmatization
+        self._analyze_token = lru_cache(maxsize=cache_size)(self._analyze_token_uncached)
+        self._analyze_surface = lru_cache(maxsize=cache_size)(self._analyze_surface_uncached)
+
+    def _analyze_token_uncached(self, token):
+        if token in get_stop_words() or len(token) <= 1: # Tek harfli tokenları da atla
+            return None
+        if self.use_stemming:
+            return get_stemmer().stem(token)
+        if self.use_lemmatization:
+            return get_lemmatizer().lemmatize(token)
+        return token
+
+    def tokenize(self, text):
+        """Lowercase + HTML/noktalama temizliği + bölme (preprocess_text'in 1-4. adımları)."""
+        text = text.lower()
+        if '<' in text:
+            text = _BR_PATTERN.sub(' ', text)
+            text = _HTML_TAG_PATTERN.sub('', text)
+        text = _NON_ALPHA_PATTERN.sub('', text)
+        tokens = text.split()
+        if any(token in _TREEBANK_SPLITS for token in tokens):
+            tokens = [part for token in tokens for part in _TREEBANK_SPLITS.get(token, (token,))]
+        return tokens
+
+    def _analyze_surface_uncached(self, surface):
+        # Yüzey kelime (ör. "Movie's") -> (terimler, baştaki harf dışı karakter sayısı, sondaki sayı).
+        token = _NON_ALPHA_PATTERN.sub('', surface.lower())
+        if not token:
+            return None
+        terms = tuple(term for term in map(self._analyze_token, _TREEBANK_SPLITS.get(token, (token,)))
+                      if term is not None)
+        if not terms:
+            return None
+        return (terms, _ASCII_LETTER_PATTERN.search(surface).start(),
+                _ASCII_LETTER_PATTERN.search(surface[::-1]).start())
+
+    def analyze_spans(self, text):
+        """
+        __call__ ile aynı terimleri, özgün metindeki karakter aralıklarıyla birlikte döndürür.
+        Returns: [(terim, başlangıç, bitiş), ...]; aralık, yüzey kelimenin ilk ve son harfini kapsar
+        (noktalama dışarıda kalır). Treebank bölmesiyle oluşan iki parça aynı aralığı paylaşır.
+        """
+        masked = text
+        if '<' in text:
+            # Etiketler aynı uzunlukta maskelenir, böylece konumlar değişmez: <br> boşluk olur (kelimeleri
+            # ayırır), diğer etiketler harf olmayan bir karakter olur (preprocess_text'teki gibi siler).
+            masked = _BR_PATTERN_ANY_CASE.sub(lambda m: ' ' * len(m.group()), masked)
+            masked = _HTML_TAG_PATTERN.sub(lambda m: '\0' * len(m.group()), masked)
+        analyze_surface = self._analyze_surface
+        find = masked.find
+        spans = []
+        position = 0
+        for surface in masked.split():
+            position = find(surface, position)
+            analyzed = analyze_surface(surface)
+            if analyzed is not None:
+                terms, leading, trailing = analyzed
+                for term in terms:
+                    spans.append((term, position + leading, position + len(surface) - trailing))
+            position += len(surface)
+        return spans
+
+    def __call__(self, text):
+        analyze_token = self._analyze_token
+        processed_tokens = []
+        for token in self.tokenize(text):
+            term = analyze_token(token)
+            if term is not None:
+                processed_tokens.append(term)
+        return processed_tokens
+
+    def cache_stats(self):
+        """Önbellek istatistikleri: hits, misses, hit_rate, size, max_size."""
+        info = self._analyze_token.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+        }
+
+
+_fast_analyzers = {}
+
+def get_fast_analyzer(use_stemming=True, use_lemmatization=False):
+    """Verilen ayarlar için süreç içinde paylaşılan FastAnalyzer (önbelleği ortaktır)."""
+    key = (use_stemming, use_lemmatization)
+    analyzer = _fast_analyzers.get(key)
+    if analyzer is None:
+        analyzer = _fast_analyzers[key] = FastAnalyzer(use_stemming, use_lemmatization)
+    return analyzer
+
+def preprocess_text_fast(text, use_stemming=True, use_lemmatization=False):
+    """preprocess_text'in FastAnalyzer ile çalışan, aynı çıktıyı veren hızlı sürümü."""
+    return get_fast_analyzer(use_stemming, use_lemmatization)(text)
+
+def verify_fast_analyzer(documents, use_stemming=True, use_lemmatization=False, max_mismatches=5):
+    """
+    preprocess_text ve FastAnalyzer'ı aynı dokümanlar üzerinde çalıştırıp çıktıları karşılaştırır.
+    documents: {doc_id: text} veya (doc_id, text) çiftleri.
+    Returns: (farklı çıkan doc_id listesi (en fazla max_mismatches), istatistik sözlüğü).
+    """
+    items = documents.items() if hasattr(documents, 'items') else documents
+    analyzer = FastAnalyzer(use_stemming, use_lemmatization)
+    mismatches = []
+    doc_count = 0
+    reference_seconds = fast_seconds = 0.0
+    for doc_id, text in items:
+        doc_count += 1
+        start_time = time.perf_counter()
+        expected = preprocess_text(text, use_stemming, use_lemmatization)
+        reference_seconds += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        actual = analyzer(text)
+        fast_seconds += time.perf_counter() - start_time
+        if actual != expected and len(mismatches) < max_mismatches:
+            mismatches.append(doc_id)
+    stats = {
+        'docs': doc_count,
+        'reference_seconds': reference_seconds,
+        'fast_seconds': fast_seconds,
+        'speedup': reference_seconds / fast_seconds if fast_seconds > 0 else 0.0,
+        **{f'cache_{name}': value for name, value in analyzer.cache_stats().items()},
+    }
+    return mismatches, stats
+
+def _preprocess_chunk(chunk, use_stemming=True, use_lemmatization=False, fast=False):
+    """
+    Paralel ön işlemede işçi süreçlerde çalışan fonksiyon.
+    chunk: [(doc_id, text), ...] -> [(doc_id, [token, ...]), ...]
+    """
+    preprocess = preprocess_text_fast if fast else preprocess_text
+    return [(doc_id, preprocess(text, use_stemming, use_lemmatization)) for doc_id, text in chunk]
+
+def _iter_chunks(items, chunk_size):
+    """(doc_id, text) çiftlerini chunk_size boyutunda listeler halinde gruplar."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def preprocess_documents_parallel(documents, num_workers=None, chunk_size=256,
+                                  use_stemming=True, use_lemmatization=False, stats=None, fast=False):
+    """
+    preprocess_text'i bir süreç havuzu (process pool) üzerinde parça parça (chunk) çalıştırır.
+    Sonuçlar doküman sırasıyla (doc_id, tokens) olarak akış halinde (generator) döndürülür,
+    bu yüzden çıktı doğrudan InvertedIndex.build_index'e verilebilir.
+
+    documents: {doc_id: text} sözlüğü veya (doc_id, text) çiftleri üreten bir iterable.
+    num_workers: İşçi süreç sayısı. None ise os.cpu_count(), 1 ise havuz kullanılmadan seri çalışır.
+    chunk_size: Her işçiye tek seferde gönderilen doküman sayısı.
+    stats: Verilirse (dict), aşama sonunda docs, tokens, seconds, docs_per_sec, tokens_per_sec
+           ve workers anahtarları ile doldurulur.
+    fast: True ise preprocess_text yerine aynı çıktıyı veren FastAnalyzer kullanılır.
+    """
+    items = documents.items() if hasattr(documents, 'items') else documents
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if stats is None:
+        stats = {}
+
+    start_time = time.perf_counter()
+    doc_count = 0
+    token_count = 0
+
+    if num_workers <= 1:
+        preprocess = preprocess_text_fast if fast else preprocess_text
+        for doc_id, text in items:
+            tokens = preprocess(text, use_stemming, use_lemmatization)
+            doc_count += 1
+            token_count += len(tokens)
+            yield doc_id, tokens
+    else:
+        # Aynı anda havuzda bekleyen chunk sayısı sınırlı tutulur; böylece girdi bir generator ise
+        # bellek kullanımı korpus boyutuna değil chunk_size * num_workers'a bağlı kalır.
+        max_in_flight = num_workers * 2
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            pending = deque()
+            for chunk in _iter_chunks(items, chunk_size):
+                pending.append(executor.submit(_preprocess_chunk, chunk, use_stemming, use_lemmatization, fast))
+                if len(pending) >= max_in_flight:
+                    for doc_id, tokens in pending.popleft().result():
+                        doc_count += 1
+                        token_count += len(tokens)
+                        yield doc_id, tokens
+            while pending:
+                for doc_id, tokens in pending.popleft().result():
+                    doc_count += 1
+                    token_count += len(tokens)
+                    yield doc_id, tokens
+
+    elapsed = time.perf_counter() - start_time
+    stats.update({
+        'docs': doc_count,
+        'tokens': token_count,
+        'seconds': elapsed,
+        'docs_per_sec': doc_count / elapsed if elapsed > 0 else 0.0,
+        'tokens_per_sec': token_count / elapsed if elapsed > 0 else 0.0,
+        'workers': num_workers,
+    })
+    print(f"Ön işleme: {doc_count} doküman, {token_count} token, {elapsed:.2f} sn "
+          f"({stats['docs_per_sec']:.0f} doküman/sn, {stats['tokens_per_sec']:.0f} token/sn, {num_workers} işçi).")
+
+def create_vocabulary_report_detailed(documents, sample_size=3, num_workers=1, fast=False):
     """
     Bölüm I için daha detaylı kelime dağarcığı oluşturma adımlarını gösteren bir rapor üretir.
+    num_workers > 1 (veya None) verilirse tüm dokümanların ön işlemesi paralel yapılır
+    (bkz. preprocess_documents_parallel). fast=True ise FastAnalyzer kullanılır.
     """
+    stop_words_set = get_stop_words()
+    stemmer_porter = get_stemmer()
     print("\n" + "="*70)
     print("BÖLÜM I: TERİMLERİN KELİME DAĞARCIĞININ BELİRLENMESİ (ÖRNEK RAPOR)")
     print("="*70 + "\n")
@@ -150,8 +472,7 @@ def create_vocabulary_report_detailed(documents, sample_size=3):
     print("\nNihai Sözlük Oluşturuluyor (Tüm Dokümanlar Üzerinden - Stemming ile)...")
     processed_docs_full = {}
     final_vocabulary_stem_full = set()
-    for doc_id, text_content in documents.items():
-        processed_tokens_for_doc = preprocess_text(text_content, use_stemming=True, use_lemmatization=False)
+    for doc_id, processed_tokens_for_doc in preprocess_documents_parallel(documents, num_workers=num_workers, fast=fast):
         processed_docs_full[doc_id] = processed_tokens_for_doc
         final_vocabulary_stem_full.update(processed_tokens_for_doc)
 
@@ -187,6 +508,12 @@ if __name__ == '__main__':
         final_vocab, processed_docs_all = create_vocabulary_report_detailed(raw_docs_full, sample_size=2)
         
         print(f"\nFinal vocabulary (stemmed) first 10: {final_vocab[:10]}")
+
+        # FastAnalyzer'ın tüm korpusta preprocess_text ile aynı çıktıyı verdiğini doğrula
+        mismatched_doc_ids, analyzer_stats = verify_fast_analyzer(raw_docs_full)
+        print(f"FastAnalyzer: {analyzer_stats['docs']} doküman, {analyzer_stats['speedup']:.1f}x hızlı, "
+              f"önbellek isabet oranı {analyzer_stats['cache_hit_rate']:.1%}, "
+              f"farklı çıktı: {mismatched_doc_ids or 'yok'}")
         # print(f"Processed docs (sample from all): {list(processed_docs_all.items())[:1]}")
     else:
         print("Test için doküman yüklenemedi.")
\ No newline at end of file
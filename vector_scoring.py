@@ -0,0 +1,178 @@
+# vector_scoring.py
+
+import time
+
+import numpy as np
+
+try:
+    import scipy.sparse as sparse
+except ImportError: # SciPy yoksa saf NumPy yolu kullanılır
+    sparse = None
+
+from utils import preprocess_text_fast
+
+
+class TfidfMatrix:
+    """
+    İndeksin terim x doküman TF-IDF ağırlık matrisi (CSR düzeninde: satırlar terim, sütunlar doküman).
+    Her hücre tfidf.calculate_tfidf_term_doc ile aynı formüldedir: (1 + log tf) * log(N / df).
+    Bir sorgunun skoru, sorgu terimlerinin satırlarının toplamıdır; bu yüzden bir sorgu grubu tek bir
+    seyrek matris çarpımı (SciPy varsa) ya da terim başına vektörel toplama (yalnız NumPy) ile
+    skorlanır ve en iyi k sonuç argpartition ile seçilir.
+
+    Sonuçlar SearchEngine.tfidf_rank ile aynı skorları verir (kayan nokta toplama sırasından doğan
+    son basamak farkları hariç); eşit skorlu dokümanların sırası farklı olabilir.
+    """
+
+    def __init__(self, term_rows, doc_ids, indptr, indices, weights, use_scipy=None):
+        self.term_rows = term_rows # {term: satır numarası}
+        self.doc_ids = doc_ids     # sütun numarası -> doc_id
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        if use_scipy is None:
+            use_scipy = sparse is not None
+        if use_scipy and sparse is None:
+            raise ImportError("use_scipy=True için SciPy kurulu olmalıdır.")
+        self.csr = None
+        if use_scipy:
+            self.csr = sparse.csr_matrix((weights, indices, indptr), shape=(len(term_rows), len(doc_ids)))
+            self.csr.sort_indices()
+
+    @classmethod
+    def from_index(cls, inverted_index, use_scipy=None):
+        """
+        InvertedIndex, CompactInvertedIndex veya MappedInvertedIndex'ten matrisi derler.
+        Sıralı postings dizileri sunan indekslerde (get_postings_arrays) diziler doğrudan kopyalanır.
+        """
+        start_time = time.perf_counter()
+        N = inverted_index.total_docs
+        terms = inverted_index.get_vocabulary()
+        has_arrays = hasattr(inverted_index, 'get_postings_arrays') and hasattr(inverted_index, 'doc_ids')
+        if has_arrays:
+            doc_ids = list(inverted_index.doc_ids)
+        else:
+            doc_ids = list(inverted_index.doc_lengths.keys())
+            doc_num_of = {doc_id: num for num, doc_id in enumerate(doc_ids)}
+
+        term_rows = {}
+        row_indices = []
+        row_tfs = []
+        dfs = np.empty(len(terms), dtype=np.float64)
+        for row, term in enumerate(terms):
+            term_rows[term] = row
+            dfs[row] = inverted_index.get_df(term)
+            if has_arrays:
+                doc_nums, tfs = inverted_index.get_postings_arrays(term)
+                row_indices.append(np.asarray(doc_nums, dtype=np.int32))
+                row_tfs.append(np.asarray(tfs, dtype=np.float64))
+            else:
+                postings = inverted_index.get_postings_with_tf(term)
+                count = len(postings)
+                row_indices.append(np.fromiter(map(doc_num_of.__getitem__, postings), dtype=np.int32, count=count))
+                row_tfs.append(np.fromiter(postings.values(), dtype=np.float64, count=count))
+
+        lengths = np.fromiter((len(row) for row in row_indices), dtype=np.int64, count=len(row_indices))
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(row_indices) if row_indices else np.empty(0, dtype=np.int32)
+        tfs = np.concatenate(row_tfs) if row_tfs else np.empty(0, dtype=np.float64)
+
+        # idf = log(N / df); df == 0 veya df >= N olan terimlerin ağırlığı 0'dır (calculate_idf gibi).
+        with np.errstate(divide='ignore'):
+            idfs = np.where((dfs > 0) & (dfs <= N), np.log(N / np.maximum(dfs, 1)), 0.0) if N else np.zeros_like(dfs)
+        weights = (1.0 + np.log(tfs)) * np.repeat(idfs, lengths)
+
+        matrix = cls(term_rows, doc_ids, indptr, indices, weights, use_scipy)
+        print(f"TF-IDF matrisi: {len(terms)} terim x {len(doc_ids)} doküman, {len(weights)} ağırlık "
+              f"({'SciPy CSR' if matrix.csr is not None else 'NumPy'}), {time.perf_counter() - start_time:.2f} sn.")
+        return matrix
+
+    @property
+    def shape(self):
+        return len(self.term_rows), len(self.doc_ids)
+
+    def _query_rows(self, query_terms):
+        """Sorgu terimlerinin (benzersiz) matris satırları; indekste olmayan terimler atlanır."""
+        term_rows = self.term_rows
+        return sorted({term_rows[term] for term in query_terms if term in term_rows})
+
+    def _score_block(self, rows_per_query):
+        """Bir sorgu grubunun (sorgu x doküman) yoğun skor matrisini hesaplar."""
+        num_docs = len(self.doc_ids)
+        if self.csr is not None:
+            query_indptr = np.zeros(len(rows_per_query) + 1, dtype=np.int64)
+            np.cumsum([len(rows) for rows in rows_per_query], out=query_indptr[1:])
+            query_indices = np.fromiter((row for rows in rows_per_query for row in rows), dtype=np.int32,
+                                        count=int(query_indptr[-1]))
+            query_matrix = sparse.csr_matrix((np.ones(len(query_indices)), query_indices, query_indptr),
+                                             shape=(len(rows_per_query), self.shape[0]))
+            return (query_matrix @ self.csr).toarray()
+
+        scores = np.zeros((len(rows_per_query), num_docs), dtype=np.float64)
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        for query_no, rows in enumerate(rows_per_query):
+            query_scores = scores[query_no]
+            for row in rows:
+                start, end = indptr[row], indptr[row + 1]
+                # Bir satırda her doküman en fazla bir kez geçer; fancy-index ile toplama güvenlidir.
+                query_scores[indices[start:end]] += weights[start:end]
+        return scores
+
+    def _top_n(self, query_scores, top_n):
+        """Bir skor satırından pozitif skorlu en iyi top_n dokümanı argpartition ile seçer."""
+        positive = np.flatnonzero(query_scores > 0)
+        if len(positive) > top_n:
+            best = np.argpartition(query_scores[positive], len(positive) - top_n)[len(positive) - top_n:]
+            positive = positive[best]
+        order = positive[np.argsort(-query_scores[positive], kind='stable')]
+        doc_ids = self.doc_ids
+        return [(doc_ids[doc_num], float(query_scores[doc_num])) for doc_num in order]
+
+    def score_term_lists(self, term_lists, top_n=10, batch_size=256):
+        """
+        İşlenmiş terim listelerini toplu skorlar. Bellek kullanımı batch_size x doküman sayısı
+        kadar yoğun skor matrisiyle sınırlıdır.
+        Returns: Her sorgu için (doc_id, score) listesi (skora göre azalan).
+        """
+        if top_n <= 0: # tfidf_rank ile aynı: skorlamaya gerek yok
+            return [[] for _ in term_lists]
+        results = []
+        for start in range(0, len(term_lists), batch_size):
+            rows_per_query = [self._query_rows(terms) for terms in term_lists[start:start + batch_size]]
+            scores = self._score_block(rows_per_query)
+            results.extend(self._top_n(query_scores, top_n) for query_scores in scores)
+        return results
+
+    def rank_queries(self, query_strings, top_n=10, batch_size=256):
+        """Ham sorgu metinlerini ön işleyip score_term_lists ile toplu sıralar."""
+        return self.score_term_lists([preprocess_text_fast(query) for query in query_strings], top_n, batch_size)
+
+
+if __name__ == '__main__':
+    import random
+    from inverted_index import InvertedIndex
+    from search import SearchEngine
+
+    random.seed(0)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = {f"doc_{i}": random.choices(vocabulary, weights, k=random.randint(20, 200)) for i in range(20000)}
+    inv_idx = InvertedIndex()
+    inv_idx.build_index(documents)
+    term_lists = [random.sample(vocabulary[:2000], random.randint(1, 5)) for _ in range(2000)]
+
+    search_engine = SearchEngine(inv_idx, cache_size=0)
+    start_time = time.perf_counter()
+    expected = [search_engine._tfidf_rank_terms(list(set(terms)), inv_idx.total_docs, 10, None) for terms in term_lists]
+    loop_seconds = time.perf_counter() - start_time
+
+    matrix = TfidfMatrix.from_index(inv_idx)
+    start_time = time.perf_counter()
+    actual = matrix.score_term_lists(term_lists, top_n=10)
+    vector_seconds = time.perf_counter() - start_time
+
+    for expected_top, actual_top in zip(expected, actual):
+        assert np.allclose([score for _, score in expected_top], [score for _, score in actual_top], rtol=1e-12)
+    print(f"{len(term_lists)} sorgu: tek tek {loop_seconds:.2f} sn, toplu {vector_seconds:.2f} sn "
+          f"({loop_seconds / vector_seconds:.1f}x).")